@@ -56,7 +56,7 @@ class ArticleAdmin(admin.ModelAdmin):
     list_editable = ['display_order', 'is_published']
     list_display_links = ['title']
     ordering = ['display_order', '-created_at']
-    readonly_fields = ['id', 'views', 'created_at', 'updated_at', 'image_preview', 'video_preview']
+    readonly_fields = ['id', 'views', 'created_at', 'updated_at', 'image_preview', 'video_preview', 'video_hls_manifest', 'video_poster', 'video_preview_clip', 'video_processed_at', 'telegram_chat_id', 'telegram_file_unique_id']
     
     def get_form(self, request, obj=None, **kwargs):
         form = super().get_form(request, obj, **kwargs)
@@ -105,7 +105,7 @@ class ArticleAdmin(admin.ModelAdmin):
             ''')
         }),
         ('Медиа', {
-            'fields': ('image', 'image_preview', 'video_file', 'video_url', 'video_preview', 'video_status', 'telegram_channel_username', 'telegram_message_id'),
+            'fields': ('image', 'image_preview', 'video_file', 'video_url', 'video_preview', 'video_status', 'video_hls_manifest', 'video_poster', 'video_preview_clip', 'video_processed_at', 'telegram_channel_username', 'telegram_message_id', 'telegram_chat_id', 'telegram_file_unique_id'),
             'description': 'Добавьте главное изображение или видео. Можно загрузить видео файл или указать ссылку (YouTube, Vimeo). Для больших видео из Telegram (>20MB) автоматически сохраняются telegram_channel_username и telegram_message_id, статус устанавливается в "pending" для скачивания через Telethon worker.'
         }),
         ('Статистика', {
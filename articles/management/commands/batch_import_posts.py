@@ -5,15 +5,23 @@ import os
 import sys
 import time
 from datetime import datetime
-from io import BytesIO
 from collections import deque
 from django.core.management.base import BaseCommand
-from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import transaction
+from django.db.models import Q
 from django.utils.text import slugify
 from django.utils import timezone
 from loguru import logger
 import requests
+from core.services import get_telegram_client
 from articles.models import Article, ArticleImage
+from articles.services import notify_video_worker, fetch_telegram_media
+from articles.services.bulk_import import (
+    allocate_article_slugs,
+    store_media_files,
+    delete_media_files,
+    bulk_create_articles,
+)
 
 
 class Command(BaseCommand):
@@ -29,6 +37,9 @@ class Command(BaseCommand):
     
     Использование:
         python manage.py batch_import_posts --timeout 300
+        
+        # Сотни исторических постов: массовое создание статей
+        python manage.py batch_import_posts --timeout 300 --bulk
     """
     help = 'Батч-импорт постов из Telegram с очередью'
     
@@ -51,6 +62,11 @@ class Command(BaseCommand):
             default=20,
             help='Размер батча для обработки (по умолчанию 20)',
         )
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            help='Массовое создание: slug в памяти, параллельное сохранение фото, bulk_create в одной транзакции на батч',
+        )
         parser.add_argument(
             '--force',
             action='store_true',
@@ -60,11 +76,12 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         """Основной метод команды"""
         token = os.environ.get('TELEGRAM_BOT_TOKEN', '8389210453:AAE0pUO2PflNa8UWqXWRN-SEnf8LvplsdrA')
-        api_url = f'https://api.telegram.org/bot{token}'
+        telegram = get_telegram_client(token)
         timeout = options['timeout']
         auto_publish = options['auto_publish']
         batch_size = options['batch_size']
         force = options.get('force', False)
+        bulk = options['bulk']
         
         logger.info('=' * 80)
         logger.info('📦 БАТЧ-ИМПОРТ ПОСТОВ ИЗ TELEGRAM')
@@ -72,13 +89,15 @@ class Command(BaseCommand):
         logger.info(f'⏱️  Таймаут: {timeout} сек ({timeout//60} мин)')
         logger.info(f'📊 Размер батча: {batch_size} постов')
         logger.info(f'📝 Публикация: {"Сразу" if auto_publish else "Черновики"}')
+        if bulk:
+            logger.info('⚡ Режим: МАССОВЫЙ (bulk_create по батчам)')
         if force:
             logger.info('🔄 Режим: ПРИНУДИТЕЛЬНЫЙ (существующие статьи будут удалены и пересозданы)')
         logger.info('=' * 80)
         
         # Проверяем бота
         try:
-            response = requests.get(f'{api_url}/getMe', timeout=10)
+            response = telegram.get('getMe')
             response.raise_for_status()
             bot_info = response.json()
             
@@ -142,14 +161,13 @@ class Command(BaseCommand):
                     break
                 
                 try:
-                    response = requests.get(
-                        f'{api_url}/getUpdates',
+                    response = telegram.get(
+                        'getUpdates',
                         params={
                             'offset': offset,
                             'timeout': 10,
                             'allowed_updates': ['message']
-                        },
-                        timeout=15
+                        }
                     )
                     response.raise_for_status()
                     data = response.json()
@@ -172,10 +190,12 @@ class Command(BaseCommand):
                         if 'forward_from_chat' not in message and 'forward_origin' not in message:
                             continue
                         
-                        # Получаем ID для дедупликации
-                        message_id = message.get('message_id')
-                        forward_date = message.get('forward_date', 0)
-                        unique_id = f"{message_id}_{forward_date}"
+                        # Получаем ID для дедупликации: исходный пост в канале, если он известен
+                        source_chat_id, source_message_id, _ = self._forward_source(message)
+                        if source_chat_id and source_message_id:
+                            unique_id = f"{source_chat_id}_{source_message_id}"
+                        else:
+                            unique_id = f"{message.get('message_id')}_{message.get('forward_date', 0)}"
                         
                         if unique_id in processed_ids:
                             continue
@@ -233,14 +253,14 @@ class Command(BaseCommand):
                         if 'video' in msg:
                             all_videos.append({
                                 'video': msg['video'],
-                                'message_id': msg.get('message_id'),
+                                'message_id': self._forward_source(msg)[1] or msg.get('message_id'),
                                 'caption': msg.get('caption', '')
                             })
                         # Проверяем video_note (кружки/stories)
                         if 'video_note' in msg:
                             all_videos.append({
                                 'video': msg['video_note'],
-                                'message_id': msg.get('message_id'),
+                                'message_id': self._forward_source(msg)[1] or msg.get('message_id'),
                                 'caption': msg.get('caption', ''),
                                 'is_video_note': True
                             })
@@ -298,382 +318,223 @@ class Command(BaseCommand):
                 logger.info(f'📦 Батч #{batch_num}: Обработка {len(batch)} постов...')
                 logger.info('')
                 
-                for idx, message in enumerate(batch, 1):
-                    try:
-                        # Извлекаем данные
-                        text = message.get('text') or message.get('caption', '')
-                        
-                        # Получаем фото (может быть одно фото или группа)
-                        photos = []
-                        videos = []  # Список видео (может быть несколько в медиа-группе)
-                        
-                        # Проверяем, это объединённая медиа-группа?
-                        if '_all_photos' in message:
-                            # Используем все фото из группы
-                            photos = message['_all_photos']
-                        elif 'photo' in message:
-                            # Одно фото
-                            photo = max(message['photo'], key=lambda x: x.get('file_size', 0))
-                            photos.append(photo)
-                        
-                        # Проверяем медиа-группу с видео
-                        if '_all_videos' in message:
-                            # Используем все видео из группы
-                            videos = message['_all_videos']
-                        else:
-                            # Обычное видео (одно)
-                            if 'video' in message:
-                                videos = [{
-                                    'video': message['video'],
-                                    'message_id': message.get('forward_from_message_id') or message.get('message_id'),
-                                    'caption': message.get('caption', '')
-                                }]
-                            
-                            # Проверяем video_note (кружки/stories)
-                            if 'video_note' in message:
-                                videos = [{
-                                    'video': message['video_note'],
-                                    'message_id': message.get('forward_from_message_id') or message.get('message_id'),
-                                    'caption': message.get('caption', ''),
-                                    'is_video_note': True
-                                }]
-                        
-                        # Если нет текста И нет фото И нет видео - пропускаем
-                        if not text and not photos and not videos:
-                            logger.warning(f'   ⚠️  Пост #{idx}: Нет текста, фото и видео, пропускаем')
-                            skipped_count += 1
-                            continue
-                        
-                        # Парсим текст или создаём заголовок из даты
-                        if text:
-                            lines = text.strip().split('\n', 1)
-                            title = lines[0][:255]
-                            content = lines[1] if len(lines) > 1 else text
-                        else:
-                            # Если текста нет, но есть медиа - создаём заголовок из даты + времени
-                            post_date = message.get('forward_date') or message.get('date', int(time.time()))
-                            date_obj = datetime.fromtimestamp(post_date)
-                            message_id = message.get('forward_from_message_id') or message.get('message_id', '')
-                            msg_id_suffix = f" (#{message_id})" if message_id else ""
-                            # Проверяем, есть ли video_note (кружки/stories)
-                            is_video_note = videos and any(v.get('is_video_note') for v in videos)
-                            # Добавляем время с секундами и message_id чтобы избежать дубликатов
-                            if videos:
-                                if is_video_note:
-                                    title = f"Кружок от {date_obj.strftime('%d.%m.%Y %H:%M:%S')}{msg_id_suffix}"
-                                    content = f"Видео-кружок (story), добавленный {date_obj.strftime('%d.%m.%Y в %H:%M:%S')}"
-                                else:
-                                    title = f"Видео от {date_obj.strftime('%d.%m.%Y %H:%M:%S')}{msg_id_suffix}"
-                                    content = f"Видео, добавленное {date_obj.strftime('%d.%m.%Y в %H:%M:%S')}"
-                            elif photos:
-                                photo_count = len(photos)
-                                if photo_count > 1:
-                                    title = f"Фото {photo_count} шт. от {date_obj.strftime('%d.%m.%Y %H:%M:%S')}{msg_id_suffix}"
-                                    content = f"Галерея из {photo_count} фотографий, добавленная {date_obj.strftime('%d.%m.%Y в %H:%M:%S')}"
-                                else:
-                                    title = f"Фото от {date_obj.strftime('%d.%m.%Y %H:%M:%S')}{msg_id_suffix}"
-                                    content = f"Фотография, добавленная {date_obj.strftime('%d.%m.%Y в %H:%M:%S')}"
-                            else:
-                                # На всякий случай (не должно сюда попасть)
-                                title = f"Пост от {date_obj.strftime('%d.%m.%Y %H:%M:%S')}{msg_id_suffix}"
-                                content = f"Пост, добавленный {date_obj.strftime('%d.%m.%Y в %H:%M:%S')}"
+                if bulk:
+                    batch_created, batch_skipped, batch_errors = self._import_batch_bulk(
+                        telegram, batch, auto_publish, force
+                    )
+                    created_count += batch_created
+                    skipped_count += batch_skipped
+                    error_count += batch_errors
+                else:
+                    for idx, message in enumerate(batch, 1):
+                        try:
+                            plan = self._build_post_plan(message)
                         
-                        # Проверяем дубликат по telegram_message_id (более надежно, чем по title)
-                        message_id = message.get('forward_from_message_id') or message.get('message_id')
-                        channel_username = message.get('forward_from_chat', {}).get('username', '')
+                            # Если нет текста И нет фото И нет видео - пропускаем
+                            if plan is None:
+                                logger.warning(f'   ⚠️  Пост #{idx}: Нет текста, фото и видео, пропускаем')
+                                skipped_count += 1
+                                continue
                         
-                        # Проверяем по message_id и каналу (если есть)
-                        duplicate_query = Article.objects.all()
-                        if message_id:
-                            duplicate_query = duplicate_query.filter(telegram_message_id=message_id)
-                        if channel_username:
-                            duplicate_query = duplicate_query.filter(telegram_channel_username=channel_username)
+                            text = plan['text']
+                            photos = plan['photos']
+                            videos = plan['videos']
+                            title = plan['title']
+                            content = plan['content']
                         
-                        # Если не нашли по message_id, проверяем по title (для старых постов без message_id)
-                        if not duplicate_query.exists():
-                            duplicate_query = Article.objects.filter(title=title)
+                            # Источник поста в канале: по нему статья ищется через уникальный индекс
+                            chat_id = plan['chat_id']
+                            channel_username = plan['channel_username']
                         
-                        if duplicate_query.exists():
-                            existing_article = duplicate_query.first()
-                            status_info = f"опубликована" if existing_article.is_published else "не опубликована"
+                            existing_article = self._find_existing_article(plan)
+                            if existing_article is not None:
+                                status_info = f"опубликована" if existing_article.is_published else "не опубликована"
                             
-                            if force:
-                                # Принудительный импорт - удаляем старую статью
-                                logger.info(f'   🔄 Пост #{idx}: "{title[:40]}..." уже существует (ID: {existing_article.id}, {status_info}), удаляю и пересоздаю...')
-                                existing_article.delete()
-                            else:
-                                logger.info(f'   ⏭️  Пост #{idx}: "{title[:40]}..." уже существует (ID: {existing_article.id}, {status_info})')
-                                skipped_count += 1
-                                continue
-                        
-                        # Логируем с информацией о содержимом
-                        media_info = []
-                        if text:
-                            media_info.append('📝 текст')
-                        if photos:
-                            media_info.append(f'📷 {len(photos)} фото')
-                        if videos:
-                            video_note_count = sum(1 for v in videos if v.get('is_video_note'))
-                            if video_note_count > 0:
-                                if len(videos) > 1:
-                                    media_info.append(f'🎥 {len(videos)} видео (из них {video_note_count} кружков)')
+                                if force:
+                                    # Принудительный импорт - удаляем старую статью
+                                    logger.info(f'   🔄 Пост #{idx}: "{title[:40]}..." уже существует (ID: {existing_article.id}, {status_info}), удаляю и пересоздаю...')
+                                    existing_article.delete()
                                 else:
-                                    media_info.append('🎥 кружок/story')
-                            else:
-                                if len(videos) > 1:
-                                    media_info.append(f'🎬 {len(videos)} видео')
+                                    logger.info(f'   ⏭️  Пост #{idx}: "{title[:40]}..." уже существует (ID: {existing_article.id}, {status_info})')
+                                    skipped_count += 1
+                                    continue
+                        
+                            # Логируем с информацией о содержимом
+                            media_info = []
+                            if text:
+                                media_info.append('📝 текст')
+                            if photos:
+                                media_info.append(f'📷 {len(photos)} фото')
+                            if videos:
+                                video_note_count = sum(1 for v in videos if v.get('is_video_note'))
+                                if video_note_count > 0:
+                                    if len(videos) > 1:
+                                        media_info.append(f'🎥 {len(videos)} видео (из них {video_note_count} кружков)')
+                                    else:
+                                        media_info.append('🎥 кружок/story')
                                 else:
-                                    media_info.append('🎬 видео')
+                                    if len(videos) > 1:
+                                        media_info.append(f'🎬 {len(videos)} видео')
+                                    else:
+                                        media_info.append('🎬 видео')
                         
-                        logger.info(f'   📰 Пост #{idx}: {title[:50]}... ({", ".join(media_info) if media_info else "нет контента"})')
+                            logger.info(f'   📰 Пост #{idx}: {title[:50]}... ({", ".join(media_info) if media_info else "нет контента"})')
                         
-                        # Сохраняем видео (обрабатываем все видео из группы)
-                        article = None
-                        if videos:
-                            saved_videos = 0
-                            forward_from_chat = message.get('forward_from_chat', {})
-                            channel_username = forward_from_chat.get('username', '')
+                            # Сохраняем видео (обрабатываем все видео из группы)
+                            article = None
+                            if videos:
+                                saved_videos = 0
+                                forward_from_chat = message.get('forward_from_chat', {})
+                                channel_username = forward_from_chat.get('username', '')
                             
-                            for video_idx, video_data in enumerate(videos):
-                                try:
-                                    video_obj = video_data['video']
-                                    video_message_id = video_data['message_id']
-                                    video_caption = video_data.get('caption', '')
-                                    is_video_note = video_data.get('is_video_note', False)
+                                for video_idx, video_data in enumerate(videos):
+                                    try:
+                                        video_obj = video_data['video']
+                                        video_message_id = video_data['message_id']
+                                        video_caption = video_data.get('caption', '')
+                                        is_video_note = video_data.get('is_video_note', False)
                                     
-                                    file_id = video_obj['file_id']
-                                    file_size = video_obj.get('file_size', 0)
-                                    size_mb = file_size / (1024 * 1024) if file_size else 0
+                                        file_id = video_obj['file_id']
+                                        file_size = video_obj.get('file_size', 0)
+                                        size_mb = file_size / (1024 * 1024) if file_size else 0
                                     
-                                    # Если видео несколько - создаём отдельную статью для каждого
-                                    if len(videos) > 1 and video_idx > 0:
-                                        # Создаём отдельную статью для дополнительного видео
-                                        video_title = f"{title} (видео {video_idx + 1})"
-                                        if video_caption:
-                                            video_content = video_caption
-                                        else:
-                                            video_content = f"Видео {video_idx + 1} из серии"
+                                        # Если видео несколько - создаём отдельную статью для каждого
+                                        if len(videos) > 1 and video_idx > 0:
+                                            # Создаём отдельную статью для дополнительного видео
+                                            video_title = f"{title} (видео {video_idx + 1})"
+                                            if video_caption:
+                                                video_content = video_caption
+                                            else:
+                                                video_content = f"Видео {video_idx + 1} из серии"
                                         
-                                        # Проверяем дубликат
-                                        if Article.objects.filter(title=video_title).exists():
-                                            logger.info(f'      ⏭️  Видео {video_idx + 1}: уже существует')
-                                            continue
+                                            # Проверяем дубликат (по источнику видео или, для старых статей, по заголовку)
+                                            if chat_id is None and Article.objects.filter(title=video_title).exists():
+                                                logger.info(f'      ⏭️  Видео {video_idx + 1}: уже существует')
+                                                continue
                                         
-                                        try:
-                                            video_article = Article.objects.create(
+                                            video_article, created = Article.get_or_create_from_telegram(
+                                                chat_id,
+                                                video_message_id if chat_id else None,
+                                                video_obj.get('file_unique_id'),
                                                 title=video_title,
                                                 content=video_content,
                                                 is_published=auto_publish,
                                                 video_status='ready'
                                             )
-                                        except Exception as create_error:
-                                            # Если ошибка дубликата slug - пробуем с уникальным суффиксом
-                                            if 'UNIQUE constraint' in str(create_error) or 'slug' in str(create_error).lower():
-                                                unique_suffix = int(time.time() * 1000) % 1000000
-                                                video_title_with_suffix = f"{video_title} ({unique_suffix})"
-                                                try:
-                                                    video_article = Article.objects.create(
-                                                        title=video_title_with_suffix,
-                                                        content=video_content,
-                                                        is_published=auto_publish,
-                                                        video_status='ready'
-                                                    )
-                                                    logger.warning(f'      ⚠️  Slug дубликат для видео {video_idx + 1}, создано с суффиксом')
-                                                except Exception as e2:
-                                                    logger.error(f'      ❌ Не удалось создать статью для видео {video_idx + 1}: {e2}')
-                                                    continue
-                                            else:
-                                                logger.error(f'      ❌ Ошибка создания статьи для видео {video_idx + 1}: {create_error}')
+                                            if not created:
+                                                logger.info(f'      ⏭️  Видео {video_idx + 1}: уже существует')
                                                 continue
                                         
-                                        # Сохраняем видео для дополнительной статьи
-                                        if file_size > 20 * 1024 * 1024:
-                                            video_article.telegram_channel_username = channel_username
-                                            video_article.telegram_message_id = video_message_id
-                                            video_article.video_status = 'pending'
-                                            video_article.video_url = None
-                                            video_article.save()
-                                            logger.info(f'      ✅ Видео {video_idx + 1} сохранено (большое, ~{size_mb:.1f}MB, pending)')
-                                        else:
-                                            video_article.video_url = file_id
-                                            video_article.save()
-                                            logger.info(f'      ✅ Видео {video_idx + 1} сохранено (file_id, ~{size_mb:.1f}MB)')
+                                            # Сохраняем видео для дополнительной статьи
+                                            if file_size > 20 * 1024 * 1024:
+                                                video_article.telegram_channel_username = channel_username
+                                                video_article.telegram_message_id = video_message_id
+                                                video_article.video_status = 'pending'
+                                                video_article.video_url = None
+                                                video_article.save()
+                                                notify_video_worker()
+                                                logger.info(f'      ✅ Видео {video_idx + 1} сохранено (большое, ~{size_mb:.1f}MB, pending)')
+                                            else:
+                                                video_article.video_url = file_id
+                                                video_article.save()
+                                                logger.info(f'      ✅ Видео {video_idx + 1} сохранено (file_id, ~{size_mb:.1f}MB)')
                                         
-                                        saved_videos += 1
-                                        created_count += 1
-                                        continue
+                                            saved_videos += 1
+                                            created_count += 1
+                                            continue
                                     
-                                    # Первое видео - создаём основную статью
-                                    try:
-                                        article = Article.objects.create(
-                                            title=title,
-                                            content=content,
-                                            is_published=auto_publish,
-                                            video_status='ready'
-                                        )
-                                    except Exception as create_error:
-                                        # Если ошибка дубликата slug - пробуем с уникальным суффиксом
-                                        if 'UNIQUE constraint' in str(create_error) or 'slug' in str(create_error).lower():
-                                            unique_suffix = int(time.time() * 1000) % 1000000
-                                            title_with_suffix = f"{title} ({unique_suffix})"
-                                            try:
-                                                article = Article.objects.create(
-                                                    title=title_with_suffix,
-                                                    content=content,
-                                                    is_published=auto_publish,
-                                                    video_status='ready'
-                                                )
-                                                logger.warning(f'      ⚠️  Slug дубликат, создано с суффиксом: {article.slug}')
-                                            except Exception as e2:
-                                                logger.error(f'      ❌ Не удалось создать статью даже с суффиксом: {e2}')
-                                                raise
-                                        else:
-                                            raise
+                                        # Первое видео - создаём основную статью
+                                        article, created = self._create_article(plan, auto_publish)
+                                        if not created:
+                                            logger.info(f'      ⏭️  Пост уже импортирован: {article.slug}')
+                                            article = None
+                                            break
                                     
-                                    # Сохраняем видео для основной статьи
-                                    if file_size > 20 * 1024 * 1024:
-                                        article.telegram_channel_username = channel_username
-                                        article.telegram_message_id = video_message_id
-                                        article.video_status = 'pending'
-                                        article.video_url = None
-                                        article.save()
-                                        logger.info(f'      ✅ Видео сохранено (большое, ~{size_mb:.1f}MB, pending)')
-                                    else:
-                                        article.video_url = file_id
-                                        article.save()
-                                        logger.info(f'      ✅ Видео сохранено (file_id, ~{size_mb:.1f}MB)')
+                                        # Сохраняем видео для основной статьи
+                                        if file_size > 20 * 1024 * 1024:
+                                            article.telegram_channel_username = channel_username
+                                            article.telegram_message_id = video_message_id
+                                            article.video_status = 'pending'
+                                            article.video_url = None
+                                            article.save()
+                                            notify_video_worker()
+                                            logger.info(f'      ✅ Видео сохранено (большое, ~{size_mb:.1f}MB, pending)')
+                                        else:
+                                            article.video_url = file_id
+                                            article.save()
+                                            logger.info(f'      ✅ Видео сохранено (file_id, ~{size_mb:.1f}MB)')
                                     
-                                    saved_videos += 1
+                                        saved_videos += 1
                                     
-                                except Exception as e:
-                                    logger.error(f'      ❌ Ошибка сохранения видео {video_idx + 1}: {e}')
-                                    # Если статья не создана, устанавливаем article = None
-                                    if 'article' not in locals() or article is None:
-                                        article = None
-                            
-                            if saved_videos > 0:
-                                logger.info(f'      ✅ Сохранено видео: {saved_videos}/{len(videos)}')
+                                    except Exception as e:
+                                        logger.error(f'      ❌ Ошибка сохранения видео {video_idx + 1}: {e}')
+                                        # Если статья не создана, устанавливаем article = None
+                                        if 'article' not in locals() or article is None:
+                                            article = None
                             
-                            # Если были только видео - пропускаем сохранение фото
-                            if not photos:
-                                if article:
-                                    created_count += 1
-                                    logger.info(f'      ✅ Создана: {article.slug}')
-                                continue
-                        else:
-                            # Нет видео - создаём статью для фото/текста
-                            try:
-                                article = Article.objects.create(
-                                    title=title,
-                                    content=content,
-                                    is_published=auto_publish,
-                                    video_status='ready'
-                                )
-                            except Exception as create_error:
-                                # Если ошибка дубликата slug - пробуем с уникальным суффиксом
-                                if 'UNIQUE constraint' in str(create_error) or 'slug' in str(create_error).lower():
-                                    unique_suffix = int(time.time() * 1000) % 1000000
-                                    title_with_suffix = f"{title} ({unique_suffix})"
-                                    try:
-                                        article = Article.objects.create(
-                                            title=title_with_suffix,
-                                            content=content,
-                                            is_published=auto_publish,
-                                            video_status='ready'
-                                        )
-                                        logger.warning(f'      ⚠️  Slug дубликат, создано с суффиксом: {article.slug}')
-                                    except Exception as e2:
-                                        logger.error(f'      ❌ Не удалось создать статью даже с суффиксом: {e2}')
-                                        raise
-                                else:
-                                    raise
+                                if saved_videos > 0:
+                                    logger.info(f'      ✅ Сохранено видео: {saved_videos}/{len(videos)}')
                             
-                            # Сохраняем telegram_message_id и channel_username для отслеживания
-                            if message_id and channel_username:
-                                article.telegram_message_id = message_id
-                                article.telegram_channel_username = channel_username
-                                article.save(update_fields=['telegram_message_id', 'telegram_channel_username'])
+                                # Если были только видео - пропускаем сохранение фото
+                                if not photos:
+                                    if article:
+                                        created_count += 1
+                                        logger.info(f'      ✅ Создана: {article.slug}')
+                                    continue
+                            else:
+                                # Нет видео - создаём статью для фото/текста
+                                article, created = self._create_article(plan, auto_publish)
+                                if not created:
+                                    logger.info(f'   ⏭️  Пост #{idx}: уже импортирован: {article.slug}')
+                                    skipped_count += 1
+                                    continue
                         
-                        # Сохраняем фото (только если статья создана)
-                        if not article:
-                            logger.error(f'      ❌ Статья не создана, пропускаем сохранение фото')
-                            continue
+                            # Сохраняем фото (только если статья создана)
+                            if not article:
+                                logger.error(f'      ❌ Статья не создана, пропускаем сохранение фото')
+                                continue
                         
-                        saved_photos = 0
-                        for photo_idx, photo in enumerate(photos):
-                            try:
-                                file_id = photo['file_id']
-                                
-                                file_response = requests.get(
-                                    f'{api_url}/getFile',
-                                    params={'file_id': file_id},
-                                    timeout=10
-                                )
-                                file_response.raise_for_status()
-                                file_data = file_response.json()
-                                
-                                if not file_data.get('ok'):
-                                    logger.warning(f'      ⚠️  Фото {photo_idx + 1}: API ошибка')
-                                    continue
-                                
-                                file_path = file_data['result']['file_path']
-                                file_url = f'https://api.telegram.org/file/bot{token}/{file_path}'
-                                
-                                image_response = requests.get(file_url, timeout=30)
-                                image_response.raise_for_status()
-                                
-                                image_content = BytesIO(image_response.content)
-                                image_name = f'{article.slug}_{photo_idx}.jpg'
-                                
-                                if photo_idx == 0:
-                                    # Главное фото
-                                    article.image.save(
-                                        image_name,
-                                        InMemoryUploadedFile(
-                                            image_content,
-                                            None,
-                                            image_name,
-                                            'image/jpeg',
-                                            len(image_response.content),
-                                            None
-                                        )
-                                    )
-                                    logger.info(f'      📷 Главное фото сохранено')
-                                else:
-                                    # Фото в галерею
-                                    article_image = ArticleImage.objects.create(
-                                        article=article,
-                                        order=photo_idx
-                                    )
-                                    article_image.image.save(
-                                        image_name,
-                                        InMemoryUploadedFile(
-                                            image_content,
-                                            None,
-                                            image_name,
-                                            'image/jpeg',
-                                            len(image_response.content),
-                                            None
-                                        )
-                                    )
-                                    logger.info(f'      📷 Фото {photo_idx + 1} → галерея')
-                                
-                                saved_photos += 1
+                            saved_photos = 0
+                            # Все фото группы качаются параллельно, сохраняются по порядку
+                            with fetch_telegram_media(telegram, [photo['file_id'] for photo in photos]) as fetched_photos:
+                                for photo_idx, fetched in enumerate(fetched_photos):
+                                    try:
+                                        if not fetched.ok:
+                                            logger.warning(f'      ⚠️  Фото {photo_idx + 1}: {fetched.error}')
+                                            continue
+                                    
+                                        image_name = f'{article.slug}_{photo_idx}.jpg'
+                                    
+                                        with fetched.open(image_name) as image_file:
+                                            if photo_idx == 0:
+                                                # Главное фото
+                                                article.image.save(image_name, image_file)
+                                                logger.info(f'      📷 Главное фото сохранено')
+                                            else:
+                                                # Фото в галерею
+                                                article_image = ArticleImage.objects.create(
+                                                    article=article,
+                                                    order=photo_idx
+                                                )
+                                                article_image.image.save(image_name, image_file)
+                                                logger.info(f'      📷 Фото {photo_idx + 1} → галерея')
+                                    
+                                        saved_photos += 1
                                 
-                            except Exception as e:
-                                logger.error(f'      ❌ Ошибка фото {photo_idx + 1}: {e}')
+                                    except Exception as e:
+                                        logger.error(f'      ❌ Ошибка фото {photo_idx + 1}: {e}')
                         
-                        if saved_photos > 0:
-                            logger.info(f'      ✅ Сохранено фото: {saved_photos}/{len(photos)}')
+                            if saved_photos > 0:
+                                logger.info(f'      ✅ Сохранено фото: {saved_photos}/{len(photos)}')
                         
-                        # Увеличиваем счётчик созданных статей (если статья ещё не создана выше)
-                        if article and (not videos or len(videos) == 1):
-                            created_count += 1
-                            logger.info(f'      ✅ Создана: {article.slug}')
+                            # Увеличиваем счётчик созданных статей (если статья ещё не создана выше)
+                            if article and (not videos or len(videos) == 1):
+                                created_count += 1
+                                logger.info(f'      ✅ Создана: {article.slug}')
                         
-                    except Exception as e:
-                        logger.error(f'   ❌ Ошибка поста #{idx}: {e}')
-                        error_count += 1
+                        except Exception as e:
+                            logger.error(f'   ❌ Ошибка поста #{idx}: {e}')
+                            error_count += 1
                 
                 logger.info('')
                 logger.info(f'   Батч #{batch_num} завершён')
@@ -705,3 +566,379 @@ class Command(BaseCommand):
             import traceback
             traceback.print_exc()
             sys.exit(1)
+
+    def _build_post_plan(self, message: dict):
+        """
+        Разбирает пересланный пост (или объединённую медиа-группу)
+        
+        Args:
+            message: Сообщение из очереди
+        
+        Returns:
+            Словарь text, title, content, photos, videos, message_id,
+            channel_username или None, если в посте нет ни текста, ни медиа
+        """
+        # Извлекаем данные
+        text = message.get('text') or message.get('caption', '')
+        
+        # Получаем фото (может быть одно фото или группа)
+        photos = []
+        videos = []  # Список видео (может быть несколько в медиа-группе)
+        
+        # Проверяем, это объединённая медиа-группа?
+        if '_all_photos' in message:
+            # Используем все фото из группы
+            photos = message['_all_photos']
+        elif 'photo' in message:
+            # Одно фото
+            photo = max(message['photo'], key=lambda x: x.get('file_size', 0))
+            photos.append(photo)
+        
+        # Проверяем медиа-группу с видео
+        if '_all_videos' in message:
+            # Используем все видео из группы
+            videos = message['_all_videos']
+        else:
+            # Обычное видео (одно)
+            if 'video' in message:
+                videos = [{
+                    'video': message['video'],
+                    'message_id': message.get('forward_from_message_id') or message.get('message_id'),
+                    'caption': message.get('caption', '')
+                }]
+            
+            # Проверяем video_note (кружки/stories)
+            if 'video_note' in message:
+                videos = [{
+                    'video': message['video_note'],
+                    'message_id': message.get('forward_from_message_id') or message.get('message_id'),
+                    'caption': message.get('caption', ''),
+                    'is_video_note': True
+                }]
+        
+        if not text and not photos and not videos:
+            return None
+        
+        # Парсим текст или создаём заголовок из даты
+        if text:
+            lines = text.strip().split('\n', 1)
+            title = lines[0][:255]
+            content = lines[1] if len(lines) > 1 else text
+        else:
+            # Если текста нет, но есть медиа - создаём заголовок из даты + времени
+            post_date = message.get('forward_date') or message.get('date', int(time.time()))
+            date_obj = datetime.fromtimestamp(post_date)
+            message_id = message.get('forward_from_message_id') or message.get('message_id', '')
+            msg_id_suffix = f" (#{message_id})" if message_id else ""
+            # Проверяем, есть ли video_note (кружки/stories)
+            is_video_note = videos and any(v.get('is_video_note') for v in videos)
+            # Добавляем время с секундами и message_id чтобы избежать дубликатов
+            if videos:
+                if is_video_note:
+                    title = f"Кружок от {date_obj.strftime('%d.%m.%Y %H:%M:%S')}{msg_id_suffix}"
+                    content = f"Видео-кружок (story), добавленный {date_obj.strftime('%d.%m.%Y в %H:%M:%S')}"
+                else:
+                    title = f"Видео от {date_obj.strftime('%d.%m.%Y %H:%M:%S')}{msg_id_suffix}"
+                    content = f"Видео, добавленное {date_obj.strftime('%d.%m.%Y в %H:%M:%S')}"
+            elif photos:
+                photo_count = len(photos)
+                if photo_count > 1:
+                    title = f"Фото {photo_count} шт. от {date_obj.strftime('%d.%m.%Y %H:%M:%S')}{msg_id_suffix}"
+                    content = f"Галерея из {photo_count} фотографий, добавленная {date_obj.strftime('%d.%m.%Y в %H:%M:%S')}"
+                else:
+                    title = f"Фото от {date_obj.strftime('%d.%m.%Y %H:%M:%S')}{msg_id_suffix}"
+                    content = f"Фотография, добавленная {date_obj.strftime('%d.%m.%Y в %H:%M:%S')}"
+            else:
+                # На всякий случай (не должно сюда попасть)
+                title = f"Пост от {date_obj.strftime('%d.%m.%Y %H:%M:%S')}{msg_id_suffix}"
+                content = f"Пост, добавленный {date_obj.strftime('%d.%m.%Y в %H:%M:%S')}"
+        
+        chat_id, source_message_id, channel_username = self._forward_source(message)
+        # Главное медиа статьи: первое видео, иначе первое фото
+        main_media = videos[0]['video'] if videos else (photos[0] if photos else None)
+        
+        return {
+            'text': text,
+            'title': title,
+            'content': content,
+            'photos': photos,
+            'videos': videos,
+            'chat_id': chat_id,
+            'message_id': source_message_id,
+            'file_unique_id': main_media.get('file_unique_id') if main_media else None,
+            'channel_username': channel_username,
+        }
+    
+    @staticmethod
+    def _forward_source(message: dict):
+        """
+        Исходный пост пересланного сообщения
+        
+        Returns:
+            (chat_id канала, message_id в канале, username канала);
+            None вместо неизвестных значений (например, автор скрыл источник)
+        """
+        if 'forward_from_chat' in message:
+            chat = message['forward_from_chat']
+            return chat.get('id'), message.get('forward_from_message_id'), chat.get('username', '')
+        forward_origin = message.get('forward_origin', {})
+        if forward_origin.get('type') == 'channel':
+            chat = forward_origin.get('chat', {})
+            return chat.get('id'), forward_origin.get('message_id'), chat.get('username', '')
+        return None, None, ''
+    
+    def _find_existing_article(self, plan: dict):
+        """
+        Статья, уже созданная из этого поста
+        
+        Сначала по уникальному индексу источника (канал + сообщение, file_unique_id),
+        затем - для статей, импортированных до его появления - по message_id и заголовку.
+        """
+        existing_article = Article.get_telegram_source(plan['chat_id'], plan['message_id'], plan['file_unique_id'])
+        if existing_article is None:
+            existing_article = Article.get_legacy_telegram_article(
+                plan['title'], plan['message_id'], plan['channel_username']
+            )
+        return existing_article
+    
+    def _create_article(self, plan: dict, auto_publish: bool):
+        """
+        Идемпотентно создаёт основную статью поста
+        
+        Returns:
+            (статья, создана ли она)
+        """
+        return Article.get_or_create_from_telegram(
+            plan['chat_id'],
+            plan['message_id'],
+            plan['file_unique_id'],
+            title=plan['title'],
+            content=plan['content'],
+            is_published=auto_publish,
+            video_status='ready',
+            telegram_channel_username=plan['channel_username'] or None
+        )
+    
+    def _import_batch_bulk(self, telegram, batch: list, auto_publish: bool, force: bool):
+        """
+        Создаёт статьи батча массово (--bulk)
+        
+        Дубликаты и занятые slug проверяются одним запросом на батч, фото
+        скачиваются и сохраняются в storage параллельно до транзакции,
+        статьи и галереи вставляются bulk_create в одной транзакции.
+        
+        Args:
+            telegram: TelegramAPIClient
+            batch: Сообщения батча
+            auto_publish: Публиковать сразу
+            force: Удалять и пересоздавать существующие статьи
+        
+        Returns:
+            (создано, пропущено, ошибок)
+        """
+        skipped = 0
+        plans = []
+        for idx, message in enumerate(batch, 1):
+            plan = self._build_post_plan(message)
+            if plan is None:
+                logger.warning(f'   ⚠️  Пост #{idx}: Нет текста, фото и видео, пропускаем')
+                skipped += 1
+                continue
+            plan['idx'] = idx
+            plans.append(plan)
+        
+        if not plans:
+            return 0, skipped, 0
+        
+        # Существующие статьи батча - одним запросом: по источнику (уникальные индексы),
+        # а для статей, импортированных до их появления, - по message_id и заголовку
+        sources = set()
+        file_unique_ids = set()
+        titles = set()
+        for plan in plans:
+            titles.add(plan['title'])
+            for video_idx, video_data in enumerate(plan['videos']):
+                if video_idx > 0:
+                    titles.add(f"{plan['title']} (видео {video_idx + 1})")
+                if plan['chat_id'] and video_data['message_id']:
+                    sources.add((plan['chat_id'], video_data['message_id']))
+                if video_data['video'].get('file_unique_id'):
+                    file_unique_ids.add(video_data['video']['file_unique_id'])
+            if plan['chat_id'] and plan['message_id']:
+                sources.add((plan['chat_id'], plan['message_id']))
+            if plan['file_unique_id']:
+                file_unique_ids.add(plan['file_unique_id'])
+        legacy_message_ids = {plan['message_id'] for plan in plans if plan['message_id']}
+        
+        query = (
+            Q(telegram_file_unique_id__in=file_unique_ids)
+            | Q(telegram_chat_id__isnull=True, telegram_message_id__in=legacy_message_ids)
+            | Q(telegram_chat_id__isnull=True, title__in=titles)
+        )
+        for chat_id, message_id in sources:
+            query |= Q(telegram_chat_id=chat_id, telegram_message_id=message_id)
+        existing_articles = Article.objects.filter(query).only(
+            'id', 'title', 'is_published', 'telegram_chat_id', 'telegram_message_id',
+            'telegram_channel_username', 'telegram_file_unique_id'
+        )
+        existing_by_source = {}
+        existing_by_file = {}
+        existing_by_legacy_message = {}
+        existing_by_title = {}
+        for existing_article in existing_articles:
+            if existing_article.telegram_chat_id:
+                existing_by_source[(existing_article.telegram_chat_id, existing_article.telegram_message_id)] = existing_article
+            else:
+                existing_by_legacy_message[(existing_article.telegram_message_id, existing_article.telegram_channel_username)] = existing_article
+                existing_by_title.setdefault(existing_article.title, existing_article)
+            if existing_article.telegram_file_unique_id:
+                existing_by_file[existing_article.telegram_file_unique_id] = existing_article
+        
+        def find_existing(chat_id, message_id, file_unique_id, title, channel_username=''):
+            return (
+                existing_by_source.get((chat_id, message_id))
+                or existing_by_file.get(file_unique_id)
+                or existing_by_legacy_message.get((message_id, channel_username))
+                or existing_by_title.get(title)
+            )
+        
+        articles = []
+        photo_jobs = []  # (статья, номер фото, фото)
+        to_delete = []
+        # Источники, уже занятые статьями этого батча (уникальные индексы)
+        batch_keys = set()
+        pending_videos = 0
+        
+        def batch_keys_for(chat_id, message_id, file_unique_id, title):
+            keys = {('title', title)}
+            if chat_id and message_id:
+                keys.add(('source', chat_id, message_id))
+            if file_unique_id:
+                keys.add(('file', file_unique_id))
+            return keys
+        
+        for plan in plans:
+            idx = plan['idx']
+            title = plan['title']
+            
+            existing_article = find_existing(
+                plan['chat_id'], plan['message_id'], plan['file_unique_id'], title, plan['channel_username']
+            )
+            if existing_article is not None:
+                status_info = 'опубликована' if existing_article.is_published else 'не опубликована'
+                if force:
+                    logger.info(f'   🔄 Пост #{idx}: "{title[:40]}..." уже существует (ID: {existing_article.id}, {status_info}), будет пересоздан')
+                    to_delete.append(existing_article)
+                else:
+                    logger.info(f'   ⏭️  Пост #{idx}: "{title[:40]}..." уже существует (ID: {existing_article.id}, {status_info})')
+                    skipped += 1
+                    continue
+            
+            keys = batch_keys_for(plan['chat_id'], plan['message_id'], plan['file_unique_id'], title)
+            if keys & batch_keys:
+                logger.info(f'   ⏭️  Пост #{idx}: "{title[:40]}..." повторяется в батче')
+                skipped += 1
+                continue
+            batch_keys.update(keys)
+            
+            article = Article(
+                title=title,
+                content=plan['content'],
+                is_published=auto_publish,
+                video_status='ready',
+                telegram_chat_id=plan['chat_id'],
+                telegram_message_id=plan['message_id'],
+                telegram_file_unique_id=plan['file_unique_id'],
+                telegram_channel_username=plan['channel_username'] or None
+            )
+            articles.append(article)
+            
+            # Первое видео - в основную статью, остальные - отдельные статьи
+            for video_idx, video_data in enumerate(plan['videos']):
+                if video_idx == 0:
+                    video_article = article
+                else:
+                    video_title = f'{title} (видео {video_idx + 1})'
+                    video_chat_id = plan['chat_id']
+                    video_message_id = video_data['message_id'] if video_chat_id else None
+                    video_file_unique_id = video_data['video'].get('file_unique_id')
+                    
+                    existing_video = find_existing(video_chat_id, video_message_id, video_file_unique_id, video_title)
+                    keys = batch_keys_for(video_chat_id, video_message_id, video_file_unique_id, video_title)
+                    if (existing_video is not None and not force) or keys & batch_keys:
+                        logger.info(f'      ⏭️  Видео {video_idx + 1}: уже существует')
+                        continue
+                    if existing_video is not None:
+                        to_delete.append(existing_video)
+                    batch_keys.update(keys)
+                    video_article = Article(
+                        title=video_title,
+                        content=video_data.get('caption') or f'Видео {video_idx + 1} из серии',
+                        is_published=auto_publish,
+                        video_status='ready',
+                        telegram_chat_id=video_chat_id,
+                        telegram_message_id=video_message_id,
+                        telegram_file_unique_id=video_file_unique_id
+                    )
+                    articles.append(video_article)
+                
+                # Видео > 20MB - pending для скачивания через Telethon, иначе file_id для проксирования
+                if video_data['video'].get('file_size', 0) > 20 * 1024 * 1024:
+                    video_article.telegram_channel_username = plan['channel_username']
+                    video_article.telegram_message_id = video_data['message_id']
+                    video_article.video_status = 'pending'
+                    video_article.video_url = None
+                    pending_videos += 1
+                else:
+                    video_article.video_url = video_data['video']['file_id']
+            
+            for photo_idx, photo in enumerate(plan['photos']):
+                photo_jobs.append((article, photo_idx, photo))
+        
+        if not articles:
+            return 0, skipped, 0
+        
+        # slug всех статей батча - в памяти, без повторных save()
+        for article, slug in zip(articles, allocate_article_slugs(articles)):
+            article.slug = slug
+        
+        # Файлы - до транзакции: скачивание и запись в storage параллельно
+        images = []
+        stored_names = []
+        if photo_jobs:
+            with fetch_telegram_media(telegram, [photo['file_id'] for _, _, photo in photo_jobs]) as fetched_photos:
+                jobs = []
+                for (article, photo_idx, _), fetched in zip(photo_jobs, fetched_photos):
+                    if photo_idx == 0:
+                        field_file = article.image
+                    else:
+                        field_file = ArticleImage(article=article, order=photo_idx).image
+                    jobs.append((field_file, f'{article.slug}_{photo_idx}.jpg', fetched))
+                stored_names = store_media_files(jobs)
+            
+            for (field_file, image_name, fetched), stored_name in zip(jobs, stored_names):
+                if stored_name is None:
+                    logger.warning(f'      ⚠️  Фото {image_name}: {fetched.error or "не сохранено"}')
+                    continue
+                field_file.name = stored_name
+                if isinstance(field_file.instance, ArticleImage):
+                    images.append(field_file.instance)
+            logger.info(f'   📷 Сохранено фото: {sum(1 for name in stored_names if name)}/{len(photo_jobs)}')
+        
+        try:
+            with transaction.atomic():
+                for existing_article in {article.pk: article for article in to_delete}.values():
+                    existing_article.delete()
+                bulk_create_articles(articles, images)
+        except Exception as e:
+            logger.error(f'   ❌ Батч не записан в базу: {e}')
+            delete_media_files(Article._meta.get_field('image').storage, stored_names)
+            return 0, skipped, len(plans)
+        
+        for article in articles:
+            logger.info(f'   ✅ Создана: {article.slug}')
+        
+        if pending_videos:
+            notify_video_worker()
+        
+        return len(articles), skipped, 0
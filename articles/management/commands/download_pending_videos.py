@@ -9,6 +9,12 @@ Django management command для скачивания pending видео чер
     
     # В цикле (для systemd/cron)
     python manage.py download_pending_videos --loop --interval 60
+    
+    # Скачивать до 5 видео одновременно
+    python manage.py download_pending_videos --concurrency 5
+    
+    # Постоянный демон (для systemd): одно подключение, очередь в базе, пробуждение по SIGUSR1
+    python manage.py download_pending_videos --daemon
 """
 import asyncio
 import time
@@ -22,7 +28,7 @@ from pathlib import Path
 BASE_DIR = Path(__file__).resolve().parent.parent.parent
 sys.path.insert(0, str(BASE_DIR / 'telethon_worker'))
 
-from telethon_worker.worker import TelegramVideoDownloader
+from telethon_worker.worker import TelegramVideoDownloader, DEFAULT_CONCURRENCY
 
 
 class Command(BaseCommand):
@@ -49,12 +55,25 @@ class Command(BaseCommand):
             default=60,
             help='Интервал между проверками в секундах (по умолчанию 60)'
         )
+        parser.add_argument(
+            '--daemon',
+            action='store_true',
+            help='Постоянный режим: держать подключение и забирать статьи из базы по мере появления'
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=DEFAULT_CONCURRENCY,
+            help=f'Сколько видео скачивать одновременно (по умолчанию {DEFAULT_CONCURRENCY})'
+        )
     
     def handle(self, *args, **options):
         """Основной метод команды"""
         limit = options['limit']
         loop = options['loop']
         interval = options['interval']
+        concurrency = options['concurrency']
+        daemon = options['daemon']
         
         # Создаём один event loop для всего процесса
         try:
@@ -74,11 +93,24 @@ class Command(BaseCommand):
             """Одна итерация обработки"""
             try:
                 await downloader.start()
-                await downloader.process_pending_videos(limit=limit)
+                await downloader.process_pending_videos(limit=limit, concurrency=concurrency)
             finally:
                 await downloader.close()
         
-        if loop:
+        async def run_daemon():
+            """Постоянный режим с одним подключением"""
+            try:
+                await downloader.start()
+                await downloader.run_daemon(concurrency=concurrency)
+            finally:
+                await downloader.close()
+        
+        if daemon:
+            try:
+                event_loop.run_until_complete(run_daemon())
+            finally:
+                event_loop.close()
+        elif loop:
             # Бесконечный цикл с одним event loop
             logger.info(f"🔄 Запуск в режиме цикла (интервал: {interval} сек)")
             try:
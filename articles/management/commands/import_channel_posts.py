@@ -10,7 +10,7 @@ from django.core.management.base import BaseCommand
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from django.utils.text import slugify
 from loguru import logger
-import requests
+from core.services import get_telegram_client
 from articles.models import Article, ArticleImage
 
 
@@ -64,7 +64,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         """Основной метод команды"""
         token = os.environ.get('TELEGRAM_BOT_TOKEN', '8389210453:AAE0pUO2PflNa8UWqXWRN-SEnf8LvplsdrA')
-        api_url = f'https://api.telegram.org/bot{token}'
+        telegram = get_telegram_client(token)
         channel_username = options.get('channel') or os.environ.get('TELEGRAM_NEWS_CHANNEL')
         limit = options['limit']
         offset = options['offset']
@@ -92,7 +92,7 @@ class Command(BaseCommand):
         
         # Проверяем, что бот работает
         try:
-            response = requests.get(f'{api_url}/getMe', timeout=10)
+            response = telegram.get('getMe')
             response.raise_for_status()
             bot_info = response.json()
             
@@ -120,10 +120,9 @@ class Command(BaseCommand):
             logger.info('📡 Получаем информацию о канале...')
             
             # Получаем chat_id канала
-            channel_info_response = requests.post(
-                f'{api_url}/getChat',
-                json={'chat_id': f'@{channel_username}'},
-                timeout=10
+            channel_info_response = telegram.post(
+                'getChat',
+                json={'chat_id': f'@{channel_username}'}
             )
             
             if not channel_info_response.json().get('ok'):
@@ -154,15 +153,14 @@ class Command(BaseCommand):
                 
                 try:
                     # Пытаемся получить сообщение по ID
-                    msg_response = requests.post(
-                        f'{api_url}/forwardMessage',
+                    msg_response = telegram.post(
+                        'forwardMessage',
                         json={
                             'chat_id': chat_id,
                             'from_chat_id': chat_id,
                             'message_id': message_id,
                             'disable_notification': True
-                        },
-                        timeout=5
+                        }
                     )
                     
                     # Если сообщение не найдено, переходим к следующему
@@ -207,8 +205,8 @@ class Command(BaseCommand):
             # Попробуем получить хотя бы последние обновления
             logger.info('🔄 Пробуем получить последние посты через getUpdates...')
             
-            updates_response = requests.get(
-                f'{api_url}/getUpdates',
+            updates_response = telegram.get(
+                'getUpdates',
                 params={
                     'offset': -100,  # Последние 100 обновлений
                     'limit': 100,
@@ -279,9 +277,15 @@ class Command(BaseCommand):
                     logger.info(f'📰 Пост #{idx}: {title[:50]}...')
                     logger.info(f'   📷 Фото: {len(photos)} шт.')
                     
-                    # Проверяем существование
+                    chat_id = post.get('chat', {}).get('id')
+                    file_unique_id = photos[0].get('file_unique_id') if photos else None
+                    
+                    # Проверяем существование: по источнику поста, для старых статей - по заголовку
                     if skip_existing:
-                        if Article.objects.filter(title=title).exists():
+                        existing = Article.get_telegram_source(chat_id, post.get('message_id'), file_unique_id)
+                        if existing is None:
+                            existing = Article.get_legacy_telegram_article(title)
+                        if existing is not None:
                             logger.info(f'   ⏭️  Уже существует, пропускаем')
                             skipped_count += 1
                             continue
@@ -291,12 +295,20 @@ class Command(BaseCommand):
                         created_count += 1
                         continue
                     
-                    # Создаём статью
-                    article = Article.objects.create(
+                    # Создаём статью (уже импортированный пост вернёт существующую)
+                    article, created = Article.get_or_create_from_telegram(
+                        chat_id,
+                        post.get('message_id'),
+                        file_unique_id,
                         title=title,
                         content=content,
-                        is_published=auto_publish
+                        is_published=auto_publish,
+                        telegram_channel_username=channel_username
                     )
+                    if not created:
+                        logger.info(f'   ⏭️  Уже существует, пропускаем')
+                        skipped_count += 1
+                        continue
                     
                     logger.info(f'   ✅ Создана: {article.slug}')
                     
@@ -305,10 +317,9 @@ class Command(BaseCommand):
                         try:
                             file_id = photo['file_id']
                             
-                            file_response = requests.get(
-                                f'{api_url}/getFile',
-                                params={'file_id': file_id},
-                                timeout=10
+                            file_response = telegram.get(
+                                'getFile',
+                                params={'file_id': file_id}
                             )
                             file_response.raise_for_status()
                             file_data = file_response.json()
@@ -317,9 +328,8 @@ class Command(BaseCommand):
                                 continue
                             
                             file_path = file_data['result']['file_path']
-                            file_url = f'https://api.telegram.org/file/bot{token}/{file_path}'
                             
-                            image_response = requests.get(file_url, timeout=30)
+                            image_response = telegram.download(file_path)
                             image_response.raise_for_status()
                             
                             image_content = BytesIO(image_response.content)
@@ -9,6 +9,7 @@ from django.core.management.base import BaseCommand
 from django.core.files.uploadedfile import InMemoryUploadedFile
 from loguru import logger
 import requests
+from core.services import get_telegram_client
 from articles.models import Article, ArticleImage
 
 
@@ -50,7 +51,7 @@ class Command(BaseCommand):
     def handle(self, *args, **options):
         """Основной метод команды"""
         token = os.environ.get('TELEGRAM_BOT_TOKEN', '8389210453:AAE0pUO2PflNa8UWqXWRN-SEnf8LvplsdrA')
-        api_url = f'https://api.telegram.org/bot{token}'
+        telegram = get_telegram_client(token)
         timeout = options['timeout']
         auto_publish = options['auto_publish']
         offset = 0
@@ -61,7 +62,7 @@ class Command(BaseCommand):
         
         # Проверяем бота
         try:
-            response = requests.get(f'{api_url}/getMe', timeout=10)
+            response = telegram.get('getMe')
             response.raise_for_status()
             bot_info = response.json()
             
@@ -99,7 +100,6 @@ class Command(BaseCommand):
         
         start_time = time.time()
         created_count = 0
-        processed_message_ids = set()  # Чтобы не дублировать
         
         try:
             while True:
@@ -112,14 +112,13 @@ class Command(BaseCommand):
                 
                 try:
                     # Получаем обновления
-                    response = requests.get(
-                        f'{api_url}/getUpdates',
+                    response = telegram.get(
+                        'getUpdates',
                         params={
                             'offset': offset,
                             'timeout': 30,
                             'allowed_updates': ['message']
-                        },
-                        timeout=35
+                        }
                     )
                     response.raise_for_status()
                     
@@ -148,7 +147,7 @@ class Command(BaseCommand):
                             
                             if text.startswith('/start'):
                                 self._send_message(
-                                    api_url,
+                                    telegram,
                                     chat_id,
                                     f'👋 Привет! Я бот для импорта новостей.\n\n'
                                     f'📥 Чтобы импортировать посты:\n\n'
@@ -163,21 +162,22 @@ class Command(BaseCommand):
                         # Это пересланное сообщение!
                         forward_from = message.get('forward_from_chat') or message.get('forward_origin', {})
                         
-                        # ID оригинального сообщения (чтобы не дублировать)
+                        # Источник оригинального поста (канал + message_id) - по нему не дублируем
+                        source_chat_id = None
                         original_message_id = None
+                        channel_username = None
                         if 'forward_from_chat' in message:
+                            source_chat_id = message['forward_from_chat'].get('id')
                             original_message_id = message.get('forward_from_message_id')
+                            channel_username = message['forward_from_chat'].get('username')
                         elif 'forward_origin' in message:
                             forward_origin = message['forward_origin']
                             if forward_origin.get('type') == 'channel':
+                                source_chat_id = forward_origin.get('chat', {}).get('id')
                                 original_message_id = forward_origin.get('message_id')
-                        
-                        if original_message_id and original_message_id in processed_message_ids:
-                            logger.info(f'⏭️  Пост уже обработан, пропускаем')
-                            continue
-                        
-                        if original_message_id:
-                            processed_message_ids.add(original_message_id)
+                                channel_username = forward_origin.get('chat', {}).get('username')
+                        if not source_chat_id:
+                            original_message_id = None
                         
                         # Получаем текст и фото
                         text = message.get('text') or message.get('caption', '')
@@ -205,12 +205,19 @@ class Command(BaseCommand):
                         logger.info(f'📷 Фото: {len(photos)} шт.')
                         
                         try:
-                            # Создаём статью
-                            article = Article.objects.create(
+                            # Создаём статью (повторно пересланный пост вернёт существующую)
+                            article, created = Article.get_or_create_from_telegram(
+                                source_chat_id,
+                                original_message_id,
+                                photos[0].get('file_unique_id') if photos else None,
                                 title=title,
                                 content=content,
-                                is_published=auto_publish
+                                is_published=auto_publish,
+                                telegram_channel_username=channel_username
                             )
+                            if not created:
+                                logger.info(f'⏭️  Пост уже импортирован (ID: {article.id}), пропускаем')
+                                continue
                             
                             logger.info(f'✅ Создана новость: {article.title}')
                             logger.info(f'   Slug: {article.slug}')
@@ -221,10 +228,9 @@ class Command(BaseCommand):
                                 try:
                                     file_id = photo['file_id']
                                     
-                                    file_response = requests.get(
-                                        f'{api_url}/getFile',
-                                        params={'file_id': file_id},
-                                        timeout=10
+                                    file_response = telegram.get(
+                                        'getFile',
+                                        params={'file_id': file_id}
                                     )
                                     file_response.raise_for_status()
                                     file_data = file_response.json()
@@ -234,9 +240,8 @@ class Command(BaseCommand):
                                         continue
                                     
                                     file_path = file_data['result']['file_path']
-                                    file_url = f'https://api.telegram.org/file/bot{token}/{file_path}'
                                     
-                                    image_response = requests.get(file_url, timeout=30)
+                                    image_response = telegram.download(file_path)
                                     image_response.raise_for_status()
                                     
                                     image_content = BytesIO(image_response.content)
@@ -281,7 +286,7 @@ class Command(BaseCommand):
                             # Отправляем подтверждение пользователю
                             chat_id = message['chat']['id']
                             self._send_message(
-                                api_url,
+                                telegram,
                                 chat_id,
                                 f'✅ Новость создана!\n\n'
                                 f'📰 {article.title}\n'
@@ -301,7 +306,7 @@ class Command(BaseCommand):
                             # Уведомляем об ошибке
                             chat_id = message['chat']['id']
                             self._send_message(
-                                api_url,
+                                telegram,
                                 chat_id,
                                 f'❌ Ошибка при создании новости:\n{str(e)}'
                             )
@@ -336,16 +341,15 @@ class Command(BaseCommand):
         logger.info('=' * 80)
     
     @staticmethod
-    def _send_message(api_url: str, chat_id: int, text: str) -> bool:
+    def _send_message(telegram, chat_id: int, text: str) -> bool:
         """Отправляет сообщение в Telegram"""
         try:
-            response = requests.post(
-                f'{api_url}/sendMessage',
+            response = telegram.post(
+                'sendMessage',
                 json={
                     'chat_id': chat_id,
                     'text': text
-                },
-                timeout=10
+                }
             )
             response.raise_for_status()
             return True
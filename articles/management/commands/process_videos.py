@@ -0,0 +1,64 @@
+"""
+Команда для подготовки уже скачанных видео к потоковому воспроизведению
+
+Новые видео обрабатывает Telethon worker сразу после скачивания;
+эта команда нужна для видео, скачанных раньше или загруженных вручную.
+
+Использование:
+    python manage.py process_videos
+    
+    # Обработать заново даже уже обработанные
+    python manage.py process_videos --force
+"""
+from django.core.management.base import BaseCommand
+from loguru import logger
+
+from articles.models import Article
+from articles.services import process_article_video, get_ffmpeg_binary
+
+
+class Command(BaseCommand):
+    help = 'Переписывает видео статей в faststart MP4, нарезает HLS, создаёт постеры и превью-ролики (нужен ffmpeg)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=None,
+            help='Максимальное количество видео для обработки'
+        )
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Обработать и уже обработанные видео'
+        )
+
+    def handle(self, *args, **options):
+        if not get_ffmpeg_binary():
+            logger.error('❌ ffmpeg не найден - установите его или укажите FFMPEG_BINARY')
+            return
+        
+        articles = Article.objects.exclude(video_file='').exclude(video_file__isnull=True)
+        if not options['force']:
+            articles = articles.filter(video_processed_at__isnull=True)
+        if options['limit']:
+            articles = articles[:options['limit']]
+        
+        processed_count = 0
+        error_count = 0
+        
+        for article in articles:
+            logger.info(f'🎬 Обрабатываю видео статьи "{article.title}" ({article.video_file.name})')
+            try:
+                updates = process_article_video(article)
+            except Exception as e:
+                logger.error(f'   ❌ Ошибка обработки: {e}')
+                error_count += 1
+                continue
+            
+            if updates:
+                Article.objects.filter(id=article.id).update(**updates)
+                processed_count += 1
+                logger.info('   ✅ Готово')
+        
+        logger.info(f'📊 Обработано: {processed_count}, ошибок: {error_count}')
@@ -0,0 +1,34 @@
+# Generated by Django 4.2.8
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0009_article_display_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='video_hls_manifest',
+            field=models.CharField(
+                blank=True,
+                default='',
+                help_text='Путь к HLS плейлисту в media (создаётся автоматически после скачивания видео)',
+                max_length=255,
+                verbose_name='HLS плейлист'
+            ),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='video_processed_at',
+            field=models.DateTimeField(
+                blank=True,
+                help_text='Когда видео было подготовлено для потокового воспроизведения (faststart, HLS)',
+                null=True,
+                verbose_name='Видео обработано'
+            ),
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.8
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0010_article_video_hls_manifest_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='video_poster',
+            field=models.ImageField(
+                blank=True,
+                help_text='Кадр из видео для превью (создаётся автоматически)',
+                null=True,
+                upload_to='articles/posters/',
+                verbose_name='Постер видео'
+            ),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='video_preview_clip',
+            field=models.FileField(
+                blank=True,
+                help_text='Короткий беззвучный ролик для списка статей (создаётся автоматически)',
+                null=True,
+                upload_to='articles/previews/',
+                verbose_name='Превью-ролик'
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 4.2.8
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0011_article_video_poster_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='article',
+            name='telegram_chat_id',
+            field=models.BigIntegerField(
+                blank=True,
+                help_text='ID канала, из которого импортирован пост (вместе с ID сообщения - уникален)',
+                null=True,
+                verbose_name='ID канала в Telegram',
+            ),
+        ),
+        migrations.AddField(
+            model_name='article',
+            name='telegram_file_unique_id',
+            field=models.CharField(
+                blank=True,
+                help_text='Постоянный идентификатор главного фото/видео поста в Telegram (уникален)',
+                max_length=64,
+                null=True,
+                verbose_name='file_unique_id медиа',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='article',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('telegram_chat_id__isnull', False), ('telegram_message_id__isnull', False)),
+                fields=('telegram_chat_id', 'telegram_message_id'),
+                name='articles_unique_telegram_post',
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name='article',
+            constraint=models.UniqueConstraint(
+                condition=models.Q(('telegram_file_unique_id__isnull', False)),
+                fields=('telegram_file_unique_id',),
+                name='articles_unique_telegram_file',
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 4.2.8 on 2026-10-18 08:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0012_article_telegram_source_identity'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(
+                condition=models.Q(('telegram_chat_id__isnull', True)),
+                fields=['title'],
+                name='articles_legacy_tg_title',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='article',
+            index=models.Index(
+                condition=models.Q(('telegram_chat_id__isnull', True)),
+                fields=['telegram_message_id', 'telegram_channel_username'],
+                name='articles_legacy_tg_message',
+            ),
+        ),
+    ]
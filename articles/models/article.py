@@ -2,10 +2,12 @@
 Модель статьи
 """
 import re
-from django.db import models
+from typing import Optional, Tuple
+from django.db import IntegrityError, models, transaction
 from django.urls import reverse
-from django.utils.text import slugify
 from core.models import BaseModel
+from core.services.slugs import save_with_unique_slug
+from articles.services.file_resolver import invalidate_telegram_file
 
 
 class Article(BaseModel):
@@ -69,6 +71,19 @@ class Article(BaseModel):
         verbose_name='ID сообщения в Telegram',
         help_text='ID сообщения в канале для скачивания видео'
     )
+    telegram_chat_id = models.BigIntegerField(
+        blank=True,
+        null=True,
+        verbose_name='ID канала в Telegram',
+        help_text='ID канала, из которого импортирован пост (вместе с ID сообщения - уникален)'
+    )
+    telegram_file_unique_id = models.CharField(
+        max_length=64,
+        blank=True,
+        null=True,
+        verbose_name='file_unique_id медиа',
+        help_text='Постоянный идентификатор главного фото/видео поста в Telegram (уникален)'
+    )
     video_status = models.CharField(
         max_length=32,
         choices=[
@@ -81,6 +96,33 @@ class Article(BaseModel):
         verbose_name='Статус видео',
         help_text='Статус обработки видео (для больших файлов >20MB)'
     )
+    video_hls_manifest = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name='HLS плейлист',
+        help_text='Путь к HLS плейлисту в media (создаётся автоматически после скачивания видео)'
+    )
+    video_poster = models.ImageField(
+        upload_to='articles/posters/',
+        blank=True,
+        null=True,
+        verbose_name='Постер видео',
+        help_text='Кадр из видео для превью (создаётся автоматически)'
+    )
+    video_preview_clip = models.FileField(
+        upload_to='articles/previews/',
+        blank=True,
+        null=True,
+        verbose_name='Превью-ролик',
+        help_text='Короткий беззвучный ролик для списка статей (создаётся автоматически)'
+    )
+    video_processed_at = models.DateTimeField(
+        blank=True,
+        null=True,
+        verbose_name='Видео обработано',
+        help_text='Когда видео было подготовлено для потокового воспроизведения (faststart, HLS)'
+    )
     is_published = models.BooleanField(
         default=False,
         verbose_name='Опубликовано',
@@ -104,30 +146,146 @@ class Article(BaseModel):
         indexes = [
             models.Index(fields=['is_published', 'display_order', '-created_at']),
             models.Index(fields=['slug']),
+            # Статьи, импортированные до появления telegram_chat_id, ищутся
+            # по заголовку и сообщению; новые статьи в эти индексы не попадают
+            models.Index(
+                fields=['title'],
+                condition=models.Q(telegram_chat_id__isnull=True),
+                name='articles_legacy_tg_title',
+            ),
+            models.Index(
+                fields=['telegram_message_id', 'telegram_channel_username'],
+                condition=models.Q(telegram_chat_id__isnull=True),
+                name='articles_legacy_tg_message',
+            ),
+        ]
+        constraints = [
+            # Источник в Telegram: повторный импорт того же поста или медиа невозможен
+            models.UniqueConstraint(
+                fields=['telegram_chat_id', 'telegram_message_id'],
+                condition=models.Q(telegram_chat_id__isnull=False, telegram_message_id__isnull=False),
+                name='articles_unique_telegram_post',
+            ),
+            models.UniqueConstraint(
+                fields=['telegram_file_unique_id'],
+                condition=models.Q(telegram_file_unique_id__isnull=False),
+                name='articles_unique_telegram_file',
+            ),
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Запоминаем исходный video_url, чтобы сбросить кэш file_id при его изменении
+        # (через __dict__, чтобы не загружать отложенное поле)
+        self._original_video_url = self.__dict__.get('video_url')
+    
     def __str__(self) -> str:
         return self.title
     
     def save(self, *args, **kwargs):
-        """Автоматическая генерация slug из title"""
-        # Генерируем slug если его нет
-        if not self.slug or self.slug.strip() == '':
-            self.slug = slugify(self.title)
-            # Если slug все еще пустой (например, title содержит только спецсимволы)
-            if not self.slug or self.slug.strip() == '':
-                import time
-                self.slug = f'article-{int(time.time())}'
+        """Автоматическая генерация уникального slug из title и сброс кэша file_id при смене видео"""
+        save_with_unique_slug(self, lambda: super(Article, self).save(*args, **kwargs), self.title, fallback='article')
+        
+        # video_url изменился - закэшированное разрешение старого file_id больше не нужно
+        current_video_url = self.__dict__.get('video_url')
+        if current_video_url != self._original_video_url:
+            invalidate_telegram_file(self._original_video_url)
+            invalidate_telegram_file(current_video_url)
+            self._original_video_url = current_video_url
+    
+    def delete(self, *args, **kwargs):
+        """Удаление статьи со сбросом кэша file_id"""
+        invalidate_telegram_file(self.__dict__.get('video_url'))
+        return super().delete(*args, **kwargs)
+    
+    @classmethod
+    def get_telegram_source(
+        cls,
+        chat_id: Optional[int] = None,
+        message_id: Optional[int] = None,
+        file_unique_id: Optional[str] = None
+    ) -> Optional['Article']:
+        """
+        Статья, уже импортированная из этого поста или с этим медиа
+        
+        Поиск идёт по уникальным индексам (channel id, message id) и
+        file_unique_id - один запрос без сканирования таблицы.
+        """
+        query = models.Q()
+        if chat_id and message_id:
+            query |= models.Q(telegram_chat_id=chat_id, telegram_message_id=message_id)
+        if file_unique_id:
+            query |= models.Q(telegram_file_unique_id=file_unique_id)
+        if not query:
+            return None
+        return cls.objects.filter(query).first()
+    
+    @classmethod
+    def get_legacy_telegram_article(
+        cls,
+        title: str,
+        message_id: Optional[int] = None,
+        channel_username: Optional[str] = None
+    ) -> Optional['Article']:
+        """
+        Статья, импортированная из поста до появления telegram_chat_id
+        
+        У таких статей нет источника в уникальных индексах: они ищутся по
+        сообщению в канале, а если его нет - по заголовку. Оба поиска идут
+        по частичным индексам, в которые попадают только старые статьи.
+        """
+        legacy = cls.objects.filter(telegram_chat_id__isnull=True)
+        if message_id and channel_username:
+            existing = legacy.filter(
+                telegram_message_id=message_id,
+                telegram_channel_username=channel_username
+            ).first()
+            if existing is not None:
+                return existing
+        return legacy.filter(title=title).first()
+    
+    @classmethod
+    def get_or_create_from_telegram(
+        cls,
+        chat_id: Optional[int],
+        message_id: Optional[int],
+        file_unique_id: Optional[str] = None,
+        **fields
+    ) -> Tuple['Article', bool]:
+        """
+        Идемпотентно создаёт статью из поста Telegram
+        
+        Если пост (или его медиа) уже импортирован - возвращает существующую
+        статью. Гонку двух импортёров разрешает уникальный индекс.
         
-        # Сохраняем первый раз
-        super().save(*args, **kwargs)
+        Args:
+            chat_id: ID канала
+            message_id: ID сообщения в канале
+            file_unique_id: file_unique_id главного медиа
+            **fields: Остальные поля новой статьи
         
-        # После сохранения проверяем уникальность и обновляем если нужно
-        if self.slug:
-            # Если slug не уникален, добавляем ID
-            if Article.objects.filter(slug=self.slug).exclude(id=self.id).exists():
-                self.slug = f'{self.slug}-{self.id}'
-                super().save(update_fields=['slug'])
+        Returns:
+            (статья, создана ли она)
+        """
+        existing = cls.get_telegram_source(chat_id, message_id, file_unique_id)
+        if existing is not None:
+            return existing, False
+        
+        article = cls(
+            telegram_chat_id=chat_id,
+            telegram_message_id=message_id,
+            telegram_file_unique_id=file_unique_id or None,
+            **fields
+        )
+        try:
+            with transaction.atomic():
+                article.save()
+        except IntegrityError:
+            existing = cls.get_telegram_source(chat_id, message_id, file_unique_id)
+            if existing is None:
+                raise
+            return existing, False
+        return article, True
     
     def get_absolute_url(self):
         """URL для детальной страницы статьи"""
@@ -156,6 +314,12 @@ class Article(BaseModel):
             return self.video_file.url
         return self.video_url
     
+    def get_hls_url(self):
+        """URL HLS плейлиста (если видео нарезано на сегменты)"""
+        if not self.video_hls_manifest:
+            return None
+        return self.video_file.storage.url(self.video_hls_manifest)
+    
     def get_video_embed_url(self):
         """Получить embed URL для видео (только для YouTube/Vimeo)"""
         if not self.video_url:
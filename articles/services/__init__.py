@@ -0,0 +1,39 @@
+"""
+Services для articles приложения
+"""
+from .video_cache import VideoDiskCache, iter_file_range
+from .file_resolver import (
+    resolve_telegram_file,
+    invalidate_telegram_file,
+    STATUS_OK,
+    STATUS_TOO_BIG,
+    STATUS_ERROR,
+)
+from .video_metadata import (
+    get_video_metadata,
+    remember_video_metadata,
+    apply_metadata_headers,
+    if_range_matches,
+)
+from .video_worker import notify_video_worker
+from .video_processing import process_article_video, get_ffmpeg_binary
+from .telegram_media import fetch_telegram_media, FetchedMedia
+
+__all__ = [
+    'VideoDiskCache',
+    'iter_file_range',
+    'resolve_telegram_file',
+    'invalidate_telegram_file',
+    'STATUS_OK',
+    'STATUS_TOO_BIG',
+    'STATUS_ERROR',
+    'get_video_metadata',
+    'remember_video_metadata',
+    'apply_metadata_headers',
+    'if_range_matches',
+    'notify_video_worker',
+    'process_article_video',
+    'get_ffmpeg_binary',
+    'fetch_telegram_media',
+    'FetchedMedia',
+]
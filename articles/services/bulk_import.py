@@ -0,0 +1,100 @@
+"""
+Массовое создание статей (batch_import_posts --bulk)
+
+Обычный импорт сохраняет каждую статью отдельным Article.save() (подбор
+slug + INSERT), а каждое фото галереи - отдельным ArticleImage.objects.create().
+
+Здесь батч постов создаётся в три этапа:
+1. slug всех статей батча подбираются одним запросом (core.services.slugs);
+2. фото скачиваются и сохраняются в storage параллельно - до транзакции;
+3. статьи и изображения вставляются bulk_create в одной транзакции.
+
+Модуль не реэкспортируется из articles.services: он импортирует модели,
+а модели импортируют articles.services.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+
+from articles.models import Article, ArticleImage
+from articles.services.telegram_media import DEFAULT_MEDIA_FETCH_WORKERS, FetchedMedia
+from core.services.slugs import allocate_slugs
+
+django_logger = logging.getLogger(__name__)
+
+# Сколько раз пересчитать slug, если их занял параллельный импорт
+BULK_CREATE_ATTEMPTS = 2
+
+
+def store_media_files(jobs: List[Tuple[object, str, FetchedMedia]], max_workers: Optional[int] = None) -> List[Optional[str]]:
+    """
+    Параллельно сохраняет скачанные файлы в storage
+
+    Args:
+        jobs: (FieldFile-поле модели, имя файла, FetchedMedia)
+        max_workers: Размер пула (по умолчанию TELEGRAM_MEDIA_FETCH_WORKERS)
+
+    Returns:
+        Имена файлов в storage в порядке jobs (None, если файл не скачан или не сохранён)
+    """
+    if max_workers is None:
+        max_workers = getattr(settings, 'TELEGRAM_MEDIA_FETCH_WORKERS', DEFAULT_MEDIA_FETCH_WORKERS)
+
+    def save(job):
+        field_file, name, fetched = job
+        if not fetched.ok:
+            return None
+        try:
+            with fetched.open(name) as content:
+                return field_file.storage.save(
+                    field_file.field.generate_filename(field_file.instance, name),
+                    content
+                )
+        except Exception as e:
+            django_logger.error(f'Ошибка сохранения файла {name}: {e}')
+            return None
+
+    if not jobs:
+        return []
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(jobs)))) as pool:
+        return list(pool.map(save, jobs))
+
+
+def delete_media_files(storage, names: Iterable[Optional[str]]):
+    """Удаляет файлы, сохранённые для батча, который не удалось записать в базу"""
+    for name in names:
+        if name:
+            try:
+                storage.delete(name)
+            except Exception as e:
+                django_logger.warning(f'Не удалось удалить файл {name}: {e}')
+
+
+def allocate_article_slugs(articles: List[Article]) -> List[str]:
+    """Уникальные slug для ещё не сохранённых статей - одним запросом"""
+    return allocate_slugs(Article, [article.title for article in articles], fallback='article')
+
+
+def bulk_create_articles(articles: List[Article], images: List[ArticleImage]):
+    """
+    Вставляет статьи и изображения галереи в одной транзакции
+
+    slug статей должны быть уже назначены (allocate_article_slugs). Если
+    параллельный импорт успел занять какой-то slug, slug пересчитываются
+    и вставка повторяется.
+    """
+    for attempt in range(1, BULK_CREATE_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                Article.objects.bulk_create(articles)
+                ArticleImage.objects.bulk_create(images)
+            return
+        except IntegrityError:
+            if attempt == BULK_CREATE_ATTEMPTS:
+                raise
+            django_logger.warning('Конфликт slug при bulk_create, пересчитываю slug батча')
+            for article, slug in zip(articles, allocate_article_slugs(articles)):
+                article.slug = slug
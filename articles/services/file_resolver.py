@@ -0,0 +1,93 @@
+"""
+Кэш разрешения Telegram file_id → file_path
+
+Ссылка на файл, которую возвращает getFile, живёт около часа, поэтому
+результат кэшируется в Django cache по file_id (он же Article.video_url).
+Неудачи («file is too big», прочие ошибки API) тоже кэшируются,
+чтобы не дёргать Telegram на каждый просмотр.
+"""
+import hashlib
+import logging
+from typing import Dict, Optional
+
+from django.core.cache import cache
+
+from core.services import get_telegram_client
+
+django_logger = logging.getLogger(__name__)
+
+# file_path из getFile действителен около часа - берём с запасом
+RESOLVE_TTL = 55 * 60
+# Размер файла не изменится - «слишком большой» можно помнить долго
+TOO_BIG_TTL = 24 * 60 * 60
+# Прочие ошибки могут быть временными
+ERROR_TTL = 60
+
+STATUS_OK = 'ok'
+STATUS_TOO_BIG = 'too_big'
+STATUS_ERROR = 'error'
+
+
+def get_cache_key(file_id: str) -> str:
+    """Ключ кэша для file_id (file_id длинный, поэтому хэшируем)"""
+    digest = hashlib.sha1(file_id.encode('utf-8')).hexdigest()
+    return f'telegram_file:{digest}'
+
+
+def invalidate_telegram_file(file_id: Optional[str]):
+    """Сбрасывает закэшированное разрешение file_id"""
+    if file_id:
+        cache.delete(get_cache_key(file_id))
+
+
+def resolve_telegram_file(file_id: str, bot_token: str) -> Dict:
+    """
+    Возвращает информацию о файле Telegram, обращаясь к getFile только при промахе кэша
+
+    Args:
+        file_id: Telegram file_id
+        bot_token: Токен бота
+
+    Returns:
+        Словарь со статусом:
+        - {'status': 'ok', 'file_path', 'file_size', 'file_unique_id'}
+        - {'status': 'too_big', 'description'}
+        - {'status': 'error', 'description'}
+
+    Raises:
+        requests.RequestException: при сетевой ошибке (такие результаты не кэшируются)
+    """
+    cache_key = get_cache_key(file_id)
+    cached = cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    response = get_telegram_client(bot_token).get('getFile', params={'file_id': file_id})
+
+    try:
+        file_data = response.json()
+    except ValueError:
+        file_data = {'ok': False, 'description': response.text[:200], 'error_code': response.status_code}
+
+    if file_data.get('ok'):
+        result_data = file_data['result']
+        result = {
+            'status': STATUS_OK,
+            'file_path': result_data['file_path'],
+            'file_size': result_data.get('file_size') or 0,
+            'file_unique_id': result_data.get('file_unique_id', ''),
+        }
+        cache.set(cache_key, result, RESOLVE_TTL)
+        return result
+
+    description = file_data.get('description', 'Unknown error')
+
+    # Только «file is too big»: прочие 400 (неверный или устаревший file_id) - обычная ошибка
+    if 'file is too big' in description.lower():
+        result = {'status': STATUS_TOO_BIG, 'description': description}
+        cache.set(cache_key, result, TOO_BIG_TTL)
+    else:
+        result = {'status': STATUS_ERROR, 'description': description}
+        cache.set(cache_key, result, ERROR_TTL)
+
+    return result
@@ -0,0 +1,130 @@
+"""
+Параллельная загрузка медиа из Telegram для импорта постов
+
+Медиа-группа (альбом) раньше скачивалась по одному файлу: getFile +
+скачивание для каждого фото, каждый файл целиком в памяти. Здесь все
+элементы группы запрашиваются параллельно (ограниченным пулом потоков)
+и пишутся во временные файлы кусками; в storage они потом сохраняются
+тоже потоком, без чтения всего файла в память. Порядок результатов
+совпадает с порядком file_id - это порядок ArticleImage.order.
+"""
+import logging
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
+
+from django.conf import settings
+from django.core.files import File
+
+django_logger = logging.getLogger(__name__)
+
+# Сколько файлов одной группы качать одновременно: в альбоме до 10 элементов,
+# так что весь альбом качается за время самого медленного файла
+DEFAULT_MEDIA_FETCH_WORKERS = 10
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+class FetchedMedia:
+    """
+    Результат загрузки одного файла
+
+    Attributes:
+        index: Позиция в исходном списке
+        file_id: Telegram file_id
+        path: Путь к временному файлу (None при ошибке)
+        size: Размер в байтах
+        error: Текст ошибки (None при успехе)
+    """
+
+    def __init__(self, index: int, file_id: str, path: Optional[str] = None, size: int = 0, error: Optional[str] = None):
+        self.index = index
+        self.file_id = file_id
+        self.path = path
+        self.size = size
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.path is not None
+
+    def open(self, name: str) -> File:
+        """Открывает временный файл как django File для FieldFile.save()"""
+        return File(open(self.path, 'rb'), name=name)
+
+    def cleanup(self):
+        """Удаляет временный файл"""
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def _fetch_one(telegram, index: int, file_id: str) -> FetchedMedia:
+    """getFile + потоковое скачивание одного файла во временный файл"""
+    try:
+        response = telegram.get('getFile', params={'file_id': file_id})
+        response.raise_for_status()
+        file_data = response.json()
+        if not file_data.get('ok'):
+            return FetchedMedia(index, file_id, error=file_data.get('description', 'API ошибка'))
+
+        file_path = file_data['result']['file_path']
+        suffix = os.path.splitext(file_path)[1]
+        fd, temp_path = tempfile.mkstemp(
+            prefix='telegram-media-',
+            suffix=suffix,
+            dir=getattr(settings, 'FILE_UPLOAD_TEMP_DIR', None)
+        )
+        size = 0
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                with telegram.download(file_path, stream=True) as download:
+                    download.raise_for_status()
+                    for chunk in download.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                        f.write(chunk)
+                        size += len(chunk)
+        except Exception:
+            os.remove(temp_path)
+            raise
+
+        return FetchedMedia(index, file_id, path=temp_path, size=size)
+    except Exception as e:
+        return FetchedMedia(index, file_id, error=str(e))
+
+
+@contextmanager
+def fetch_telegram_media(telegram, file_ids: List[str], max_workers: Optional[int] = None) -> Iterator[List[FetchedMedia]]:
+    """
+    Скачивает файлы параллельно; временные файлы удаляются при выходе из with
+
+    Использование:
+        with fetch_telegram_media(telegram, file_ids) as fetched:
+            for item in fetched:
+                if item.ok:
+                    with item.open(name) as f:
+                        article.image.save(name, f)
+
+    Args:
+        telegram: TelegramAPIClient
+        file_ids: Telegram file_id в нужном порядке
+        max_workers: Размер пула (по умолчанию TELEGRAM_MEDIA_FETCH_WORKERS)
+
+    Yields:
+        Список FetchedMedia в том же порядке, что и file_ids
+    """
+    if max_workers is None:
+        max_workers = getattr(settings, 'TELEGRAM_MEDIA_FETCH_WORKERS', DEFAULT_MEDIA_FETCH_WORKERS)
+
+    fetched = []
+    try:
+        if file_ids:
+            with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(file_ids)))) as pool:
+                # map сохраняет порядок входных данных
+                fetched = list(pool.map(
+                    lambda args: _fetch_one(telegram, *args),
+                    enumerate(file_ids)
+                ))
+        yield fetched
+    finally:
+        for item in fetched:
+            item.cleanup()
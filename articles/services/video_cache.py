@@ -0,0 +1,229 @@
+"""
+Локальный дисковый кэш видео, проксируемых из Telegram
+
+Файлы хранятся под MEDIA_ROOT и адресуются по Telegram file_id,
+поэтому повторный просмотр не обращается к Telegram вообще.
+Кэш ограничен по размеру и вытесняет давно не читанные файлы (LRU по mtime).
+Каталог кэша обходится не на каждое сохранение: процесс считает размер
+добавленных файлов и запускает вытеснение, когда этот счёт превысил лимит,
+но не реже раза в EVICT_INTERVAL (кэш пополняют и другие процессы).
+"""
+import os
+import time
+import hashlib
+import logging
+import tempfile
+import threading
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterable, Iterator, Optional, Tuple
+
+from django.conf import settings
+
+django_logger = logging.getLogger(__name__)
+
+# Временные файлы старше этого возраста считаются брошенными и удаляются
+STALE_TEMP_AGE = 24 * 60 * 60
+
+# Размер блока при чтении файла с диска
+READ_CHUNK_SIZE = 64 * 1024
+
+# Как часто обходить каталог кэша, даже если по счёту процесса лимит не превышен (секунды)
+EVICT_INTERVAL = 10 * 60
+
+# Каталог кэша -> (оценка размера в байтах или None, время последнего обхода по monotonic)
+_cache_sizes: Dict[str, Tuple[Optional[int], float]] = {}
+_cache_sizes_lock = threading.Lock()
+
+
+def iter_file_range(f: BinaryIO, start: int, end: int, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    Генератор байтов диапазона [start, end] уже открытого файла
+
+    Файл открывает (и закрывает) вызывающий код: открытый дескриптор
+    продолжает читаться, даже если файл тем временем вытеснили из кэша.
+
+    Args:
+        f: Файл, открытый в режиме 'rb'
+        start: Первый байт (включительно)
+        end: Последний байт (включительно)
+        chunk_size: Размер блока чтения
+    """
+    f.seek(start)
+    remaining = end - start + 1
+    while remaining > 0:
+        chunk = f.read(min(chunk_size, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+        yield chunk
+
+
+class VideoDiskCache:
+    """
+    Дисковый кэш видео с заполнением «на лету» и вытеснением LRU
+
+    Ключ кэша - Telegram file_id (sha256 от него служит именем файла).
+    Файл попадает в кэш только целиком: данные пишутся во временный файл
+    параллельно с отдачей клиенту и атомарно переименовываются после
+    получения ожидаемого количества байт.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_size: Optional[int] = None):
+        """
+        Инициализация кэша
+
+        Args:
+            cache_dir: Каталог кэша (по умолчанию TELEGRAM_VIDEO_CACHE_DIR)
+            max_size: Максимальный суммарный размер в байтах
+                (по умолчанию TELEGRAM_VIDEO_CACHE_MAX_SIZE)
+        """
+        self.cache_dir = Path(cache_dir or settings.TELEGRAM_VIDEO_CACHE_DIR)
+        self.max_size = max_size if max_size is not None else settings.TELEGRAM_VIDEO_CACHE_MAX_SIZE
+        self.temp_dir = self.cache_dir / 'tmp'
+
+    @staticmethod
+    def is_enabled() -> bool:
+        """Включён ли кэш в настройках"""
+        return bool(getattr(settings, 'TELEGRAM_VIDEO_CACHE_ENABLED', True))
+
+    def path_for(self, file_id: str) -> Path:
+        """Путь к файлу кэша для file_id (двухуровневое разбиение каталогов)"""
+        digest = hashlib.sha256(file_id.encode('utf-8')).hexdigest()
+        return self.cache_dir / digest[:2] / digest
+
+    def get(self, file_id: str) -> Optional[Path]:
+        """
+        Возвращает путь к закэшированному файлу или None
+
+        При попадании обновляет mtime файла - это метка для вытеснения LRU.
+        """
+        path = self.path_for(file_id)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            django_logger.warning(f"Не удалось обновить метку доступа {path}: {e}")
+        return path
+
+    def tee(self, file_id: str, chunks: Iterable[bytes], expected_size: int) -> Iterator[bytes]:
+        """
+        Отдаёт чанки дальше и одновременно сохраняет их в кэш
+
+        Если поток оборвался (клиент ушёл, ошибка сети) или размер не совпал
+        с ожидаемым, временный файл удаляется и кэш не заполняется.
+
+        Args:
+            file_id: Telegram file_id
+            chunks: Исходный поток байтов
+            expected_size: Ожидаемый размер файла
+        """
+        temp_file = None
+        temp_path = None
+        written = 0
+
+        try:
+            self.temp_dir.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self.temp_dir, suffix='.part')
+            temp_file = os.fdopen(fd, 'wb')
+        except OSError as e:
+            django_logger.warning(f"Кэш видео недоступен, отдаём без сохранения: {e}")
+            yield from chunks
+            return
+
+        completed = False
+        try:
+            for chunk in chunks:
+                if temp_file is not None:
+                    try:
+                        temp_file.write(chunk)
+                        written += len(chunk)
+                    except OSError as e:
+                        django_logger.warning(f"Ошибка записи в кэш видео: {e}")
+                        temp_file.close()
+                        temp_file = None
+                yield chunk
+            completed = True
+        finally:
+            if temp_file is not None:
+                temp_file.close()
+                if completed and written == expected_size:
+                    self._commit(file_id, Path(temp_path))
+                    temp_path = None
+            if temp_path:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+    def _commit(self, file_id: str, temp_path: Path):
+        """Атомарно переносит полностью скачанный файл в кэш и при необходимости запускает вытеснение"""
+        path = self.path_for(file_id)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, path)
+            size = path.stat().st_size
+            django_logger.info(f"Видео сохранено в кэш: {path.name[:12]}... ({size} байт)")
+        except OSError as e:
+            django_logger.warning(f"Не удалось сохранить видео в кэш: {e}")
+            return
+        if self._evict_due(size):
+            self.evict()
+
+    def _evict_due(self, added: int) -> bool:
+        """
+        Пора ли обходить каталог кэша после сохранения файла размером added
+
+        Returns:
+            True, если размер кэша ещё не известен процессу, по счёту процесса
+            превысил лимит или с последнего обхода прошло EVICT_INTERVAL
+        """
+        key = str(self.cache_dir)
+        now = time.monotonic()
+        with _cache_sizes_lock:
+            size, scanned_at = _cache_sizes.get(key, (None, 0))
+            if size is not None:
+                size += added
+            due = size is None or size > self.max_size or now - scanned_at >= EVICT_INTERVAL
+            # Параллельные сохранения не запускают второй обход, пока идёт этот
+            _cache_sizes[key] = (size, now if due else scanned_at)
+        return due
+
+    def evict(self):
+        """
+        Удаляет самые давно читанные файлы, пока кэш не уложится в лимит
+
+        Заодно чистит брошенные временные файлы.
+        """
+        entries = []
+        total = 0
+        now = time.time()
+
+        for path in self.cache_dir.glob('*/*'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            if path.parent == self.temp_dir:
+                if now - stat.st_mtime > STALE_TEMP_AGE:
+                    path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total > self.max_size:
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self.max_size:
+                    break
+                try:
+                    path.unlink()
+                    total -= size
+                    django_logger.info(f"Видео вытеснено из кэша: {path.name[:12]}...")
+                except FileNotFoundError:
+                    total -= size
+                except OSError as e:
+                    django_logger.warning(f"Не удалось удалить {path} из кэша: {e}")
+
+        with _cache_sizes_lock:
+            _cache_sizes[str(self.cache_dir)] = (total, time.monotonic())
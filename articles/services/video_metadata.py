@@ -0,0 +1,93 @@
+"""
+Кэш метаданных проксируемых видео
+
+Вместо кэширования ответов целиком (cache_page не подходит для
+StreamingHttpResponse) храним только то, что нужно для заголовков:
+MIME тип, размер, ETag и Last-Modified. Этого достаточно, чтобы отвечать
+на HEAD и условные запросы (If-None-Match, If-Modified-Since, If-Range)
+без обращения к Telegram.
+"""
+import hashlib
+import time
+from typing import Dict, Optional
+
+from django.core.cache import cache
+from django.utils.http import http_date, parse_http_date_safe
+
+# Содержимое файла по file_id не меняется - метаданные можно хранить долго
+METADATA_TTL = 7 * 24 * 60 * 60
+
+
+def get_metadata_cache_key(file_id: str) -> str:
+    """Ключ кэша метаданных для file_id"""
+    digest = hashlib.sha1(file_id.encode('utf-8')).hexdigest()
+    return f'telegram_video_meta:{digest}'
+
+
+def build_etag(file_unique_id: str) -> str:
+    """
+    Строгий ETag из file_unique_id
+
+    file_unique_id одинаков для одного и того же файла у всех ботов
+    и не меняется со временем - идеальный валидатор содержимого.
+    """
+    return f'"{file_unique_id}"'
+
+
+def get_video_metadata(file_id: str) -> Optional[Dict]:
+    """Возвращает закэшированные метаданные видео или None"""
+    return cache.get(get_metadata_cache_key(file_id))
+
+
+def remember_video_metadata(
+    file_id: str,
+    file_unique_id: str,
+    file_size: int,
+    content_type: str
+) -> Dict:
+    """
+    Сохраняет метаданные видео
+
+    Last-Modified - момент, когда файл впервые встретился прокси;
+    при повторном сохранении он не сдвигается.
+
+    Returns:
+        Словарь с ключами content_type, content_length, etag, last_modified
+    """
+    existing = get_video_metadata(file_id)
+    metadata = {
+        'content_type': content_type,
+        'content_length': file_size,
+        'etag': build_etag(file_unique_id or hashlib.sha1(file_id.encode('utf-8')).hexdigest()),
+        'last_modified': existing['last_modified'] if existing else int(time.time()),
+    }
+    cache.set(get_metadata_cache_key(file_id), metadata, METADATA_TTL)
+    return metadata
+
+
+def apply_metadata_headers(response, metadata: Dict):
+    """Проставляет в ответ заголовки-валидаторы из метаданных"""
+    response['ETag'] = metadata['etag']
+    response['Last-Modified'] = http_date(metadata['last_modified'])
+    return response
+
+
+def if_range_matches(request, metadata: Dict) -> bool:
+    """
+    Проверяет заголовок If-Range (RFC 7233, раздел 3.2)
+
+    Returns:
+        True, если If-Range отсутствует или совпадает с текущей версией файла -
+        тогда Range можно выполнять. Иначе нужно отдать файл целиком.
+    """
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range:
+        return True
+
+    if_range = if_range.strip()
+    if if_range.startswith('"') or if_range.startswith('W/'):
+        # Для If-Range допустимо только строгое сравнение ETag
+        return if_range == metadata['etag']
+
+    last_modified = parse_http_date_safe(if_range)
+    return last_modified is not None and last_modified == metadata['last_modified']
@@ -0,0 +1,313 @@
+"""
+Подготовка скачанных видео к потоковому воспроизведению (ffmpeg)
+
+Файлы из Telegram часто записаны с атомом moov в конце - браузеру
+приходится скачать весь файл, прежде чем начать показ. После скачивания:
+- делаем remux в faststart MP4 (-c copy -movflags +faststart, без перекодирования);
+- при VIDEO_HLS_ENABLED нарезаем HLS (fMP4-сегменты + плейлист), чтобы плеер
+  и CDN работали с небольшими сегментами, а не с одним огромным файлом;
+- извлекаем постер (JPEG) и короткий беззвучный превью-ролик для списка
+  статей - список грузит килобайты картинок вместо метаданных каждого видео.
+
+Без ffmpeg в PATH обработка пропускается - видео остаётся как есть.
+"""
+import logging
+import os
+import shutil
+import struct
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+django_logger = logging.getLogger(__name__)
+
+# Длительность HLS сегмента в секундах (сегменты режутся по ключевым кадрам)
+HLS_SEGMENT_DURATION = 6
+HLS_MANIFEST_NAME = 'index.m3u8'
+# Подкаталог media для HLS, внутри - каталог на каждую статью
+HLS_UPLOAD_TO = 'articles/hls/'
+# Постер: кадр с этой секунды (у совсем коротких видео - первый кадр)
+POSTER_OFFSET = 1
+POSTER_MAX_WIDTH = 1280
+# Превью-ролик: первые секунды видео, без звука, низкий битрейт
+PREVIEW_DURATION = 4
+PREVIEW_HEIGHT = 360
+PREVIEW_MAX_BITRATE = '400k'
+# Таймаут одного запуска ffmpeg (секунды)
+FFMPEG_TIMEOUT = 30 * 60
+
+
+def get_ffmpeg_binary() -> Optional[str]:
+    """Путь к ffmpeg или None, если он не установлен"""
+    return shutil.which(getattr(settings, 'FFMPEG_BINARY', 'ffmpeg'))
+
+
+def is_hls_enabled() -> bool:
+    """Включена ли нарезка HLS"""
+    return getattr(settings, 'VIDEO_HLS_ENABLED', True)
+
+
+def is_preview_clip_enabled() -> bool:
+    """Включено ли создание превью-роликов"""
+    return getattr(settings, 'VIDEO_PREVIEW_CLIP_ENABLED', True)
+
+
+def needs_faststart(path: str) -> bool:
+    """
+    Проверяет, что атом moov идёт после mdat
+
+    Читаются только заголовки атомов верхнего уровня, сам файл не загружается.
+    Если структуру разобрать не удалось, считаем что remux нужен.
+    """
+    try:
+        with open(path, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            position = 0
+            while position + 8 <= file_size:
+                f.seek(position)
+                header = f.read(8)
+                if len(header) < 8:
+                    break
+                size, box_type = struct.unpack('>I4s', header)
+                if size == 1:
+                    size = struct.unpack('>Q', f.read(8))[0]
+                elif size == 0:
+                    size = file_size - position
+                if box_type == b'moov':
+                    return False
+                if box_type == b'mdat':
+                    return True
+                if size < 8:
+                    break
+                position += size
+    except OSError:
+        pass
+    return True
+
+
+def run_ffmpeg(args: list):
+    """
+    Запускает ffmpeg с аргументами
+
+    Raises:
+        RuntimeError: если ffmpeg не установлен или завершился с ошибкой
+    """
+    ffmpeg = get_ffmpeg_binary()
+    if not ffmpeg:
+        raise RuntimeError('ffmpeg не найден')
+
+    result = subprocess.run(
+        [ffmpeg, '-hide_banner', '-loglevel', 'error', '-y', *args],
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        timeout=FFMPEG_TIMEOUT,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f'ffmpeg завершился с кодом {result.returncode}: {result.stderr.decode(errors="replace")[-500:]}')
+
+
+def remux_faststart(path: str) -> bool:
+    """
+    Переносит moov в начало файла без перекодирования
+
+    Результат пишется во временный файл рядом и атомарно заменяет исходный,
+    поэтому уже идущие раздачи старого файла не обрываются.
+
+    Returns:
+        True если файл был переписан, False если он уже faststart
+    """
+    if not needs_faststart(path):
+        return False
+
+    source = Path(path)
+    fd, temp_path = tempfile.mkstemp(dir=source.parent, prefix='.faststart-', suffix='.mp4')
+    os.close(fd)
+    try:
+        run_ffmpeg([
+            '-i', str(source),
+            '-map', '0',
+            '-c', 'copy',
+            '-movflags', '+faststart',
+            '-f', 'mp4',
+            temp_path,
+        ])
+        os.replace(temp_path, source)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return True
+
+
+def build_hls(path: str, output_dir: Path) -> Path:
+    """
+    Нарезает видео на HLS fMP4-сегменты (без перекодирования)
+
+    Сегменты собираются во временном каталоге и затем подменяют output_dir,
+    чтобы плеер никогда не увидел недописанный плейлист.
+
+    Returns:
+        Путь к плейлисту
+    """
+    output_dir = Path(output_dir)
+    output_dir.parent.mkdir(parents=True, exist_ok=True)
+    build_dir = Path(tempfile.mkdtemp(dir=output_dir.parent, prefix=f'.{output_dir.name}-'))
+    try:
+        run_ffmpeg([
+            '-i', path,
+            '-map', '0:v:0',
+            '-map', '0:a:0?',
+            '-c', 'copy',
+            '-f', 'hls',
+            '-hls_time', str(HLS_SEGMENT_DURATION),
+            '-hls_playlist_type', 'vod',
+            '-hls_segment_type', 'fmp4',
+            '-hls_fmp4_init_filename', 'init.mp4',
+            '-hls_segment_filename', str(build_dir / 'segment_%05d.m4s'),
+            str(build_dir / HLS_MANIFEST_NAME),
+        ])
+        build_dir.chmod(0o755)
+        if output_dir.exists():
+            shutil.rmtree(output_dir)
+        os.replace(build_dir, output_dir)
+    finally:
+        if build_dir.exists():
+            shutil.rmtree(build_dir, ignore_errors=True)
+    return output_dir / HLS_MANIFEST_NAME
+
+
+def _render_to_storage(storage, name: str, render) -> str:
+    """
+    Создаёт файл через render(temp_path) и атомарно кладёт его в storage под name
+
+    Returns:
+        Имя файла в storage
+    """
+    destination = Path(storage.path(name))
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=destination.parent, prefix='.render-', suffix=destination.suffix)
+    os.close(fd)
+    try:
+        render(temp_path)
+        if os.path.getsize(temp_path) == 0:
+            raise RuntimeError(f'ffmpeg создал пустой файл для {name}')
+        os.chmod(temp_path, 0o644)
+        os.replace(temp_path, destination)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return name
+
+
+def extract_poster(path: str, output_path: str):
+    """
+    Сохраняет кадр видео в JPEG (не шире POSTER_MAX_WIDTH)
+
+    Raises:
+        RuntimeError: если не удалось получить даже первый кадр
+    """
+    for offset in (POSTER_OFFSET, 0):
+        try:
+            run_ffmpeg([
+                '-ss', str(offset),
+                '-i', path,
+                '-frames:v', '1',
+                '-vf', f"scale='min({POSTER_MAX_WIDTH},iw)':-2",
+                '-q:v', '4',
+                '-f', 'image2',
+                output_path,
+            ])
+        except RuntimeError:
+            if offset == 0:
+                raise
+            # Видео короче POSTER_OFFSET: ffmpeg может завершиться ошибкой - берём первый кадр
+            continue
+        # ...или завершиться без кадра - тоже берём первый
+        if os.path.exists(output_path) and os.path.getsize(output_path) > 0:
+            return
+
+
+def build_preview_clip(path: str, output_path: str):
+    """Короткий беззвучный H.264 ролик низкого битрейта для списка статей"""
+    run_ffmpeg([
+        '-i', path,
+        '-t', str(PREVIEW_DURATION),
+        '-an',
+        '-vf', f'scale=-2:{PREVIEW_HEIGHT}',
+        '-c:v', 'libx264',
+        '-preset', 'veryfast',
+        '-crf', '32',
+        '-maxrate', PREVIEW_MAX_BITRATE,
+        '-bufsize', '800k',
+        '-pix_fmt', 'yuv420p',
+        '-movflags', '+faststart',
+        '-f', 'mp4',
+        output_path,
+    ])
+
+
+def process_article_video(article) -> dict:
+    """
+    Готовит video_file статьи к потоковому воспроизведению
+
+    Только работа с файлами - сохранять статью должен вызывающий код
+    (воркер делает это через sync_to_async, команда - напрямую).
+
+    Returns:
+        Поля для обновления статьи: video_hls_manifest, video_poster,
+        video_preview_clip, video_processed_at.
+        Пустой словарь, если обрабатывать нечего или нет ffmpeg.
+    """
+    if not article.video_file:
+        return {}
+    if not get_ffmpeg_binary():
+        django_logger.warning('ffmpeg не найден - видео оставлено без обработки')
+        return {}
+
+    storage = article.video_file.storage
+    try:
+        video_path = storage.path(article.video_file.name)
+    except NotImplementedError:
+        # ffmpeg работает только с локальными файлами
+        return {}
+
+    if remux_faststart(video_path):
+        django_logger.info(f'Видео переписано в faststart: {article.video_file.name}')
+
+    hls_manifest = ''
+    if is_hls_enabled():
+        hls_name = f'{HLS_UPLOAD_TO}{article.pk}'
+        manifest_path = build_hls(video_path, Path(storage.path(hls_name)))
+        hls_manifest = f'{hls_name}/{manifest_path.name}'
+        django_logger.info(f'HLS подготовлен: {hls_manifest}')
+
+    updates = {
+        'video_hls_manifest': hls_manifest,
+        'video_processed_at': timezone.now(),
+    }
+
+    try:
+        updates['video_poster'] = _render_to_storage(
+            storage,
+            f'{article.video_poster.field.upload_to}{article.pk}.jpg',
+            lambda output_path: extract_poster(video_path, output_path)
+        )
+    except RuntimeError as e:
+        # Без постера видео всё равно показывается - не роняем обработку
+        django_logger.warning(f'Не удалось создать постер для {article.video_file.name}: {e}')
+
+    if is_preview_clip_enabled():
+        try:
+            updates['video_preview_clip'] = _render_to_storage(
+                storage,
+                f'{article.video_preview_clip.field.upload_to}{article.pk}.mp4',
+                lambda output_path: build_preview_clip(video_path, output_path)
+            )
+        except RuntimeError as e:
+            django_logger.warning(f'Не удалось создать превью-ролик для {article.video_file.name}: {e}')
+
+    return updates
+
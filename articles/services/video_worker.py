@@ -0,0 +1,139 @@
+"""
+Связь с демоном скачивания видео (download_pending_videos --daemon)
+
+Демон записывает свой PID в TELETHON_WORKER_PIDFILE и просыпается по SIGUSR1.
+Боты и импорт вызывают notify_video_worker() после создания статьи
+со статусом 'pending', чтобы видео начало качаться сразу, а не при
+следующем опросе базы.
+
+Пока демон работает, он держит на PID-файле блокировку (fcntl.flock).
+Сигнал отправляется, только если блокировка занята: PID из файла,
+оставшегося от упавшего демона (и, возможно, уже выданный другому
+процессу), не получит SIGUSR1, который по умолчанию завершает процесс.
+"""
+import logging
+import os
+import signal
+from pathlib import Path
+from typing import Optional
+
+from django.conf import settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: нет ни flock, ни SIGUSR1
+    fcntl = None
+
+django_logger = logging.getLogger(__name__)
+
+# Открытый PID-файл демона: блокировка держится, пока файл открыт
+_pidfile = None
+
+
+def get_pidfile_path() -> Path:
+    """Путь к PID-файлу демона"""
+    return Path(getattr(
+        settings,
+        'TELETHON_WORKER_PIDFILE',
+        Path(settings.BASE_DIR) / 'telethon_worker' / 'worker.pid'
+    ))
+
+
+def write_pidfile() -> bool:
+    """
+    Записывает PID текущего процесса и блокирует PID-файл (вызывает демон при старте)
+
+    Returns:
+        True если файл записан (или платформа без fcntl, где PID-файл не ведётся);
+        False если его держит другой запущенный демон
+    """
+    global _pidfile
+    if fcntl is None:
+        return True
+
+    path = get_pidfile_path()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    pidfile = open(path, 'a+')
+    try:
+        fcntl.flock(pidfile, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        pidfile.close()
+        django_logger.warning(f'PID-файл {path} занят другим демоном скачивания видео')
+        return False
+
+    pidfile.seek(0)
+    pidfile.truncate()
+    pidfile.write(str(os.getpid()))
+    pidfile.flush()
+    _pidfile = pidfile
+    return True
+
+
+def remove_pidfile():
+    """Удаляет PID-файл и снимает блокировку, если файл принадлежит текущему процессу"""
+    global _pidfile
+    if _pidfile is None:
+        return
+    if read_pid() == os.getpid():
+        get_pidfile_path().unlink(missing_ok=True)
+    _pidfile.close()
+    _pidfile = None
+
+
+def read_pid() -> Optional[int]:
+    """PID демона из PID-файла или None"""
+    try:
+        return int(get_pidfile_path().read_text().strip())
+    except (OSError, ValueError):
+        return None
+
+
+def get_worker_pid() -> Optional[int]:
+    """PID демона, если он запущен (PID-файл заблокирован), иначе None"""
+    if fcntl is None:
+        return None
+    try:
+        pidfile = open(get_pidfile_path(), 'r')
+    except OSError:
+        return None
+
+    with pidfile:
+        try:
+            fcntl.flock(pidfile, fcntl.LOCK_SH | fcntl.LOCK_NB)
+        except BlockingIOError:
+            # Блокировку держит демон - PID в файле его
+            pass
+        else:
+            # Файл никто не держит: демон упал, PID мог достаться другому процессу
+            fcntl.flock(pidfile, fcntl.LOCK_UN)
+            return None
+        try:
+            return int(pidfile.read().strip())
+        except ValueError:
+            return None
+
+
+def notify_video_worker() -> bool:
+    """
+    Будит демон скачивания видео
+
+    Returns:
+        True если сигнал отправлен; False если демон не запущен
+        (тогда статью подхватит ближайший опрос или --loop)
+    """
+    wake_signal = getattr(signal, 'SIGUSR1', None)
+    if wake_signal is None:
+        return False
+    pid = get_worker_pid()
+    if pid is None:
+        return False
+
+    try:
+        os.kill(pid, wake_signal)
+    except ProcessLookupError:
+        django_logger.debug(f'Демон скачивания видео (PID {pid}) не запущен')
+        return False
+    except PermissionError:
+        django_logger.warning(f'Нет прав отправить сигнал демону скачивания видео (PID {pid})')
+        return False
+    return True
@@ -0,0 +1,22 @@
+"""
+Утилиты для articles приложения
+"""
+from .http_range import (
+    RangeNotSatisfiable,
+    parse_range_header,
+    format_content_range,
+    build_multipart_boundary,
+    multipart_part_header,
+    multipart_footer,
+    multipart_content_length,
+)
+
+__all__ = [
+    'RangeNotSatisfiable',
+    'parse_range_header',
+    'format_content_range',
+    'build_multipart_boundary',
+    'multipart_part_header',
+    'multipart_footer',
+    'multipart_content_length',
+]
@@ -0,0 +1,131 @@
+"""
+Разбор HTTP-заголовка Range (RFC 7233) для отдачи видео по частям
+"""
+import uuid
+from typing import List, Optional, Tuple
+
+# Максимальное количество диапазонов в одном запросе.
+# Больше - считаем запрос подозрительным и отдаём файл целиком.
+MAX_RANGES = 10
+
+
+class RangeNotSatisfiable(Exception):
+    """Ни один из запрошенных диапазонов не попадает в файл (ответ 416)"""
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[List[Tuple[int, int]]]:
+    """
+    Разбирает заголовок Range для файла известного размера
+
+    Поддерживаются все формы из RFC 7233: ``bytes=0-499``, ``bytes=500-``,
+    ``bytes=-500`` и их списки через запятую. Пересекающиеся и соседние
+    диапазоны склеиваются.
+
+    Args:
+        header: Значение заголовка Range (может быть None)
+        size: Полный размер файла в байтах
+
+    Returns:
+        Список диапазонов (start, end) включительно или None,
+        если заголовок отсутствует или некорректен (тогда отдаём файл целиком)
+
+    Raises:
+        RangeNotSatisfiable: если ни один диапазон не попадает в файл
+    """
+    if not header or size <= 0:
+        return None
+
+    units, _, ranges_spec = header.strip().partition('=')
+    if units.strip().lower() != 'bytes' or not ranges_spec:
+        return None
+
+    specs = [spec.strip() for spec in ranges_spec.split(',') if spec.strip()]
+    if not specs or len(specs) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for spec in specs:
+        start_str, sep, end_str = spec.partition('-')
+        if not sep:
+            return None
+        start_str, end_str = start_str.strip(), end_str.strip()
+
+        try:
+            if not start_str:
+                # bytes=-500: последние 500 байт
+                suffix_length = int(end_str)
+                if suffix_length <= 0:
+                    continue
+                start = max(size - suffix_length, 0)
+                end = size - 1
+            else:
+                start = int(start_str)
+                end = int(end_str) if end_str else None
+                if start < 0 or (end is not None and end < start):
+                    return None
+                if start >= size:
+                    # Диапазон за пределами файла - пропускаем
+                    continue
+                end = size - 1 if end is None else min(end, size - 1)
+        except ValueError:
+            return None
+
+        ranges.append((start, end))
+
+    if not ranges:
+        raise RangeNotSatisfiable()
+
+    # Склеиваем пересекающиеся и соседние диапазоны
+    ranges.sort()
+    merged = [ranges[0]]
+    for start, end in ranges[1:]:
+        last_start, last_end = merged[-1]
+        if start <= last_end + 1:
+            merged[-1] = (last_start, max(last_end, end))
+        else:
+            merged.append((start, end))
+
+    return merged
+
+
+def format_content_range(start: int, end: int, size: int) -> str:
+    """Значение заголовка Content-Range для диапазона"""
+    return f'bytes {start}-{end}/{size}'
+
+
+def build_multipart_boundary() -> str:
+    """Случайный разделитель для ответа multipart/byteranges"""
+    return uuid.uuid4().hex
+
+
+def multipart_part_header(boundary: str, content_type: str, start: int, end: int, size: int) -> bytes:
+    """Заголовок одной части ответа multipart/byteranges"""
+    return (
+        f'\r\n--{boundary}\r\n'
+        f'Content-Type: {content_type}\r\n'
+        f'Content-Range: {format_content_range(start, end, size)}\r\n'
+        f'\r\n'
+    ).encode('ascii')
+
+
+def multipart_footer(boundary: str) -> bytes:
+    """Завершающий разделитель ответа multipart/byteranges"""
+    return f'\r\n--{boundary}--\r\n'.encode('ascii')
+
+
+def multipart_content_length(
+    boundary: str,
+    content_type: str,
+    ranges: List[Tuple[int, int]],
+    size: int
+) -> int:
+    """
+    Точная длина тела ответа multipart/byteranges
+
+    Нужна, чтобы отдать Content-Length и не переходить на chunked-передачу.
+    """
+    length = len(multipart_footer(boundary))
+    for start, end in ranges:
+        length += len(multipart_part_header(boundary, content_type, start, end, size))
+        length += end - start + 1
+    return length
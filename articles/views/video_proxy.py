@@ -1,27 +1,261 @@
 """
 View для проксирования видео из Telegram
-Позволяет стримить видео любого размера без скачивания на сервер
+Позволяет стримить видео любого размера без скачивания на сервер.
+Поддерживает запросы Range (206 Partial Content), чтобы перемотка
+в плеере не скачивала файл заново целиком. Просмотренные видео
+сохраняются в дисковый кэш и дальше отдаются без обращения к Telegram.
+HEAD и условные запросы обслуживаются по закэшированным метаданным.
 """
 import os
+import mimetypes
 import requests
-from django.http import StreamingHttpResponse, Http404, HttpResponse
+from django.http import StreamingHttpResponse, FileResponse, Http404, HttpResponse
 from django.views.decorators.http import require_http_methods
-from django.views.decorators.cache import cache_page
+from django.utils.cache import get_conditional_response
 from loguru import logger
 import logging
 
+from core.services import get_telegram_client
 from articles.models import Article
+from articles.services import (
+    VideoDiskCache,
+    iter_file_range,
+    resolve_telegram_file,
+    invalidate_telegram_file,
+    STATUS_OK,
+    STATUS_TOO_BIG,
+    get_video_metadata,
+    remember_video_metadata,
+    apply_metadata_headers,
+    if_range_matches,
+)
+from articles.utils import (
+    RangeNotSatisfiable,
+    parse_range_header,
+    format_content_range,
+    build_multipart_boundary,
+    multipart_part_header,
+    multipart_footer,
+    multipart_content_length,
+)
 
 # Используем стандартный Django logger вместо loguru для production
 django_logger = logging.getLogger(__name__)
 
+# Размер блока при потоковой передаче
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+def _iter_upstream_range(client, file_path: str, start: int, end: int, chunk_size: int = STREAM_CHUNK_SIZE):
+    """
+    Итератор байтов диапазона [start, end] файла из Telegram
+
+    Запрос к Telegram выполняется сразу, а не при первой итерации: ошибку
+    можно превратить в 502 до того, как клиенту ушли заголовки с Content-Length.
+
+    Raises:
+        requests.HTTPError: Telegram ответил не 200/206
+    """
+    response = client.download(
+        file_path,
+        stream=True,
+        headers={'Range': f'bytes={start}-{end}'}
+    )
+    if response.status_code not in (200, 206):
+        response.close()
+        raise requests.HTTPError(
+            f"Не удалось скачать диапазон {start}-{end}: {response.status_code}",
+            response=response
+        )
+    return _iter_upstream_response(response, start, end, chunk_size)
+
+
+def _iter_upstream_response(response, start: int, end: int, chunk_size: int):
+    """
+    Генератор байтов диапазона [start, end] из открытого ответа Telegram
+
+    Если сервер всё же ответил целым файлом (200), лишние байты в начале
+    пропускаются. Если ответ оборвался раньше, генератор падает: сервер
+    разрывает соединение, а не отдаёт тело короче Content-Length.
+    """
+    try:
+        to_skip = start if response.status_code == 200 else 0
+        remaining = end - start + 1
+
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            if not chunk:
+                continue
+            if to_skip:
+                if len(chunk) <= to_skip:
+                    to_skip -= len(chunk)
+                    continue
+                chunk = chunk[to_skip:]
+                to_skip = 0
+            if len(chunk) > remaining:
+                chunk = chunk[:remaining]
+            remaining -= len(chunk)
+            yield chunk
+            if remaining <= 0:
+                break
+        if remaining > 0:
+            raise requests.ConnectionError(f"Ответ Telegram оборвался: диапазон {start}-{end}, не хватает {remaining} байт")
+    finally:
+        response.close()
+
+
+def _iter_multipart_ranges(read_range, ranges, boundary, content_type, size):
+    """Генератор тела ответа multipart/byteranges"""
+    for start, end in ranges:
+        yield multipart_part_header(boundary, content_type, start, end, size)
+        yield from read_range(start, end)
+    yield multipart_footer(boundary)
+
+
+def _is_full_range(range_header: str, file_size: int) -> bool:
+    """Запрошен ли одним диапазоном весь файл (типичный первый запрос плеера bytes=0-)"""
+    try:
+        return parse_range_header(range_header, file_size) == [(0, file_size - 1)]
+    except RangeNotSatisfiable:
+        return False
+
+
+def _build_range_response(range_header, read_range, file_size: int, content_type: str):
+    """
+    Формирует ответ 206/416 по заголовку Range
+
+    Args:
+        range_header: Значение заголовка Range (может быть None)
+        read_range: Функция (start, end) -> итератор байтов диапазона
+        file_size: Полный размер файла
+        content_type: MIME тип видео
+
+    Returns:
+        HttpResponse/StreamingHttpResponse или None, если Range нет
+        и нужно отдать файл целиком
+    """
+    try:
+        ranges = parse_range_header(range_header, file_size)
+    except RangeNotSatisfiable:
+        response = HttpResponse(status=416)
+        response['Content-Range'] = f'bytes */{file_size}'
+        response['Accept-Ranges'] = 'bytes'
+        return response
+
+    if not ranges:
+        return None
+
+    if len(ranges) == 1:
+        start, end = ranges[0]
+        response = StreamingHttpResponse(
+            read_range(start, end),
+            status=206,
+            content_type=content_type
+        )
+        response['Content-Length'] = str(end - start + 1)
+        response['Content-Range'] = format_content_range(start, end, file_size)
+    else:
+        boundary = build_multipart_boundary()
+        response = StreamingHttpResponse(
+            _iter_multipart_ranges(read_range, ranges, boundary, content_type, file_size),
+            status=206,
+            content_type=f'multipart/byteranges; boundary={boundary}'
+        )
+        response['Content-Length'] = str(
+            multipart_content_length(boundary, content_type, ranges, file_size)
+        )
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
+def _close_after(chunks, f):
+    """Отдаёт чанки и закрывает файл, когда ответ дочитан или закрыт"""
+    try:
+        yield from chunks
+    finally:
+        f.close()
+
+
+def _serve_cached_file(range_header, cached_path, content_type: str):
+    """
+    Отдаёт видео из дискового кэша (с поддержкой Range)
+
+    Файл открывается до формирования ответа: если вытеснение удалит его,
+    пока ответ отдаётся, открытый дескриптор продолжит читаться.
+
+    Returns:
+        Ответ или None, если файл успели вытеснить из кэша
+    """
+    try:
+        cached_file = open(cached_path, 'rb')
+    except FileNotFoundError:
+        return None
+
+    try:
+        file_size = os.fstat(cached_file.fileno()).st_size
+
+        range_response = _build_range_response(
+            range_header,
+            lambda start, end: iter_file_range(cached_file, start, end),
+            file_size,
+            content_type
+        )
+        if range_response is None:
+            # FileResponse использует wsgi.file_wrapper (sendfile), если он доступен, и сам закрывает файл
+            response = FileResponse(cached_file, content_type=content_type)
+        elif range_response.streaming:
+            range_response.streaming_content = _close_after(range_response.streaming_content, cached_file)
+            return range_response
+        else:
+            # 416 - тело не нужно
+            cached_file.close()
+            return range_response
+    except Exception:
+        cached_file.close()
+        raise
+
+    response['Accept-Ranges'] = 'bytes'
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
+
+def _respond_from_metadata(request, metadata):
+    """
+    Ответ, который можно дать по одним метаданным, не обращаясь к Telegram
+
+    Returns:
+        304/412 на условный запрос, заголовки на HEAD или None,
+        если нужно отдавать содержимое
+    """
+    response = get_conditional_response(
+        request,
+        etag=metadata['etag'],
+        last_modified=metadata['last_modified']
+    )
+    if response is not None:
+        response['Cache-Control'] = 'public, max-age=3600'
+        return response
+
+    if request.method == 'HEAD':
+        response = HttpResponse(content_type=metadata['content_type'])
+        response['Content-Length'] = str(metadata['content_length'])
+        response['Accept-Ranges'] = 'bytes'
+        response['Cache-Control'] = 'public, max-age=3600'
+        return apply_metadata_headers(response, metadata)
+
+    return None
+
 
 @require_http_methods(["GET", "HEAD"])
-@cache_page(60 * 60)  # Кешируем на 1 час
 def stream_telegram_video(request, article_id):
     """
     Проксирует видео из Telegram для отображения на сайте
     
+    Ответы не кэшируются целиком (это поток на десятки мегабайт) -
+    кэшируются только метаданные файла, по которым отвечаем на HEAD
+    и условные запросы, а само содержимое лежит в дисковом кэше.
+    
     Args:
         request: HTTP запрос
         article_id: UUID статьи
@@ -39,6 +273,31 @@ def stream_telegram_video(request, article_id):
             raise Http404("Видео не найдено")
         
         file_id = article.video_url
+        
+        # HEAD и условные запросы обслуживаем по метаданным
+        metadata = get_video_metadata(file_id)
+        if metadata:
+            metadata_response = _respond_from_metadata(request, metadata)
+            if metadata_response is not None:
+                return metadata_response
+        
+        # If-Range не совпал - файл изменился, Range игнорируем и отдаём целиком
+        range_header = request.META.get('HTTP_RANGE')
+        if range_header and metadata and not if_range_matches(request, metadata):
+            range_header = None
+        
+        # Повторный просмотр - отдаём с диска, не обращаясь к Telegram
+        video_cache = VideoDiskCache() if VideoDiskCache.is_enabled() else None
+        if video_cache:
+            cached_path = video_cache.get(file_id)
+            if cached_path:
+                content_type = metadata['content_type'] if metadata else 'video/mp4'
+                cached_response = _serve_cached_file(range_header, cached_path, content_type)
+                if cached_response is not None:
+                    if metadata:
+                        apply_metadata_headers(cached_response, metadata)
+                    return cached_response
+        
         # Пытаемся получить токен из разных источников
         bot_token = os.environ.get('TELEGRAM_BOT_TOKEN') or os.getenv('TELEGRAM_BOT_TOKEN')
         
@@ -47,70 +306,111 @@ def stream_telegram_video(request, article_id):
             django_logger.error(f"Доступные переменные: {list(os.environ.keys())[:10]}")
             return HttpResponse("Ошибка конфигурации сервера", status=500)
         
-        # Получаем информацию о файле через Bot API
-        file_info_url = f"https://api.telegram.org/bot{bot_token}/getFile?file_id={file_id}"
-        file_info_response = requests.get(file_info_url, timeout=10)
+        # Получаем информацию о файле через Bot API (с кэшем на время жизни ссылки)
+        file_info = resolve_telegram_file(file_id, bot_token)
         
-        if file_info_response.status_code != 200:
-            django_logger.error(f"Не удалось получить info для file_id={file_id}: {file_info_response.text}")
-            raise Http404("Видео недоступно")
-        
-        file_data = file_info_response.json()
-        
-        if not file_data.get('ok'):
-            error_desc = file_data.get('description', 'Unknown error')
-            error_code = file_data.get('error_code', 0)
-            
+        if file_info['status'] == STATUS_TOO_BIG:
             # Специальная обработка для больших файлов (не логируем как ошибку)
-            if 'file is too big' in error_desc.lower() or error_code == 400:
-                django_logger.info(f"Видео слишком большое для streaming (file_id={file_id[:20]}...), лимит Telegram Bot API 20MB")
-                return HttpResponse(
-                    "Видео слишком большое для streaming через Telegram Bot API (лимит 20MB). "
-                    "Пожалуйста, используйте прямую ссылку на видео или загрузите файл меньшего размера.",
-                    status=413,
-                    content_type='text/plain; charset=utf-8'
-                )
-            
+            django_logger.info(f"Видео слишком большое для streaming (file_id={file_id[:20]}...), лимит Telegram Bot API 20MB")
+            return HttpResponse(
+                "Видео слишком большое для streaming через Telegram Bot API (лимит 20MB). "
+                "Пожалуйста, используйте прямую ссылку на видео или загрузите файл меньшего размера.",
+                status=413,
+                content_type='text/plain; charset=utf-8'
+            )
+        
+        if file_info['status'] != STATUS_OK:
             # Для других ошибок логируем как warning
-            django_logger.warning(f"Telegram API вернул ошибку для file_id={file_id[:20]}...: {error_desc}")
+            django_logger.warning(f"Telegram API вернул ошибку для file_id={file_id[:20]}...: {file_info['description']}")
             raise Http404("Видео недоступно")
         
-        file_path = file_data['result']['file_path']
+        file_path = file_info['file_path']
+        file_size = file_info['file_size']
+        content_type = mimetypes.guess_type(file_path)[0] or 'video/mp4'
         
-        # Формируем URL для скачивания
-        video_url = f"https://api.telegram.org/file/bot{bot_token}/{file_path}"
+        if metadata is None and file_size:
+            metadata = remember_video_metadata(
+                file_id,
+                file_info['file_unique_id'],
+                file_size,
+                content_type
+            )
+            metadata_response = _respond_from_metadata(request, metadata)
+            if metadata_response is not None:
+                return metadata_response
+            if range_header and not if_range_matches(request, metadata):
+                range_header = None
+        
+        telegram = get_telegram_client(bot_token)
         
         django_logger.info(f"Проксируем видео для статьи {article_id}, file_id={file_id}")
         
+        # Запрос части файла (перемотка в плеере) - отдаём только нужные байты.
+        # Запрос всего файла (bytes=0-) идёт по обычному пути, чтобы заполнить кэш.
+        full_range = bool(file_size and range_header and _is_full_range(range_header, file_size))
+        if file_size and range_header and not full_range:
+            def read_upstream_range(start, end):
+                try:
+                    return _iter_upstream_range(telegram, file_path, start, end)
+                except requests.HTTPError:
+                    # Ссылка могла устареть раньше срока - следующий запрос заново вызовет getFile
+                    invalidate_telegram_file(file_id)
+                    raise
+            
+            # Один диапазон открывается до отправки заголовков (ошибка Telegram - 502);
+            # в multipart ошибка посреди тела обрывает соединение
+            range_response = _build_range_response(
+                range_header,
+                read_upstream_range,
+                file_size,
+                content_type
+            )
+            if range_response is not None:
+                if metadata:
+                    apply_metadata_headers(range_response, metadata)
+                return range_response
+        
         # Стримим видео
-        response = requests.get(video_url, stream=True, timeout=30)
+        response = telegram.download(file_path, stream=True)
         
         if response.status_code != 200:
             django_logger.error(f"Не удалось скачать видео: {response.status_code}")
+            # Ссылка могла устареть раньше срока - следующий запрос заново вызовет getFile
+            invalidate_telegram_file(file_id)
             raise Http404("Видео недоступно")
         
         # Определяем MIME тип
-        content_type = response.headers.get('Content-Type', 'video/mp4')
+        content_type = response.headers.get('Content-Type', content_type)
         content_length = response.headers.get('Content-Length')
         
         # Создаём streaming response
-        def file_iterator(response_obj, chunk_size=8192):
+        def file_iterator(response_obj, chunk_size=STREAM_CHUNK_SIZE):
             """Генератор для потоковой передачи данных"""
             for chunk in response_obj.iter_content(chunk_size=chunk_size):
                 if chunk:
                     yield chunk
         
+        chunks = file_iterator(response)
+        if video_cache and file_size:
+            # Первый просмотр - параллельно с отдачей сохраняем файл в кэш
+            chunks = video_cache.tee(file_id, chunks, file_size)
+        
         streaming_response = StreamingHttpResponse(
-            file_iterator(response),
+            chunks,
+            status=206 if full_range else 200,
             content_type=content_type
         )
         
         if content_length:
             streaming_response['Content-Length'] = content_length
+        if full_range:
+            streaming_response['Content-Range'] = format_content_range(0, file_size - 1, file_size)
         
         # Заголовки для корректного воспроизведения
         streaming_response['Accept-Ranges'] = 'bytes'
         streaming_response['Cache-Control'] = 'public, max-age=3600'
+        if metadata:
+            apply_metadata_headers(streaming_response, metadata)
         
         return streaming_response
         
@@ -109,6 +109,43 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Общий HTTP-клиент Telegram Bot API (core.services.telegram_api)
+TELEGRAM_API_POOL_SIZE = int(os.environ.get('TELEGRAM_API_POOL_SIZE', '20'))
+# Таймауты по методам Bot API в секундах, например {'sendMessage': 5}
+TELEGRAM_API_TIMEOUTS = {}
+# Лимиты отправки сообщений ботом: сообщений в секунду и интервал между сообщениями в один чат (секунды)
+TELEGRAM_SEND_RATE = float(os.environ.get('TELEGRAM_SEND_RATE', '30'))
+TELEGRAM_CHAT_SEND_INTERVAL = float(os.environ.get('TELEGRAM_CHAT_SEND_INTERVAL', '1'))
+# Сколько подписчиков уведомлять о заявке параллельно (contacts.services.telegram_service)
+TELEGRAM_SEND_WORKERS = int(os.environ.get('TELEGRAM_SEND_WORKERS', '10'))
+# Попыток разослать заявку с сайта, прежде чем она станет 'failed' (contacts.services.lead_outbox)
+LEAD_DELIVERY_MAX_ATTEMPTS = int(os.environ.get('LEAD_DELIVERY_MAX_ATTEMPTS', '10'))
+# Где хранить подписчиков бота: 'db' (contacts.Subscriber) или 'file' (data/telegram_subscribers.json)
+TELEGRAM_SUBSCRIBERS_BACKEND = os.environ.get('TELEGRAM_SUBSCRIBERS_BACKEND', 'db')
+# Сколько файлов медиа-группы качать параллельно при импорте (articles.services.telegram_media)
+TELEGRAM_MEDIA_FETCH_WORKERS = int(os.environ.get('TELEGRAM_MEDIA_FETCH_WORKERS', '10'))
+
+# Webhook Telegram (contacts.views.telegram_webhook): секрет из setWebhook secret_token
+TELEGRAM_WEBHOOK_SECRET = os.environ.get('TELEGRAM_WEBHOOK_SECRET', '')
+# Попыток обработать update из очереди, прежде чем он уйдёт в dead (contacts.services.update_queue)
+TELEGRAM_UPDATE_MAX_ATTEMPTS = int(os.environ.get('TELEGRAM_UPDATE_MAX_ATTEMPTS', '5'))
+# Сколько дней хранить обработанные (done) и отложенные (dead) update
+TELEGRAM_UPDATE_DONE_RETENTION_DAYS = int(os.environ.get('TELEGRAM_UPDATE_DONE_RETENTION_DAYS', '3'))
+TELEGRAM_UPDATE_DEAD_RETENTION_DAYS = int(os.environ.get('TELEGRAM_UPDATE_DEAD_RETENTION_DAYS', '30'))
+
+# Дисковый кэш видео, проксируемых из Telegram (articles.services.video_cache)
+TELEGRAM_VIDEO_CACHE_ENABLED = os.environ.get('TELEGRAM_VIDEO_CACHE_ENABLED', 'True') == 'True'
+TELEGRAM_VIDEO_CACHE_DIR = Path(os.environ.get('TELEGRAM_VIDEO_CACHE_DIR', str(MEDIA_ROOT / 'video_cache')))
+TELEGRAM_VIDEO_CACHE_MAX_SIZE = int(os.environ.get('TELEGRAM_VIDEO_CACHE_MAX_SIZE', str(2 * 1024 ** 3)))  # 2 ГБ
+
+# PID демона скачивания видео (download_pending_videos --daemon) - по нему боты его будят
+TELETHON_WORKER_PIDFILE = Path(os.environ.get('TELETHON_WORKER_PIDFILE', str(BASE_DIR / 'telethon_worker' / 'worker.pid')))
+
+# Обработка скачанных видео (articles.services.video_processing)
+FFMPEG_BINARY = os.environ.get('FFMPEG_BINARY', 'ffmpeg')
+VIDEO_HLS_ENABLED = os.environ.get('VIDEO_HLS_ENABLED', 'True') == 'True'
+VIDEO_PREVIEW_CLIP_ENABLED = os.environ.get('VIDEO_PREVIEW_CLIP_ENABLED', 'True') == 'True'
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
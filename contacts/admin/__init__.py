@@ -0,0 +1,8 @@
+"""
+Админка contacts приложения
+"""
+from .telegram_update_admin import TelegramUpdateAdmin
+from .lead_admin import LeadAdmin
+from .subscriber_admin import SubscriberAdmin
+
+__all__ = ['TelegramUpdateAdmin', 'LeadAdmin', 'SubscriberAdmin']
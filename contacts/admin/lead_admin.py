@@ -0,0 +1,39 @@
+"""
+Админка для заявок с сайта (outbox)
+"""
+from django.contrib import admin
+from contacts.models import Lead, LeadDelivery
+
+
+class LeadDeliveryInline(admin.TabularInline):
+    """
+    Доставка заявки каждому подписчику
+    """
+    model = LeadDelivery
+    extra = 0
+    can_delete = False
+    fields = ['chat_id', 'status', 'attempts', 'sent_at']
+    readonly_fields = ['chat_id', 'status', 'attempts', 'sent_at']
+
+
+@admin.register(Lead)
+class LeadAdmin(admin.ModelAdmin):
+    """
+    Заявки с контактной формы и статус их рассылки в Telegram.
+    Позволяет повторно разослать недоставленные заявки.
+    """
+    list_display = ['name', 'phone', 'status', 'attempts', 'created_at', 'delivered_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['name', 'phone', 'email', 'message']
+    readonly_fields = ['id', 'status', 'attempts', 'next_attempt_at', 'last_error', 'delivered_at', 'created_at', 'updated_at']
+    inlines = [LeadDeliveryInline]
+    
+    actions = ['resend']
+    
+    def resend(self, request, queryset):
+        """Повторить рассылку недоставленных заявок (доставленным подписчикам повторно не уходит)"""
+        updated = queryset.filter(status=Lead.STATUS_FAILED).update(
+            status=Lead.STATUS_PENDING, attempts=0, next_attempt_at=None, last_error=''
+        )
+        self.message_user(request, f'Поставлено в очередь: {updated}')
+    resend.short_description = 'Повторить рассылку недоставленных'
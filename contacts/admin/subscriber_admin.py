@@ -0,0 +1,31 @@
+"""
+Админка для подписчиков на заявки
+"""
+from django.contrib import admin
+from contacts.models import Subscriber
+
+
+@admin.register(Subscriber)
+class SubscriberAdmin(admin.ModelAdmin):
+    """
+    Подписчики бота и результат последней отправки заявки.
+    Позволяет подписать и отписать выбранных.
+    """
+    list_display = ['chat_id', 'status', 'last_delivery_status', 'last_delivery_at', 'created_at']
+    list_filter = ['status', 'last_delivery_status']
+    search_fields = ['chat_id']
+    readonly_fields = ['id', 'last_delivery_at', 'last_delivery_status', 'created_at', 'updated_at']
+    
+    actions = ['activate', 'deactivate']
+    
+    def activate(self, request, queryset):
+        """Подписать выбранных"""
+        activated = Subscriber.activate(queryset.values_list('chat_id', flat=True))
+        self.message_user(request, f'Подписано: {len(activated)}')
+    activate.short_description = 'Подписать'
+    
+    def deactivate(self, request, queryset):
+        """Отписать выбранных"""
+        deactivated = Subscriber.deactivate(queryset.values_list('chat_id', flat=True))
+        self.message_user(request, f'Отписано: {len(deactivated)}')
+    deactivate.short_description = 'Отписать'
@@ -0,0 +1,25 @@
+"""
+Админка для очереди обновлений Telegram (webhook)
+"""
+from django.contrib import admin
+from contacts.models import TelegramUpdate
+
+
+@admin.register(TelegramUpdate)
+class TelegramUpdateAdmin(admin.ModelAdmin):
+    """
+    Просмотр обновлений, полученных через webhook и getUpdates.
+    Позволяет повторно поставить в очередь обновления с исчерпанными попытками.
+    """
+    list_display = ['update_id', 'update_type', 'status', 'attempts', 'next_attempt_at', 'created_at', 'processed_at']
+    list_filter = ['status', 'created_at']
+    search_fields = ['update_id']
+    readonly_fields = ['id', 'update_id', 'payload', 'attempts', 'next_attempt_at', 'error', 'created_at', 'updated_at', 'processed_at']
+    
+    actions = ['requeue']
+    
+    def requeue(self, request, queryset):
+        """Поставить обновления в очередь повторно"""
+        updated = queryset.update(status=TelegramUpdate.STATUS_PENDING, attempts=0, next_attempt_at=None, error='')
+        self.message_user(request, f'Поставлено в очередь: {updated}')
+    requeue.short_description = 'Обработать повторно'
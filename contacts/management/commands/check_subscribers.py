@@ -3,7 +3,8 @@ Management команда для проверки подписчиков Telegra
 """
 from django.core.management.base import BaseCommand
 from loguru import logger
-from contacts.utils import SubscribersManager
+from contacts.models import Subscriber
+from contacts.utils import SubscribersManager, DatabaseSubscribersManager, get_subscribers_manager
 from pathlib import Path
 
 
@@ -17,14 +18,16 @@ class Command(BaseCommand):
         """
         Основной метод команды
         """
-        subscribers_manager = SubscribersManager()
+        subscribers_manager = get_subscribers_manager()
         
         self.stdout.write('=' * 60)
         self.stdout.write(self.style.SUCCESS('Проверка подписчиков Telegram бота'))
         self.stdout.write('=' * 60)
         
-        # Информация о файле
-        subscribers_file = subscribers_manager.subscribers_file
+        self.stdout.write(f'\nХранилище подписчиков: {subscribers_manager.location}')
+        
+        # Информация о файле (в режиме базы - чтобы не забыть перенести старый файл)
+        subscribers_file = SubscribersManager().subscribers_file
         self.stdout.write(f'\nФайл подписчиков: {subscribers_file}')
         self.stdout.write(f'Файл существует: {subscribers_file.exists()}')
         
@@ -34,6 +37,16 @@ class Command(BaseCommand):
                 self.stdout.write(f'Размер файла: {file_size} байт')
             except Exception as e:
                 self.stdout.write(self.style.ERROR(f'Ошибка при получении размера файла: {e}'))
+            
+            if isinstance(subscribers_manager, DatabaseSubscribersManager):
+                not_imported = SubscribersManager().get_subscribers() - set(
+                    Subscriber.objects.values_list('chat_id', flat=True)
+                )
+                if not_imported:
+                    self.stdout.write(self.style.WARNING(
+                        f'Подписчиков из файла нет в базе: {len(not_imported)}. '
+                        f'Перенесите их: python manage.py import_subscribers'
+                    ))
         
         # Список подписчиков
         subscribers = subscribers_manager.get_subscribers()
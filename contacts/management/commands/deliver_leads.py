@@ -0,0 +1,54 @@
+"""
+Management команда для рассылки заявок с сайта подписчикам (outbox)
+"""
+from django.core.management.base import BaseCommand
+from loguru import logger
+
+from contacts.models import Lead
+from contacts.services.lead_outbox import LeadOutbox, DEFAULT_LEAD_POLL_INTERVAL
+
+
+class Command(BaseCommand):
+    """
+    Рассылает заявки, сохранённые формой контактов
+    
+    Обычно заявки рассылает поток в run_unified_bot; команда нужна,
+    если бот запущен с --no-lead-outbox или не запущен вовсе.
+    
+    Использование:
+        # Постоянно (как демон)
+        python manage.py deliver_leads
+        
+        # Один проход (для cron)
+        python manage.py deliver_leads --once
+    """
+    help = 'Рассылает заявки с сайта подписчикам Telegram с повторами'
+    
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды"""
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Разослать заявки, которые пора отправить, и выйти',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=DEFAULT_LEAD_POLL_INTERVAL,
+            help=f'Пауза между проверками outbox в секундах (по умолчанию {DEFAULT_LEAD_POLL_INTERVAL})',
+        )
+    
+    def handle(self, *args, **options):
+        """Основной метод команды"""
+        outbox = LeadOutbox(poll_interval=options['interval'])
+        
+        pending = Lead.objects.filter(status__in=[Lead.STATUS_PENDING, Lead.STATUS_SENDING]).count()
+        logger.info(f'📨 Заявок в outbox: {pending}')
+        
+        if options['once']:
+            processed = outbox.deliver_pending()
+            logger.info(f'Обработано заявок: {processed}')
+            return
+        
+        logger.info('Для остановки: Ctrl+C')
+        outbox.run_forever()
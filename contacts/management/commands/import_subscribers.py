@@ -0,0 +1,73 @@
+"""
+Management команда для переноса подписчиков из JSON файла в базу
+"""
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from loguru import logger
+
+from contacts.models import Subscriber
+from contacts.utils import SubscribersManager
+
+
+class Command(BaseCommand):
+    """
+    Переносит подписчиков из data/telegram_subscribers.json в contacts.Subscriber
+    
+    Повторный запуск безопасен: уже перенесённые chat_id не дублируются,
+    отписанные в базе подписываются снова только с --reactivate.
+    
+    Использование:
+        python manage.py import_subscribers
+        python manage.py import_subscribers --file /path/to/telegram_subscribers.json
+        python manage.py import_subscribers --dry-run
+    """
+    help = 'Переносит подписчиков Telegram бота из JSON файла в базу данных'
+    
+    def add_arguments(self, parser):
+        """Добавляет аргументы команды"""
+        parser.add_argument(
+            '--file',
+            type=str,
+            help='JSON файл подписчиков (по умолчанию TELEGRAM_SUBSCRIBERS_FILE или data/telegram_subscribers.json)',
+        )
+        parser.add_argument(
+            '--reactivate',
+            action='store_true',
+            help='Подписать снова тех, кто отписан в базе',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, что будет перенесено',
+        )
+    
+    def handle(self, *args, **options):
+        """Основной метод команды"""
+        subscribers_file = Path(options['file']) if options['file'] else SubscribersManager().subscribers_file
+        if not subscribers_file.exists():
+            raise CommandError(f'Файл подписчиков не найден: {subscribers_file}')
+        
+        try:
+            with open(subscribers_file, 'r', encoding='utf-8') as f:
+                chat_ids = {str(chat_id) for chat_id in json.load(f).get('subscribers', [])}
+        except (OSError, ValueError) as e:
+            raise CommandError(f'Ошибка чтения файла {subscribers_file}: {e}')
+        
+        known = dict(Subscriber.objects.filter(chat_id__in=chat_ids).values_list('chat_id', 'status'))
+        new = chat_ids - set(known)
+        inactive = {chat_id for chat_id, status in known.items() if status != Subscriber.STATUS_ACTIVE}
+        
+        logger.info(f'📄 Файл: {subscribers_file}')
+        logger.info(f'   Подписчиков в файле: {len(chat_ids)}')
+        logger.info(f'   Новых для базы: {len(new)}')
+        logger.info(f'   Уже в базе: {len(known)} (из них отписаны: {len(inactive)})')
+        
+        if options['dry_run']:
+            logger.info('🧪 Тестовый режим - ничего не сохранено')
+            return
+        
+        to_activate = new | inactive if options['reactivate'] else new
+        activated = Subscriber.activate(to_activate)
+        logger.info(f'✅ Перенесено подписчиков: {len(activated)}. Активных в базе: {Subscriber.objects.filter(status=Subscriber.STATUS_ACTIVE).count()}')
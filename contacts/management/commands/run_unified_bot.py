@@ -8,20 +8,36 @@
 import os
 import sys
 import time
+import asyncio
 from datetime import datetime
-from io import BytesIO
-from collections import defaultdict
 
 from django.core.management.base import BaseCommand
-from django.core.files.uploadedfile import InMemoryUploadedFile
+from django.db import IntegrityError
 from django.utils.text import slugify
 from django.utils import timezone
 from loguru import logger
 import requests
 import html
 
-from contacts.utils import SubscribersManager
+from core.services import get_telegram_client
+from contacts.utils import get_subscribers_manager, MediaGroupAggregator
+from contacts.models import TelegramUpdate, TelegramPollingOffset
+from contacts.services.bot_engine import (
+    AsyncBotEngine,
+    DEFAULT_USER_WORKERS,
+    DEFAULT_INGEST_WORKERS,
+    DEFAULT_INGEST_QUEUE_SIZE,
+)
+from contacts.services.update_queue import UpdateQueueWorkers, DEFAULT_QUEUE_WORKERS
+from contacts.services.lead_outbox import LeadOutbox
 from articles.models import Article, ArticleImage, TelegramSync
+from articles.services import notify_video_worker, fetch_telegram_media
+from articles.services.bulk_import import (
+    allocate_article_slugs,
+    store_media_files,
+    delete_media_files,
+    bulk_create_articles,
+)
 
 
 class Command(BaseCommand):
@@ -30,6 +46,7 @@ class Command(BaseCommand):
     
     Функции:
     - Обрабатывает команды пользователей (/start, /stop, /help)
+    - Рассылает заявки с сайта подписчикам (outbox, отдельный поток)
     - Автоматически собирает новости из указанного канала
     - Поддерживает медиа-группы (несколько фото в одном посте)
     - Сохраняет прогресс синхронизации
@@ -43,6 +60,16 @@ class Command(BaseCommand):
         
         # С автопубликацией новостей
         python manage.py run_unified_bot --channel @your_channel --auto-publish
+        
+        # Асинхронный движок: команды отвечают сразу, даже пока импортируется пост
+        python manage.py run_unified_bot --channel @your_channel --async
+        
+        # Обработка обновлений, принятых webhook (см. set_telegram_webhook)
+        python manage.py run_unified_bot --channel @your_channel --source webhook
+        
+        # Приём и обработка в разных процессах
+        python manage.py run_unified_bot --channel @your_channel --queue-workers 0
+        python manage.py run_unified_bot --channel @your_channel --source queue --queue-workers 2
     """
     help = 'Unified Telegram bot: leads + news from channel'
     
@@ -64,21 +91,62 @@ class Command(BaseCommand):
             action='store_true',
             help='Автоматически публиковать новости (по умолчанию черновики)',
         )
+        parser.add_argument(
+            '--source',
+            choices=['polling', 'webhook', 'queue'],
+            default='polling',
+            help='Откуда брать обновления: getUpdates (polling) или только очередь в базе (webhook, queue)',
+        )
+        parser.add_argument(
+            '--queue-workers',
+            type=int,
+            default=DEFAULT_QUEUE_WORKERS,
+            help=f'Потоков, обрабатывающих очередь обновлений (по умолчанию {DEFAULT_QUEUE_WORKERS} - сохраняет порядок; '
+                 f'0 с polling - только приём)',
+        )
+        parser.add_argument(
+            '--async',
+            action='store_true',
+            dest='use_async',
+            help='Асинхронный движок: непрерывный polling и отдельные пулы для команд и постов канала',
+        )
+        parser.add_argument(
+            '--user-workers',
+            type=int,
+            default=DEFAULT_USER_WORKERS,
+            help=f'Потоков для команд пользователей в --async (по умолчанию {DEFAULT_USER_WORKERS})',
+        )
+        parser.add_argument(
+            '--ingest-workers',
+            type=int,
+            default=DEFAULT_INGEST_WORKERS,
+            help=f'Потоков для постов канала в --async (по умолчанию {DEFAULT_INGEST_WORKERS} - сохраняет порядок)',
+        )
+        parser.add_argument(
+            '--ingest-queue-size',
+            type=int,
+            default=DEFAULT_INGEST_QUEUE_SIZE,
+            help=f'Сколько постов пул --async держит взятыми из очереди (по умолчанию {DEFAULT_INGEST_QUEUE_SIZE})',
+        )
+        parser.add_argument(
+            '--no-lead-outbox',
+            action='store_true',
+            help='Не рассылать заявки с сайта в этом процессе (их рассылает deliver_leads)',
+        )
     
     def __init__(self):
         super().__init__()
-        self.subscribers_manager = SubscribersManager()
-        self.media_groups = defaultdict(list)  # Группировка медиа по media_group_id
-        self.processed_media_groups = set()  # Обработанные группы
+        self.subscribers_manager = get_subscribers_manager()
+        self.media_groups = MediaGroupAggregator()  # Сборка альбомов по media_group_id
+        self.unfinished_handlers = 0  # Обработчики async-движка, не завершившиеся при остановке
     
     def handle(self, *args, **options):
         """Основной метод команды"""
         token = os.environ.get('TELEGRAM_BOT_TOKEN', '8389210453:AAE0pUO2PflNa8UWqXWRN-SEnf8LvplsdrA')
-        api_url = f'https://api.telegram.org/bot{token}'
+        self.telegram = get_telegram_client(token)
         timeout = options['timeout']
         channel_id = options.get('channel') or os.environ.get('TELEGRAM_NEWS_CHANNEL')
         auto_publish = options['auto_publish']
-        offset = 0
         
         # Режим работы
         news_mode = bool(channel_id)
@@ -91,7 +159,7 @@ class Command(BaseCommand):
         
         # Проверяем подключение к боту
         try:
-            response = requests.get(f'{api_url}/getMe', timeout=10)
+            response = self.telegram.get('getMe')
             response.raise_for_status()
             bot_info = response.json()
             
@@ -125,17 +193,13 @@ class Command(BaseCommand):
                 logger.info(f'   ID последнего сообщения: {sync.last_message_id}')
             else:
                 logger.info('   Это первый запуск для этого канала')
-            
-            if sync.last_update_id:
-                offset = sync.last_update_id + 1
-                logger.info(f'   ♻️  Продолжаем с update_id: {offset}')
         else:
             sync = None
         
         # Подписчики на заявки
         logger.info('')
         logger.info('👥 ПОДПИСЧИКИ НА ЗАЯВКИ:')
-        logger.info(f'   Файл: {self.subscribers_manager.subscribers_file}')
+        logger.info(f'   Хранилище: {self.subscribers_manager.location}')
         logger.info(f'   Количество: {self.subscribers_manager.get_count()}')
         
         current_subscribers = self.subscribers_manager.get_subscribers()
@@ -152,7 +216,77 @@ class Command(BaseCommand):
         logger.info('Для остановки: Ctrl+C')
         logger.info('')
         
+        lead_outbox = None
+        if not options['no_lead_outbox']:
+            lead_outbox = LeadOutbox()
+            lead_outbox.start()
+        
+        try:
+            self._serve(options, channel_id if news_mode else None, auto_publish, sync)
+        finally:
+            if lead_outbox is not None:
+                lead_outbox.stop()
+        if self.unfinished_handlers:
+            # Потоки пулов не демоны: интерпретатор ждал бы зависший обработчик
+            # при выходе. Его обновление вернёт в очередь requeue_stale
+            logger.warning('Выход без ожидания зависших обработчиков')
+            os._exit(1)
+    
+    def _serve(self, options: dict, channel_id, auto_publish: bool, sync):
+        """
+        Получает и обрабатывает обновления до остановки
+        
+        Args:
+            options: Опции команды
+            channel_id: Канал новостей (None - режим только заявок)
+            auto_publish: Автоматически публиковать новости
+            sync: Объект синхронизации канала
+        """
+        news_mode = bool(channel_id)
+        timeout = options['timeout']
+        
+        queue_workers = self._make_queue_workers(channel_id, auto_publish, sync, options['queue_workers'])
+        
+        if options['source'] in ('webhook', 'queue'):
+            logger.info('📬 Источник обновлений: очередь в базе')
+            queue_workers.run_forever()
+            return
+        
+        # update сначала записывается в очередь, потом сдвигается offset;
+        # offset хранится отдельно от очереди (TelegramPollingOffset)
+        offset = TelegramPollingOffset.get_offset(self.telegram.bot_id)
+        if offset:
+            logger.info(f'♻️  Продолжаем с update_id: {offset}')
+        
+        if options['use_async']:
+            allowed_updates = ['message']
+            if news_mode:
+                allowed_updates.append('channel_post')
+            
+            def handle_channel_post(update_id, post):
+                self._handle_channel_post(post, channel_id, auto_publish, sync, update_id)
+            
+            engine = AsyncBotEngine(
+                self.telegram,
+                handle_message=self._handle_user_message,
+                handle_channel_post=handle_channel_post if news_mode else None,
+                poll_timeout=timeout,
+                allowed_updates=allowed_updates,
+                user_workers=options['user_workers'],
+                ingest_workers=options['ingest_workers'],
+                ingest_queue_size=options['ingest_queue_size'],
+                ingest_tick=lambda: self._flush_media_groups(auto_publish, sync),
+            )
+            asyncio.run(engine.run(offset))
+            self.unfinished_handlers = engine.unfinished
+            return
+        
         # Основной цикл polling
+        if options['queue_workers'] > 0:
+            queue_workers.start()
+        else:
+            logger.info('📥 Только приём: очередь обрабатывает run_unified_bot --source queue')
+        
         try:
             while True:
                 try:
@@ -160,16 +294,14 @@ class Command(BaseCommand):
                     allowed_updates = ['message']
                     if news_mode:
                         allowed_updates.append('channel_post')
-                        logger.info(f'📢 Режим новостей активен, канал: {channel_id}')
                     
-                    response = requests.get(
-                        f'{api_url}/getUpdates',
+                    response = self.telegram.get(
+                        'getUpdates',
                         params={
                             'offset': offset,
                             'timeout': timeout,
                             'allowed_updates': allowed_updates
-                        },
-                        timeout=timeout + 10
+                        }
                     )
                     response.raise_for_status()
                     
@@ -182,34 +314,13 @@ class Command(BaseCommand):
                     
                     updates = data.get('result', [])
                     
-                    if updates and news_mode:
+                    if updates:
                         logger.debug(f'📥 Получено обновлений: {len(updates)}')
-                    
-                    for update in updates:
-                        try:
-                            # ОБРАБОТКА СООБЩЕНИЙ ОТ ПОЛЬЗОВАТЕЛЕЙ
-                            if 'message' in update:
-                                self._handle_user_message(api_url, update['message'])
-                            
-                            # ОБРАБОТКА ПОСТОВ ИЗ КАНАЛА
-                            if news_mode and 'channel_post' in update:
-                                logger.info(f'📢 Получен channel_post, обрабатываю...')
-                                self._handle_channel_post(
-                                    api_url,
-                                    update['channel_post'],
-                                    channel_id,
-                                    auto_publish,
-                                    sync,
-                                    update['update_id']
-                                )
-                        except Exception as e:
-                            logger.error(f'Ошибка при обработке update {update.get("update_id")}: {e}')
-                            logger.exception(e)
-                        finally:
-                            offset = update['update_id'] + 1
-                    
-                    # Задержка если нет обновлений
-                    if not updates:
+                        # Если запись не удалась, offset не сдвигается и Telegram пришлёт их снова
+                        offset = TelegramUpdate.receive(self.telegram.bot_id, updates)
+                        queue_workers.wake()
+                    else:
+                        # Задержка если нет обновлений
                         time.sleep(1)
                     
                 except requests.exceptions.Timeout:
@@ -231,13 +342,55 @@ class Command(BaseCommand):
         except Exception as e:
             logger.error(f'Критическая ошибка: {e}')
             sys.exit(1)
+        finally:
+            queue_workers.stop()
     
-    def _handle_user_message(self, api_url: str, message: dict):
+    def _dispatch_update(self, update: dict, channel_id, auto_publish: bool, sync):
+        """
+        Передаёт update нужному обработчику
+        
+        Args:
+            update: Объект update от Telegram
+            channel_id: Канал новостей (None - режим только заявок)
+            auto_publish: Автоматически публиковать новости
+            sync: Объект синхронизации канала
+        """
+        # ОБРАБОТКА СООБЩЕНИЙ ОТ ПОЛЬЗОВАТЕЛЕЙ
+        if 'message' in update:
+            self._handle_user_message(update['message'])
+        
+        # ОБРАБОТКА ПОСТОВ ИЗ КАНАЛА
+        if channel_id and 'channel_post' in update:
+            logger.info(f'📢 Получен channel_post, обрабатываю...')
+            self._handle_channel_post(
+                update['channel_post'],
+                channel_id,
+                auto_publish,
+                sync,
+                update['update_id']
+            )
+    
+    def _make_queue_workers(self, channel_id, auto_publish: bool, sync, workers: int) -> UpdateQueueWorkers:
+        """
+        Пул обработчиков очереди TelegramUpdate (обновления от webhook и поллера)
+        
+        Args:
+            channel_id: Канал новостей (None - режим только заявок)
+            auto_publish: Автоматически публиковать новости
+            sync: Объект синхронизации канала
+            workers: Количество потоков
+        """
+        return UpdateQueueWorkers(
+            lambda update: self._dispatch_update(update, channel_id, auto_publish, sync),
+            workers=workers,
+            idle_tick=lambda: self._flush_media_groups(auto_publish, sync),
+        )
+    
+    def _handle_user_message(self, message: dict):
         """
         Обрабатывает сообщения от пользователей (команды /start, /help и т.д.)
         
         Args:
-            api_url: URL API бота
             message: Объект сообщения от Telegram
         """
         chat_id = message['chat']['id']
@@ -257,7 +410,6 @@ class Command(BaseCommand):
             
             if is_new:
                 self._send_message(
-                    api_url,
                     chat_id,
                     '✅ Вы успешно подписаны на уведомления о заявках!\n\n'
                     'Теперь все заявки с сайта Avto-Декор будут приходить в этот чат.\n\n'
@@ -268,7 +420,6 @@ class Command(BaseCommand):
                 logger.info(f'   ✅ Новый подписчик: {chat_id_str}. Всего: {current_count}')
             else:
                 self._send_message(
-                    api_url,
                     chat_id,
                     'Вы уже подписаны на уведомления о заявках.\n\n'
                     f'Ваш chat_id: <code>{chat_id}</code>\n'
@@ -281,21 +432,19 @@ class Command(BaseCommand):
             
             if removed:
                 self._send_message(
-                    api_url,
                     chat_id,
                     '❌ Вы отписаны от уведомлений о заявках.\n\n'
                     'Чтобы снова получать уведомления, отправьте /start'
                 )
                 logger.info(f'📨 Подписчик удален: {chat_id_str}')
             else:
-                self._send_message(api_url, chat_id, 'Вы не были подписаны на уведомления.')
+                self._send_message(chat_id, 'Вы не были подписаны на уведомления.')
         
         elif text.startswith('/help'):
             is_subscribed = self.subscribers_manager.is_subscribed(chat_id_str)
             status = '✅ подписаны' if is_subscribed else '❌ не подписаны'
             
             self._send_message(
-                api_url,
                 chat_id,
                 '🤖 Универсальный бот Avto-Декор\n\n'
                 f'Ваш статус: {status}\n\n'
@@ -309,7 +458,6 @@ class Command(BaseCommand):
         
         elif text.startswith('/chat_id'):
             self._send_message(
-                api_url,
                 chat_id,
                 f'Ваш chat_id: <code>{chat_id}</code>\n\n'
                 'Этот ID используется для отправки вам уведомлений.',
@@ -326,7 +474,6 @@ class Command(BaseCommand):
                 status_text = '❌ Вы не подписаны\n\nОтправьте /start для подписки'
             
             self._send_message(
-                api_url,
                 chat_id,
                 f'{status_text}\n\n'
                 f'Всего подписчиков: {total_subscribers}\n'
@@ -340,14 +487,12 @@ class Command(BaseCommand):
             
             if is_subscribed:
                 self._send_message(
-                    api_url,
                     chat_id,
                     'Сообщение получено. Вы подписаны на уведомления о заявках.\n\n'
                     'Используйте /help для списка команд.'
                 )
             else:
                 self._send_message(
-                    api_url,
                     chat_id,
                     'Сообщение получено.\n\n'
                     'Чтобы получать уведомления о заявках, отправьте /start'
@@ -355,7 +500,6 @@ class Command(BaseCommand):
     
     def _handle_channel_post(
         self,
-        api_url: str,
         post: dict,
         channel_id: str,
         auto_publish: bool,
@@ -366,7 +510,6 @@ class Command(BaseCommand):
         Обрабатывает посты из канала и создаёт новости
         
         Args:
-            api_url: URL API бота
             post: Объект поста из канала
             channel_id: ID канала для фильтрации
             auto_publish: Автоматически публиковать новости
@@ -374,15 +517,8 @@ class Command(BaseCommand):
             update_id: ID обновления
         """
         post_channel_id = post.get('chat', {}).get('id')
-        message_id = post.get('message_id')
         media_group_id = post.get('media_group_id')
         
-        # Получаем дату поста
-        post_timestamp = post.get('date')
-        post_date = None
-        if post_timestamp:
-            post_date = timezone.make_aware(datetime.fromtimestamp(post_timestamp))
-        
         # Проверяем, что пост из нужного канала
         channel_username = post.get('chat', {}).get('username', '')
         channel_title = post.get('chat', {}).get('title', '')
@@ -408,93 +544,119 @@ class Command(BaseCommand):
         
         logger.info(f'✅ Пост из нужного канала: {channel_title or channel_username or post_channel_id}')
         
-        # Проверяем, обрабатывали ли уже этот пост
-        if not sync.should_process_message(message_id, post_date):
-            return
+        # Без проверки по last_message_id: повтор из очереди приходит, когда
+        # более поздние посты уже сдвинули его. Дубликаты отсекает поиск
+        # по источнику (Article.get_telegram_source) в _import_channel_posts,
+        # а last_message_id сдвигается только после успешного импорта.
         
-        # МЕДИА-ГРУППА: собираем все фото и видео из группы
+        # МЕДИА-ГРУППА: копим элементы, статья создаётся, когда группа собрана
         if media_group_id:
-            # Добавляем в группу
-            self.media_groups[media_group_id].append(post)
-            
-            # Даём время собрать все медиа из группы (ждём 2 секунды)
-            # Если группа уже обработана - пропускаем
-            if media_group_id in self.processed_media_groups:
-                return
-            
-            # Помечаем как обработанную
-            self.processed_media_groups.add(media_group_id)
-            
-            # Ждём немного, чтобы собрать все сообщения из группы
-            time.sleep(2)
-            
-            # Объединяем все сообщения из группы
-            group_messages = self.media_groups[media_group_id]
-            
-            # Берём первое сообщение как основу
-            base_post = group_messages[0]
-            text = base_post.get('text') or base_post.get('caption', '')
-            
-            # Собираем все фото
-            all_photos = []
-            # Собираем все видео
-            all_videos = []
-            for msg in group_messages:
-                if 'photo' in msg:
-                    photo = max(msg['photo'], key=lambda x: x.get('file_size', 0))
-                    all_photos.append(photo)
-                if 'video' in msg:
-                    all_videos.append({
-                        'video': msg['video'],
-                        'message_id': msg.get('message_id'),
-                        'caption': msg.get('caption', '')
-                    })
-                # Проверяем video_note (кружки/stories)
-                if 'video_note' in msg:
-                    all_videos.append({
-                        'video': msg['video_note'],  # Используем video_note как video
-                        'message_id': msg.get('message_id'),
-                        'caption': msg.get('caption', ''),
-                        'is_video_note': True  # Помечаем, что это кружок
-                    })
-                # Берём текст из первого сообщения с текстом
-                if not text:
-                    text = msg.get('text') or msg.get('caption', '')
-            
-            photos = all_photos
-            videos = all_videos
-            logger.info(f'📷 Медиа-группа: {len(photos)} фото, {len(videos)} видео')
+            for group in self.media_groups.add(post, update_id):
+                self._import_media_group(group, auto_publish, sync)
+            return
         
-        else:
-            # Обычный пост (одно фото или без фото)
-            text = post.get('text') or post.get('caption', '')
-            photos = []
-            videos = []
-            
-            if 'photo' in post:
-                photo = max(post['photo'], key=lambda x: x.get('file_size', 0))
+        self._import_channel_posts([post], auto_publish, sync, update_id)
+    
+    def _flush_media_groups(self, auto_publish: bool, sync: TelegramSync):
+        """
+        Импортирует медиа-группы, в которые больше не приходят элементы
+        
+        Args:
+            auto_publish: Автоматически публиковать новости
+            sync: Объект синхронизации
+        """
+        if sync is None:
+            return
+        for group in self.media_groups.pop_ready():
+            self._import_media_group(group, auto_publish, sync)
+    
+    def _import_media_group(self, group, auto_publish: bool, sync: TelegramSync):
+        """
+        Создаёт статью из собранной медиа-группы
+        
+        Группа считается импортированной только после успешного импорта;
+        при ошибке она возвращается в буфер и импортируется повторно,
+        пока не исчерпаны попытки.
+        """
+        logger.info(f'📎 Медиа-группа {group.media_group_id} собрана: {len(group.items)} элем.')
+        try:
+            self._import_channel_posts(group.posts, auto_publish, sync, group.last_update_id)
+        except Exception as e:
+            delay = self.media_groups.release(group)
+            logger.error(f'Ошибка при импорте медиа-группы {group.media_group_id}: {e}')
+            logger.exception(e)
+            if delay is None:
+                message_ids = [post.get('message_id') for post in group.posts]
+                logger.error(
+                    f'☠️  Медиа-группа {group.media_group_id} отброшена после {group.attempts} попыток, '
+                    f'сообщения: {message_ids}'
+                )
+            else:
+                logger.info(f'🔁 Медиа-группа {group.media_group_id}: повтор через {delay} сек.')
+            return
+        self.media_groups.complete(group)
+    
+    def _import_channel_posts(
+        self,
+        posts: list,
+        auto_publish: bool,
+        sync: TelegramSync,
+        update_id: int
+    ):
+        """
+        Создаёт статью из поста или из всех постов медиа-группы
+        
+        Args:
+            posts: Посты (один пост или элементы медиа-группы по порядку)
+            auto_publish: Автоматически публиковать новости
+            sync: Объект синхронизации
+            update_id: ID последнего обновления
+        """
+        # Берём первое сообщение как основу
+        post = posts[0]
+        message_id = post.get('message_id')
+        last_message_id = max(msg.get('message_id') or 0 for msg in posts)
+        
+        post_timestamp = post.get('date')
+        post_date = None
+        if post_timestamp:
+            post_date = timezone.make_aware(datetime.fromtimestamp(post_timestamp))
+        
+        text = post.get('text') or post.get('caption', '')
+        
+        # Собираем все фото
+        photos = []
+        # Собираем все видео
+        videos = []
+        for msg in posts:
+            if 'photo' in msg:
+                photo = max(msg['photo'], key=lambda x: x.get('file_size', 0))
                 photos.append(photo)
-            
-            if 'video' in post:
+            if 'video' in msg:
                 videos.append({
-                    'video': post['video'],
-                    'message_id': message_id,
-                    'caption': post.get('caption', '')
+                    'video': msg['video'],
+                    'message_id': msg.get('message_id'),
+                    'caption': msg.get('caption', '')
                 })
-            
             # Проверяем video_note (кружки/stories)
-            if 'video_note' in post:
+            if 'video_note' in msg:
                 videos.append({
-                    'video': post['video_note'],  # Используем video_note как video
-                    'message_id': message_id,
-                    'caption': post.get('caption', ''),
+                    'video': msg['video_note'],  # Используем video_note как video
+                    'message_id': msg.get('message_id'),
+                    'caption': msg.get('caption', ''),
                     'is_video_note': True  # Помечаем, что это кружок
                 })
+            # Берём текст из первого сообщения с текстом
+            if not text:
+                text = msg.get('text') or msg.get('caption', '')
+        
+        if len(posts) > 1:
+            logger.info(f'📷 Медиа-группа: {len(photos)} фото, {len(videos)} видео')
         
         # Если нет текста И нет фото И нет видео - пропускаем
         if not text and not photos and not videos:
             logger.warning(f'⏭️  Пост #{message_id}: нет текста, фото и видео, пропускаем')
-            sync.update_last_message(message_id, post_date, update_id)
+            sync.update_last_message(last_message_id, post_date, update_id)
             return
         
         # Парсим текст или создаём заголовок из даты
@@ -533,10 +695,19 @@ class Command(BaseCommand):
                 title = f"Пост от {date_obj.strftime('%d.%m.%Y %H:%M:%S')}{msg_id_suffix}"
                 content = f"Пост, добавленный {date_obj.strftime('%d.%m.%Y в %H:%M:%S')}"
         
-        # Проверяем дубликат
-        if Article.objects.filter(title=title).exists():
-            logger.info(f'⏭️  Пост #{message_id}: "{title[:40]}..." уже существует')
-            sync.update_last_message(message_id, post_date, update_id)
+        # Источник поста: канал + сообщение и file_unique_id главного медиа
+        chat_id = post.get('chat', {}).get('id')
+        main_media = videos[0]['video'] if videos else (photos[0] if photos else None)
+        file_unique_id = main_media.get('file_unique_id') if main_media else None
+        
+        # Проверяем дубликат: по уникальному индексу источника, для статей,
+        # импортированных до его появления, - по заголовку
+        existing = Article.get_telegram_source(chat_id, message_id, file_unique_id)
+        if existing is None:
+            existing = Article.get_legacy_telegram_article(title)
+        if existing is not None:
+            logger.info(f'⏭️  Пост #{message_id}: "{title[:40]}..." уже импортирован ({existing.slug})')
+            sync.update_last_message(last_message_id, post_date, update_id)
             return
         
         logger.info('')
@@ -557,182 +728,148 @@ class Command(BaseCommand):
             logger.info(f'   Видео: 0 шт.')
         logger.info('')
         
-        try:
-            # Создаём статью
-            article = Article.objects.create(
-                title=title,
-                content=content,
-                is_published=auto_publish,
-                display_order=0,
-                video_status='ready'
-            )
-            
-            logger.info(f'✅ Статья создана: {article.slug}')
+        channel_username = post.get('chat', {}).get('username', '')
+        article = Article(
+            title=title,
+            content=content,
+            is_published=auto_publish,
+            display_order=0,
+            video_status='ready',
+            telegram_chat_id=chat_id,
+            telegram_message_id=message_id,
+            telegram_file_unique_id=file_unique_id or None,
+            telegram_channel_username=channel_username or None
+        )
+        articles = [article]
+        pending_videos = 0
+        
+        def source_keys(source_message_id, source_file_unique_id):
+            keys = set()
+            if chat_id and source_message_id:
+                keys.add(('source', chat_id, source_message_id))
+            if source_file_unique_id:
+                keys.add(('file', source_file_unique_id))
+            return keys
+        
+        # Источники, уже занятые статьями поста (уникальные индексы)
+        post_keys = source_keys(message_id, file_unique_id)
+        
+        # Статьи собираются в памяти: в базу пост попадает целиком вместе
+        # с фото, поэтому сбой посередине не оставит статью без медиа
+        for video_idx, video_data in enumerate(videos):
+            video_obj = video_data['video']
+            video_message_id = video_data['message_id']
+            file_size = video_obj.get('file_size', 0)
+            size_mb = file_size / (1024 * 1024) if file_size else 0
             
-            # Сохраняем фото
-            if photos:
-                saved_photos = 0
-                for photo_idx, photo in enumerate(photos):
-                    try:
-                        file_id = photo['file_id']
-                        
-                        # Получаем файл
-                        file_response = requests.get(
-                            f'{api_url}/getFile',
-                            params={'file_id': file_id},
-                            timeout=10
-                        )
-                        file_response.raise_for_status()
-                        file_data = file_response.json()
-                        
-                        if not file_data.get('ok'):
-                            logger.warning(f'   ⚠️  Фото {photo_idx + 1}: API ошибка')
-                            continue
-                        
-                        file_path = file_data['result']['file_path']
-                        file_url = f'https://api.telegram.org/file/bot{api_url.split("bot")[1].split("/")[0]}/{file_path}'
-                        
-                        # Скачиваем изображение
-                        image_response = requests.get(file_url, timeout=30)
-                        image_response.raise_for_status()
-                        
-                        image_content = BytesIO(image_response.content)
-                        image_name = f'{article.slug}_{photo_idx}.jpg'
-                        
-                        if photo_idx == 0:
-                            # Главное фото
-                            article.image.save(
-                                image_name,
-                                InMemoryUploadedFile(
-                                    image_content,
-                                    None,
-                                    image_name,
-                                    'image/jpeg',
-                                    len(image_response.content),
-                                    None
-                                )
-                            )
-                            logger.info(f'   📷 Главное фото сохранено')
-                        else:
-                            # Фото в галерею
-                            article_image = ArticleImage.objects.create(
-                                article=article,
-                                order=photo_idx
-                            )
-                            article_image.image.save(
-                                image_name,
-                                InMemoryUploadedFile(
-                                    image_content,
-                                    None,
-                                    image_name,
-                                    'image/jpeg',
-                                    len(image_response.content),
-                                    None
-                                )
-                            )
-                            logger.info(f'   📷 Фото {photo_idx + 1} → галерея')
-                        
-                        saved_photos += 1
-                    
-                    except Exception as e:
-                        logger.error(f'   ❌ Ошибка фото {photo_idx + 1}: {e}')
-                
-                if saved_photos > 0:
-                    logger.info(f'   ✅ Сохранено фото: {saved_photos}/{len(photos)}')
+            # Если видео несколько - создаём отдельную статью для каждого
+            if video_idx > 0:
+                video_file_unique_id = video_obj.get('file_unique_id')
+                keys = source_keys(video_message_id, video_file_unique_id)
+                if keys & post_keys or Article.get_telegram_source(chat_id, video_message_id, video_file_unique_id):
+                    logger.info(f'   ⏭️  Видео {video_idx + 1}: уже существует')
+                    continue
+                post_keys.update(keys)
+                video_article = Article(
+                    title=f"{title} (видео {video_idx + 1})",
+                    content=video_data.get('caption') or f"Видео {video_idx + 1} из серии",
+                    is_published=auto_publish,
+                    display_order=0,
+                    video_status='ready',
+                    telegram_chat_id=chat_id,
+                    telegram_message_id=video_message_id,
+                    telegram_file_unique_id=video_file_unique_id
+                )
+                articles.append(video_article)
+            else:
+                # Первое видео - используем основную статью
+                video_article = article
             
-            # Сохраняем видео (обрабатываем все видео из группы)
-            if videos:
-                saved_videos = 0
-                channel_username = post.get('chat', {}).get('username', '')
+            # ВАРИАНТ 2: Если видео > 20MB - ставим статус pending для скачивания через Telethon
+            if file_size > 20 * 1024 * 1024:  # 20MB в байтах
+                video_article.telegram_channel_username = channel_username
+                video_article.telegram_message_id = video_message_id
+                video_article.video_status = 'pending'
+                video_article.video_url = None  # Не сохраняем file_id для больших видео
+                pending_videos += 1
                 
-                for video_idx, video_data in enumerate(videos):
-                    try:
-                        video_obj = video_data['video']
-                        video_message_id = video_data['message_id']
-                        video_caption = video_data.get('caption', '')
-                        
-                        file_id = video_obj['file_id']
-                        file_size = video_obj.get('file_size', 0)
-                        size_mb = file_size / (1024 * 1024) if file_size else 0
-                        
-                        # Если видео несколько - создаём отдельную статью для каждого
-                        if len(videos) > 1 and video_idx > 0:
-                            # Создаём отдельную статью для дополнительного видео
-                            video_title = f"{title} (видео {video_idx + 1})"
-                            if video_caption:
-                                video_content = video_caption
-                            else:
-                                video_content = f"Видео {video_idx + 1} из серии"
-                            
-                            # Проверяем дубликат
-                            if Article.objects.filter(title=video_title).exists():
-                                logger.info(f'   ⏭️  Видео {video_idx + 1}: уже существует')
-                                continue
-                            
-                            video_article = Article.objects.create(
-                                title=video_title,
-                                content=video_content,
-                                is_published=auto_publish,
-                                display_order=0,
-                                video_status='ready'
-                            )
-                            logger.info(f'   📹 Создана статья для видео {video_idx + 1}: {video_article.slug}')
-                        else:
-                            # Первое видео - используем основную статью
-                            video_article = article
-                        
-                        # ВАРИАНТ 2: Если видео > 20MB - ставим статус pending для скачивания через Telethon
-                        if file_size > 20 * 1024 * 1024:  # 20MB в байтах
-                            video_article.telegram_channel_username = channel_username
-                            video_article.telegram_message_id = video_message_id
-                            video_article.video_status = 'pending'
-                            video_article.video_url = None  # Не сохраняем file_id для больших видео
-                            video_article.save()
-                            
-                            logger.info(f'   ✅ Видео {video_idx + 1} сохранено (большое, ~{size_mb:.1f}MB)')
-                            logger.info(f'      Статус: pending (будет скачано через Telethon worker)')
-                            logger.info(f'      Канал: @{channel_username}, Message ID: {video_message_id}')
-                        else:
-                            # ВАРИАНТ 2: Видео < 20MB - сохраняем file_id для проксирования
-                            video_article.video_url = file_id
-                            video_article.video_status = 'ready'
-                            video_article.save()
-                            
-                            logger.info(f'   ✅ Видео {video_idx + 1} сохранено (file_id, ~{size_mb:.1f}MB)')
-                            logger.info(f'      Видео будет стримиться через прокси-сервер')
-                        
-                        saved_videos += 1
-                    
-                    except Exception as e:
-                        logger.error(f'   ❌ Ошибка сохранения видео {video_idx + 1}: {e}')
-                        logger.exception(e)
+                logger.info(f'   ✅ Видео {video_idx + 1} (большое, ~{size_mb:.1f}MB)')
+                logger.info(f'      Статус: pending (будет скачано через Telethon worker)')
+                logger.info(f'      Канал: @{channel_username}, Message ID: {video_message_id}')
+            else:
+                # ВАРИАНТ 2: Видео < 20MB - сохраняем file_id для проксирования
+                video_article.video_url = video_obj['file_id']
                 
-                if saved_videos > 0:
-                    logger.info(f'   ✅ Сохранено видео: {saved_videos}/{len(videos)}')
-            
-            # Обновляем синхронизацию
-            sync.update_last_message(message_id, post_date, update_id)
-            sync.posts_processed += 1
-            sync.save()
+                logger.info(f'   ✅ Видео {video_idx + 1} (file_id, ~{size_mb:.1f}MB)')
+                logger.info(f'      Видео будет стримиться через прокси-сервер')
+        
+        for created_article, slug in zip(articles, allocate_article_slugs(articles)):
+            created_article.slug = slug
+        
+        # Фото - до транзакции: все фото группы качаются и пишутся в storage параллельно
+        images = []
+        stored_names = []
+        if photos:
+            with fetch_telegram_media(self.telegram, [photo['file_id'] for photo in photos]) as fetched_photos:
+                jobs = []
+                for photo_idx, fetched in enumerate(fetched_photos):
+                    if photo_idx == 0:
+                        # Главное фото
+                        field_file = article.image
+                    else:
+                        # Фото в галерею
+                        field_file = ArticleImage(article=article, order=photo_idx).image
+                    jobs.append((field_file, f'{article.slug}_{photo_idx}.jpg', fetched))
+                stored_names = store_media_files(jobs)
             
-            logger.info('')
-            logger.info(f'✅ НОВОСТЬ ОПУБЛИКОВАНА: {article.slug}')
-            logger.info(f'   Статус: {"Опубликована" if auto_publish else "Черновик"}')
-            logger.info(f'   Всего обработано: {sync.posts_processed}')
-            logger.info('=' * 80)
-            logger.info('')
+            for (field_file, image_name, fetched), stored_name in zip(jobs, stored_names):
+                if stored_name is None:
+                    logger.warning(f'   ⚠️  Фото {image_name}: {fetched.error or "не сохранено"}')
+                    continue
+                field_file.name = stored_name
+                if isinstance(field_file.instance, ArticleImage):
+                    images.append(field_file.instance)
+            logger.info(f'   📷 Сохранено фото: {sum(1 for name in stored_names if name)}/{len(photos)}')
         
+        try:
+            # Статьи поста и галерея - одной транзакцией
+            bulk_create_articles(articles, images)
         except Exception as e:
+            delete_media_files(Article._meta.get_field('image').storage, stored_names)
+            existing = Article.get_telegram_source(chat_id, message_id, file_unique_id)
+            if isinstance(e, IntegrityError) and existing is not None:
+                # Пост успел импортировать параллельный обработчик
+                logger.info(f'⏭️  Пост #{message_id}: уже импортирован ({existing.slug})')
+                sync.update_last_message(last_message_id, post_date, update_id)
+                return
             logger.error(f'❌ Ошибка при создании новости: {e}')
             logger.exception(e)
+            # Обновление из очереди будет обработано повторно
+            raise
+        
+        if pending_videos:
+            notify_video_worker()
+        
+        for created_article in articles[1:]:
+            logger.info(f'   📹 Создана статья для видео: {created_article.slug}')
+        
+        # Обновляем синхронизацию
+        sync.update_last_message(last_message_id, post_date, update_id)
+        sync.posts_processed += 1
+        sync.save()
+        
+        logger.info('')
+        logger.info(f'✅ НОВОСТЬ ОПУБЛИКОВАНА: {article.slug}')
+        logger.info(f'   Статус: {"Опубликована" if auto_publish else "Черновик"}')
+        logger.info(f'   Всего обработано: {sync.posts_processed}')
+        logger.info('=' * 80)
+        logger.info('')
     
-    @staticmethod
-    def _send_message(api_url: str, chat_id: int, text: str, parse_mode: str = None) -> bool:
+    def _send_message(self, chat_id: int, text: str, parse_mode: str = None) -> bool:
         """
         Отправляет сообщение в Telegram
         
         Args:
-            api_url: URL API бота
             chat_id: ID чата
             text: Текст сообщения
             parse_mode: Режим парсинга (HTML, Markdown)
@@ -749,11 +886,7 @@ class Command(BaseCommand):
             if parse_mode:
                 payload['parse_mode'] = parse_mode
             
-            response = requests.post(
-                f'{api_url}/sendMessage',
-                json=payload,
-                timeout=10
-            )
+            response = self.telegram.post('sendMessage', json=payload)
             response.raise_for_status()
             return True
         
@@ -0,0 +1,111 @@
+"""
+Команда для настройки webhook Telegram-бота
+
+Использование:
+    # Включить webhook (секрет берётся из TELEGRAM_WEBHOOK_SECRET)
+    python manage.py set_telegram_webhook --url https://www.avto-decor.com/kontakty/telegram/webhook/
+    
+    # Показать текущие настройки
+    python manage.py set_telegram_webhook --info
+    
+    # Выключить webhook и вернуться к getUpdates
+    python manage.py set_telegram_webhook --delete
+
+Пока webhook включён, getUpdates не работает: запускайте
+run_unified_bot --source webhook.
+"""
+import os
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import reverse
+from loguru import logger
+
+from core.services import get_telegram_client
+
+
+class Command(BaseCommand):
+    help = 'Включает, выключает или показывает webhook Telegram-бота'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            type=str,
+            help='Публичный HTTPS URL webhook (по умолчанию SITE_URL + путь view)',
+        )
+        parser.add_argument(
+            '--delete',
+            action='store_true',
+            help='Выключить webhook',
+        )
+        parser.add_argument(
+            '--info',
+            action='store_true',
+            help='Показать текущие настройки webhook',
+        )
+        parser.add_argument(
+            '--drop-pending',
+            action='store_true',
+            help='Сбросить обновления, накопленные в Telegram',
+        )
+        parser.add_argument(
+            '--channel-posts',
+            action='store_true',
+            help='Получать также посты из канала (для сбора новостей)',
+        )
+
+    def handle(self, *args, **options):
+        token = getattr(settings, 'TELEGRAM_BOT_TOKEN', '') or os.environ.get('TELEGRAM_BOT_TOKEN', '')
+        if not token:
+            raise CommandError('Задайте TELEGRAM_BOT_TOKEN в настройках или переменных окружения')
+        telegram = get_telegram_client(token)
+        
+        if options['info']:
+            data = telegram.get('getWebhookInfo').json()
+            result = data.get('result', {})
+            logger.info(f'URL: {result.get("url") or "не установлен"}')
+            logger.info(f'Ожидают доставки: {result.get("pending_update_count", 0)}')
+            if result.get('last_error_message'):
+                logger.warning(f'Последняя ошибка: {result["last_error_message"]}')
+            return
+        
+        if options['delete']:
+            data = telegram.post(
+                'deleteWebhook',
+                json={'drop_pending_updates': options['drop_pending']}
+            ).json()
+            if data.get('ok'):
+                logger.info('✅ Webhook выключен, бот снова может использовать getUpdates')
+            else:
+                logger.error(f'❌ Ошибка: {data.get("description")}')
+                sys.exit(1)
+            return
+        
+        secret = getattr(settings, 'TELEGRAM_WEBHOOK_SECRET', '')
+        if not secret:
+            logger.error('❌ Задайте TELEGRAM_WEBHOOK_SECRET - без него webhook отклоняет все запросы')
+            sys.exit(1)
+        
+        url = options['url'] or f'{settings.SITE_URL}{reverse("contacts:telegram_webhook")}'
+        allowed_updates = ['message']
+        if options['channel_posts']:
+            allowed_updates.append('channel_post')
+        
+        data = telegram.post(
+            'setWebhook',
+            json={
+                'url': url,
+                'secret_token': secret,
+                'allowed_updates': allowed_updates,
+                'drop_pending_updates': options['drop_pending'],
+            }
+        ).json()
+        
+        if data.get('ok'):
+            logger.info(f'✅ Webhook установлен: {url}')
+            logger.info(f'   Типы обновлений: {", ".join(allowed_updates)}')
+            logger.info('   Запустите обработчик: python manage.py run_unified_bot --source webhook')
+        else:
+            logger.error(f'❌ Ошибка: {data.get("description")}')
+            sys.exit(1)
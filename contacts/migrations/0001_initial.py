@@ -0,0 +1,34 @@
+# Generated by Django 4.2.8 on 2026-10-18 07:27
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramUpdate',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('update_id', models.BigIntegerField(help_text='ID update от Telegram API', unique=True, verbose_name='ID update')),
+                ('payload', models.JSONField(help_text='JSON обновления, как его прислал Telegram', verbose_name='Данные')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает обработки'), ('processing', 'Обрабатывается'), ('done', 'Обработано'), ('error', 'Ошибка')], default='pending', max_length=16, verbose_name='Статус')),
+                ('error', models.TextField(blank=True, default='', verbose_name='Ошибка')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='Обработано')),
+            ],
+            options={
+                'verbose_name': 'Обновление Telegram',
+                'verbose_name_plural': 'Обновления Telegram',
+                'ordering': ['update_id'],
+                'indexes': [models.Index(fields=['status', 'update_id'], name='contacts_te_status_70a4d5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.8 on 2026-10-18 10:55
+
+from django.db import migrations, models
+
+
+def error_to_dead(apps, schema_editor):
+    TelegramUpdate = apps.get_model('contacts', 'TelegramUpdate')
+    TelegramUpdate.objects.filter(status='error').update(status='dead')
+
+
+def dead_to_error(apps, schema_editor):
+    TelegramUpdate = apps.get_model('contacts', 'TelegramUpdate')
+    TelegramUpdate.objects.filter(status='dead').update(status='error')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='telegramupdate',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0, verbose_name='Попыток'),
+        ),
+        migrations.AddField(
+            model_name='telegramupdate',
+            name='next_attempt_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Следующая попытка'),
+        ),
+        migrations.AlterField(
+            model_name='telegramupdate',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Ожидает обработки'), ('processing', 'Обрабатывается'), ('done', 'Обработано'), ('dead', 'Не обработано (попытки исчерпаны)')], default='pending', max_length=16, verbose_name='Статус'),
+        ),
+        migrations.RunPython(error_to_dead, dead_to_error),
+    ]
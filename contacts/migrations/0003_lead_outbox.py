@@ -0,0 +1,63 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0002_telegramupdate_retries'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Lead',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('name', models.CharField(max_length=100, verbose_name='Имя')),
+                ('phone', models.CharField(max_length=20, verbose_name='Телефон')),
+                ('email', models.EmailField(blank=True, default='', max_length=254, verbose_name='Email')),
+                ('message', models.TextField(verbose_name='Сообщение')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает отправки'), ('sending', 'Отправляется'), ('delivered', 'Доставлена'), ('failed', 'Не доставлена')], default='pending', max_length=16, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('next_attempt_at', models.DateTimeField(blank=True, null=True, verbose_name='Следующая попытка')),
+                ('last_error', models.TextField(blank=True, default='', verbose_name='Ошибка')),
+                ('delivered_at', models.DateTimeField(blank=True, null=True, verbose_name='Доставлена')),
+            ],
+            options={
+                'verbose_name': 'Заявка',
+                'verbose_name_plural': 'Заявки',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LeadDelivery',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('chat_id', models.CharField(max_length=32, verbose_name='chat_id')),
+                ('status', models.CharField(choices=[('pending', 'Ожидает отправки'), ('sent', 'Доставлено'), ('failed', 'Ошибка, будет повтор'), ('chat_gone', 'Чат недоступен')], default='pending', max_length=16, verbose_name='Статус')),
+                ('attempts', models.PositiveIntegerField(default=0, verbose_name='Попыток')),
+                ('sent_at', models.DateTimeField(blank=True, null=True, verbose_name='Доставлено')),
+                ('lead', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='deliveries', to='contacts.lead', verbose_name='Заявка')),
+            ],
+            options={
+                'verbose_name': 'Доставка заявки',
+                'verbose_name_plural': 'Доставки заявок',
+                'ordering': ['created_at'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='lead',
+            index=models.Index(fields=['status', 'next_attempt_at'], name='contacts_le_status_c013d4_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='leaddelivery',
+            constraint=models.UniqueConstraint(fields=('lead', 'chat_id'), name='contacts_unique_lead_delivery'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.8 on 2026-10-18 11:40
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0003_lead_outbox'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Subscriber',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('chat_id', models.CharField(max_length=32, unique=True, verbose_name='chat_id')),
+                ('status', models.CharField(choices=[('active', 'Подписан'), ('inactive', 'Отписан')], db_index=True, default='active', max_length=16, verbose_name='Статус')),
+                ('last_delivery_at', models.DateTimeField(blank=True, null=True, verbose_name='Последняя отправка')),
+                ('last_delivery_status', models.CharField(blank=True, choices=[('sent', 'Доставлено'), ('failed', 'Ошибка'), ('chat_gone', 'Чат недоступен')], default='', max_length=16, verbose_name='Результат последней отправки')),
+            ],
+            options={
+                'verbose_name': 'Подписчик',
+                'verbose_name_plural': 'Подписчики',
+                'ordering': ['created_at'],
+            },
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 4.2.8 on 2026-10-18 12:30
+
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.db import migrations
+
+
+def import_file_subscribers(apps, schema_editor):
+    """
+    Переносит подписчиков из JSON файла (TELEGRAM_SUBSCRIBERS_FILE) в таблицу
+
+    Без этого после перехода на TELEGRAM_SUBSCRIBERS_BACKEND='db' заявки
+    не уходили бы никому, пока не запущен import_subscribers.
+    """
+    Subscriber = apps.get_model('contacts', 'Subscriber')
+    subscribers_file = Path(os.environ.get(
+        'TELEGRAM_SUBSCRIBERS_FILE',
+        str(Path(settings.BASE_DIR) / 'data' / 'telegram_subscribers.json')
+    ))
+    if not subscribers_file.exists():
+        return
+
+    try:
+        with open(subscribers_file, 'r', encoding='utf-8') as f:
+            chat_ids = {str(chat_id) for chat_id in json.load(f).get('subscribers', [])}
+    except (OSError, ValueError) as e:
+        # Битый файл не должен останавливать деплой: import_subscribers покажет ошибку
+        print(f'\n  Не удалось прочитать файл подписчиков {subscribers_file}: {e}')
+        return
+
+    Subscriber.objects.bulk_create(
+        [Subscriber(chat_id=chat_id) for chat_id in chat_ids],
+        ignore_conflicts=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0004_subscriber'),
+    ]
+
+    operations = [
+        migrations.RunPython(import_file_subscribers, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.8 on 2026-10-18 14:10
+
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0005_import_file_subscribers'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TelegramPollingOffset',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('updated_at', models.DateTimeField(auto_now=True, verbose_name='Дата обновления')),
+                ('bot_id', models.CharField(max_length=32, unique=True, verbose_name='ID бота')),
+                ('offset', models.BigIntegerField(default=0, help_text='Следующий update_id для getUpdates', verbose_name='offset')),
+            ],
+            options={
+                'verbose_name': 'Offset getUpdates',
+                'verbose_name_plural': 'Offset getUpdates',
+            },
+        ),
+    ]
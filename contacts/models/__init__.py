@@ -0,0 +1,9 @@
+"""
+Модели contacts приложения
+"""
+from .telegram_update import TelegramUpdate
+from .telegram_offset import TelegramPollingOffset
+from .lead import Lead, LeadDelivery
+from .subscriber import Subscriber
+
+__all__ = ['TelegramUpdate', 'TelegramPollingOffset', 'Lead', 'LeadDelivery', 'Subscriber']
@@ -0,0 +1,249 @@
+"""
+Модели заявок с сайта (outbox для уведомлений в Telegram)
+"""
+from datetime import timedelta
+from typing import Optional
+
+from django.db import models
+from django.db.models import F, Q
+from django.utils import timezone
+from core.models import BaseModel
+
+# Сколько раз пытаться доставить заявку, прежде чем пометить её недоставленной
+DEFAULT_LEAD_MAX_ATTEMPTS = 10
+# Пауза перед повтором: LEAD_RETRY_BASE_DELAY * 2^(попытка - 1), но не больше LEAD_RETRY_MAX_DELAY (секунды)
+LEAD_RETRY_BASE_DELAY = 30
+LEAD_RETRY_MAX_DELAY = 60 * 60
+# Сколько обработчик может держать заявку; после этого она считается брошенной (секунды)
+LEAD_SENDING_TIMEOUT = 5 * 60
+
+
+class Lead(BaseModel):
+    """
+    Заявка с контактной формы.
+
+    Форма только сохраняет заявку и сразу отвечает посетителю; уведомления
+    подписчикам рассылает фоновый обработчик (deliver_leads или поток
+    run_unified_bot). Неудачная рассылка повторяется с экспоненциальной
+    паузой, результат по каждому подписчику - в LeadDelivery.
+
+    Attributes:
+        name: Имя клиента
+        phone: Телефон
+        email: Email
+        message: Текст заявки
+        status: Статус рассылки
+        attempts: Сколько раз заявку брали в рассылку
+        next_attempt_at: Когда повторить (pending) или когда истекает захват (sending)
+        last_error: Причина последней неудачи
+        delivered_at: Когда рассылка завершилась
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENDING = 'sending'
+    STATUS_DELIVERED = 'delivered'
+    STATUS_FAILED = 'failed'
+
+    name = models.CharField(
+        max_length=100,
+        verbose_name='Имя'
+    )
+    phone = models.CharField(
+        max_length=20,
+        verbose_name='Телефон'
+    )
+    email = models.EmailField(
+        blank=True,
+        default='',
+        verbose_name='Email'
+    )
+    message = models.TextField(
+        verbose_name='Сообщение'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=[
+            (STATUS_PENDING, 'Ожидает отправки'),
+            (STATUS_SENDING, 'Отправляется'),
+            (STATUS_DELIVERED, 'Доставлена'),
+            (STATUS_FAILED, 'Не доставлена'),
+        ],
+        default=STATUS_PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    next_attempt_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Следующая попытка'
+    )
+    last_error = models.TextField(
+        blank=True,
+        default='',
+        verbose_name='Ошибка'
+    )
+    delivered_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Доставлена'
+    )
+
+    class Meta:
+        verbose_name = 'Заявка'
+        verbose_name_plural = 'Заявки'
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at']),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.name} ({self.phone})'
+
+    @classmethod
+    def claim_pending(cls, limit: int = 20) -> list:
+        """
+        Забирает заявки, которые пора отправить, в порядке поступления
+
+        Каждая заявка переводится в 'sending' через compare-and-set, поэтому
+        несколько обработчиков не разошлют одну заявку дважды. Захват
+        считается попыткой и действует LEAD_SENDING_TIMEOUT секунд.
+        """
+        now = timezone.now()
+        claimed = []
+        pending_ids = list(
+            cls.objects.filter(status=cls.STATUS_PENDING)
+            .filter(Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now))
+            .order_by('created_at')
+            .values_list('id', flat=True)[:limit]
+        )
+        for pk in pending_ids:
+            if cls.objects.filter(id=pk, status=cls.STATUS_PENDING).update(
+                status=cls.STATUS_SENDING,
+                attempts=F('attempts') + 1,
+                next_attempt_at=now + timedelta(seconds=LEAD_SENDING_TIMEOUT),
+                updated_at=now
+            ):
+                claimed.append(pk)
+        return list(cls.objects.filter(id__in=claimed).order_by('created_at'))
+
+    @classmethod
+    def requeue_stale(cls) -> int:
+        """Возвращает в очередь заявки, брошенные упавшим обработчиком"""
+        return cls.objects.filter(status=cls.STATUS_SENDING).filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lt=timezone.now())
+        ).update(status=cls.STATUS_PENDING, next_attempt_at=None)
+
+    @classmethod
+    def retry_delay(cls, attempts: int) -> int:
+        """Пауза перед следующей попыткой (секунды)"""
+        return min(LEAD_RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0), LEAD_RETRY_MAX_DELAY)
+
+    def mark_delivered(self) -> bool:
+        """
+        Все подписчики получили заявку
+
+        Returns:
+            False, если заявку уже забрал другой обработчик (истёк захват)
+        """
+        self.status = self.STATUS_DELIVERED
+        self.last_error = ''
+        self.next_attempt_at = None
+        self.delivered_at = timezone.now()
+        return self._finish_sending(['status', 'last_error', 'next_attempt_at', 'delivered_at'])
+
+    def mark_failed(self, error: str, max_attempts: int = DEFAULT_LEAD_MAX_ATTEMPTS) -> bool:
+        """
+        Рассылка не завершена: повтор с паузой (next_attempt_at) или 'failed'
+
+        Returns:
+            False, если заявку уже забрал другой обработчик (истёк захват)
+        """
+        self.last_error = error
+        if self.attempts >= max_attempts:
+            self.status = self.STATUS_FAILED
+            self.next_attempt_at = None
+        else:
+            self.status = self.STATUS_PENDING
+            self.next_attempt_at = timezone.now() + timedelta(seconds=self.retry_delay(self.attempts))
+        return self._finish_sending(['status', 'last_error', 'next_attempt_at'])
+
+    def _finish_sending(self, fields: list) -> bool:
+        """
+        Сохраняет результат рассылки через compare-and-set по статусу 'sending'
+
+        Если захват истёк и заявку вернул в очередь requeue_stale, результат
+        не должен перезаписать состояние, которое ведёт другой обработчик.
+        """
+        self.updated_at = timezone.now()
+        return bool(
+            type(self).objects.filter(id=self.id, status=self.STATUS_SENDING).update(
+                updated_at=self.updated_at,
+                **{field: getattr(self, field) for field in fields}
+            )
+        )
+
+
+class LeadDelivery(BaseModel):
+    """
+    Доставка заявки одному подписчику
+
+    Attributes:
+        lead: Заявка
+        chat_id: Telegram chat_id подписчика
+        status: Результат последней отправки
+        attempts: Сколько раз отправляли
+        sent_at: Когда доставлено
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_SENT = 'sent'
+    STATUS_FAILED = 'failed'
+    STATUS_CHAT_GONE = 'chat_gone'
+
+    lead = models.ForeignKey(
+        Lead,
+        on_delete=models.CASCADE,
+        related_name='deliveries',
+        verbose_name='Заявка'
+    )
+    chat_id = models.CharField(
+        max_length=32,
+        verbose_name='chat_id'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=[
+            (STATUS_PENDING, 'Ожидает отправки'),
+            (STATUS_SENT, 'Доставлено'),
+            (STATUS_FAILED, 'Ошибка, будет повтор'),
+            (STATUS_CHAT_GONE, 'Чат недоступен'),
+        ],
+        default=STATUS_PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    sent_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Доставлено'
+    )
+
+    class Meta:
+        verbose_name = 'Доставка заявки'
+        verbose_name_plural = 'Доставки заявок'
+        ordering = ['created_at']
+        constraints = [
+            models.UniqueConstraint(fields=['lead', 'chat_id'], name='contacts_unique_lead_delivery'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.chat_id} ({self.get_status_display()})'
+
+    @property
+    def is_final(self) -> bool:
+        """Повторять отправку этому подписчику не нужно"""
+        return self.status in (self.STATUS_SENT, self.STATUS_CHAT_GONE)
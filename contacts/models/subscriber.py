@@ -0,0 +1,134 @@
+"""
+Модель подписчиков на заявки с сайта
+"""
+from typing import Dict, Iterable, Set
+
+from django.db import models
+from django.utils import timezone
+from core.models import BaseModel
+
+
+class Subscriber(BaseModel):
+    """
+    Подписчик Telegram бота, получающий заявки с сайта.
+
+    Отписка и недоступный чат не удаляют запись, а деактивируют её:
+    история доставок сохраняется, а повторный /start просто включает
+    подписку обратно. Все операции - индексные запросы по chat_id,
+    их можно выполнять параллельно из сайта и бота.
+
+    Attributes:
+        chat_id: Telegram chat_id (уникальный)
+        status: Активна ли подписка
+        last_delivery_at: Когда последний раз отправляли заявку
+        last_delivery_status: Результат последней отправки
+    """
+    STATUS_ACTIVE = 'active'
+    STATUS_INACTIVE = 'inactive'
+
+    DELIVERY_SENT = 'sent'
+    DELIVERY_FAILED = 'failed'
+    DELIVERY_CHAT_GONE = 'chat_gone'
+
+    chat_id = models.CharField(
+        max_length=32,
+        unique=True,
+        verbose_name='chat_id'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=[
+            (STATUS_ACTIVE, 'Подписан'),
+            (STATUS_INACTIVE, 'Отписан'),
+        ],
+        default=STATUS_ACTIVE,
+        db_index=True,
+        verbose_name='Статус'
+    )
+    last_delivery_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Последняя отправка'
+    )
+    last_delivery_status = models.CharField(
+        max_length=16,
+        blank=True,
+        default='',
+        choices=[
+            (DELIVERY_SENT, 'Доставлено'),
+            (DELIVERY_FAILED, 'Ошибка'),
+            (DELIVERY_CHAT_GONE, 'Чат недоступен'),
+        ],
+        verbose_name='Результат последней отправки'
+    )
+
+    class Meta:
+        verbose_name = 'Подписчик'
+        verbose_name_plural = 'Подписчики'
+        ordering = ['created_at']
+
+    def __str__(self) -> str:
+        return f'{self.chat_id} ({self.get_status_display()})'
+
+    @classmethod
+    def active_chat_ids(cls) -> Set[str]:
+        """chat_id всех активных подписчиков"""
+        return set(cls.objects.filter(status=cls.STATUS_ACTIVE).values_list('chat_id', flat=True))
+
+    @classmethod
+    def activate(cls, chat_ids: Iterable[str]) -> Set[str]:
+        """
+        Включает подписку пачкой: новые chat_id создаются, отписанные включаются
+
+        Returns:
+            chat_id, которые до этого не были подписаны
+        """
+        chat_ids = {str(chat_id) for chat_id in chat_ids}
+        if not chat_ids:
+            return set()
+        known = dict(cls.objects.filter(chat_id__in=chat_ids).values_list('chat_id', 'status'))
+        inactive = {chat_id for chat_id, status in known.items() if status != cls.STATUS_ACTIVE}
+        new = chat_ids - set(known)
+        if inactive:
+            # Условие на статус: параллельная активация не посчитает chat_id дважды
+            cls.objects.filter(chat_id__in=inactive).exclude(status=cls.STATUS_ACTIVE).update(
+                status=cls.STATUS_ACTIVE, updated_at=timezone.now()
+            )
+        if new:
+            cls.objects.bulk_create([cls(chat_id=chat_id) for chat_id in new], ignore_conflicts=True)
+        return inactive | new
+
+    @classmethod
+    def deactivate(cls, chat_ids: Iterable[str]) -> Set[str]:
+        """
+        Отключает подписку пачкой
+
+        Returns:
+            chat_id, которые были подписаны
+        """
+        chat_ids = {str(chat_id) for chat_id in chat_ids}
+        if not chat_ids:
+            return set()
+        active = set(
+            cls.objects.filter(chat_id__in=chat_ids, status=cls.STATUS_ACTIVE).values_list('chat_id', flat=True)
+        )
+        if active:
+            cls.objects.filter(chat_id__in=active).update(status=cls.STATUS_INACTIVE, updated_at=timezone.now())
+        return active
+
+    @classmethod
+    def record_deliveries(cls, results: Dict[str, str]):
+        """
+        Записывает результаты рассылки: один UPDATE на каждый вид результата
+
+        Args:
+            results: {chat_id: DELIVERY_SENT | DELIVERY_FAILED | DELIVERY_CHAT_GONE}
+        """
+        now = timezone.now()
+        by_status = {}
+        for chat_id, status in results.items():
+            by_status.setdefault(status, []).append(str(chat_id))
+        for status, chat_ids in by_status.items():
+            cls.objects.filter(chat_id__in=chat_ids).update(
+                last_delivery_at=now, last_delivery_status=status, updated_at=now
+            )
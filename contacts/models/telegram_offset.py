@@ -0,0 +1,65 @@
+"""
+Модель подтверждённого offset getUpdates
+"""
+from datetime import timedelta
+
+from django.db import models
+from django.utils import timezone
+from core.models import BaseModel
+
+# Через неделю без обновлений Telegram может начать update_id со случайного
+# (в том числе меньшего) числа - старый offset тогда подтвердил бы новые обновления
+OFFSET_MAX_AGE = timedelta(days=7)
+
+
+class TelegramPollingOffset(BaseModel):
+    """
+    offset, с которым поллер бота продолжает getUpdates после перезапуска.
+
+    Хранится отдельно от очереди TelegramUpdate: максимальный update_id
+    в очереди не годится - после сброса нумерации в Telegram он выше новых
+    update_id, и getUpdates с таким offset молча подтвердил бы их.
+
+    Attributes:
+        bot_id: Числовой ID бота (часть токена до ':')
+        offset: Следующий update_id, который нужно запросить
+    """
+    bot_id = models.CharField(
+        max_length=32,
+        unique=True,
+        verbose_name='ID бота'
+    )
+    offset = models.BigIntegerField(
+        default=0,
+        verbose_name='offset',
+        help_text='Следующий update_id для getUpdates'
+    )
+
+    class Meta:
+        verbose_name = 'Offset getUpdates'
+        verbose_name_plural = 'Offset getUpdates'
+
+    def __str__(self) -> str:
+        return f'{self.bot_id}: {self.offset}'
+
+    @classmethod
+    def get_offset(cls, bot_id: str) -> int:
+        """
+        offset для первого getUpdates после запуска
+
+        Если offset не обновлялся дольше OFFSET_MAX_AGE, возвращает 0:
+        getUpdates без offset отдаёт все неподтверждённые обновления и
+        ничего не подтверждает, даже если Telegram сбросил нумерацию.
+        """
+        saved = cls.objects.filter(bot_id=bot_id).values_list('offset', 'updated_at').first()
+        if saved is None:
+            return 0
+        offset, updated_at = saved
+        if updated_at < timezone.now() - OFFSET_MAX_AGE:
+            return 0
+        return offset
+
+    @classmethod
+    def confirm(cls, bot_id: str, offset: int):
+        """Запоминает offset после того, как полученные обновления сохранены"""
+        cls.objects.update_or_create(bot_id=bot_id, defaults={'offset': offset})
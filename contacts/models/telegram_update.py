@@ -0,0 +1,271 @@
+"""
+Модель входящих обновлений Telegram (очередь приёма)
+"""
+from datetime import timedelta
+from typing import List, Optional
+
+from django.db import models, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+from core.models import BaseModel
+
+# Сколько раз пытаться обработать обновление, прежде чем отложить его в dead
+DEFAULT_MAX_ATTEMPTS = 5
+# Пауза перед повтором: RETRY_BASE_DELAY * 2^(попытка - 1), но не больше RETRY_MAX_DELAY (секунды)
+RETRY_BASE_DELAY = 10
+RETRY_MAX_DELAY = 60 * 60
+# Сколько обработчик может держать обновление; после этого оно считается брошенным (секунды)
+PROCESSING_TIMEOUT = 10 * 60
+# Сколько дней хранить обработанные обновления. Меньше недели: после сброса
+# нумерации update_id новые обновления не должны совпасть со старыми записями
+DEFAULT_DONE_RETENTION_DAYS = 3
+# Сколько дней хранить обновления в dead (для разбора и повтора из админки)
+DEFAULT_DEAD_RETENTION_DAYS = 30
+
+
+class TelegramUpdate(BaseModel):
+    """
+    Обновление от Telegram, полученное через webhook или getUpdates.
+    
+    Приёмник (webhook-view или поллер run_unified_bot) только сохраняет
+    обновление; обработка (команды, посты канала) идёт в пуле обработчиков
+    run_unified_bot. Повторная доставка того же update_id игнорируется.
+    
+    Неудачная обработка повторяется с экспоненциальной паузой; после
+    max_attempts попыток обновление переводится в 'dead' и ждёт ручного
+    повтора из админки.
+    
+    Attributes:
+        update_id: ID update от Telegram (уникальный)
+        payload: Полный JSON обновления
+        status: Статус обработки
+        attempts: Сколько раз обновление брали в обработку
+        next_attempt_at: Когда повторить (pending) или когда истекает захват (processing)
+        error: Текст последней ошибки
+        processed_at: Когда обработка завершилась
+    """
+    STATUS_PENDING = 'pending'
+    STATUS_PROCESSING = 'processing'
+    STATUS_DONE = 'done'
+    STATUS_DEAD = 'dead'
+    
+    update_id = models.BigIntegerField(
+        unique=True,
+        verbose_name='ID update',
+        help_text='ID update от Telegram API'
+    )
+    payload = models.JSONField(
+        verbose_name='Данные',
+        help_text='JSON обновления, как его прислал Telegram'
+    )
+    status = models.CharField(
+        max_length=16,
+        choices=[
+            (STATUS_PENDING, 'Ожидает обработки'),
+            (STATUS_PROCESSING, 'Обрабатывается'),
+            (STATUS_DONE, 'Обработано'),
+            (STATUS_DEAD, 'Не обработано (попытки исчерпаны)'),
+        ],
+        default=STATUS_PENDING,
+        verbose_name='Статус'
+    )
+    attempts = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    next_attempt_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Следующая попытка'
+    )
+    error = models.TextField(
+        blank=True,
+        default='',
+        verbose_name='Ошибка'
+    )
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='Обработано'
+    )
+    
+    class Meta:
+        verbose_name = 'Обновление Telegram'
+        verbose_name_plural = 'Обновления Telegram'
+        ordering = ['update_id']
+        indexes = [
+            models.Index(fields=['status', 'update_id']),
+        ]
+    
+    def __str__(self) -> str:
+        return f'update {self.update_id} ({self.get_status_display()})'
+    
+    @property
+    def update_type(self) -> str:
+        """Тип обновления (message, channel_post, ...)"""
+        for key in self.payload:
+            if key != 'update_id':
+                return key
+        return ''
+    
+    @classmethod
+    def enqueue(cls, payload: dict) -> bool:
+        """
+        Сохраняет обновление в очередь
+        
+        Returns:
+            True если обновление новое, False если это повторная доставка
+        """
+        _, created = cls.objects.get_or_create(
+            update_id=payload['update_id'],
+            defaults={'payload': payload}
+        )
+        return created
+    
+    @classmethod
+    def enqueue_many(cls, payloads: List[dict]):
+        """
+        Сохраняет пачку обновлений getUpdates одним запросом
+        
+        Уже сохранённые update_id пропускаются.
+        """
+        cls.objects.bulk_create(
+            [cls(update_id=payload['update_id'], payload=payload) for payload in payloads],
+            ignore_conflicts=True
+        )
+    
+    @classmethod
+    def receive(cls, bot_id: str, payloads: List[dict]) -> int:
+        """
+        Сохраняет ответ getUpdates и подтверждённый offset в одной транзакции
+        
+        Returns:
+            offset для следующего getUpdates
+        """
+        from .telegram_offset import TelegramPollingOffset
+        
+        offset = payloads[-1]['update_id'] + 1
+        with transaction.atomic():
+            cls.enqueue_many(payloads)
+            TelegramPollingOffset.confirm(bot_id, offset)
+        return offset
+    
+    @classmethod
+    def claim_pending(cls, limit: int = 50, update_types: Optional[List[str]] = None) -> list:
+        """
+        Забирает готовые к обработке обновления в порядке update_id
+        
+        Каждое обновление переводится в 'processing' через compare-and-set,
+        поэтому несколько обработчиков не получат одно и то же обновление.
+        Захват считается попыткой и действует PROCESSING_TIMEOUT секунд.
+        
+        Args:
+            limit: Сколько обновлений забрать
+            update_types: Только обновления этих типов (message, channel_post, ...)
+        """
+        now = timezone.now()
+        claimed = []
+        pending = cls.objects.filter(status=cls.STATUS_PENDING).filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lte=now)
+        )
+        if update_types:
+            types_filter = Q()
+            for update_type in update_types:
+                types_filter |= Q(payload__has_key=update_type)
+            pending = pending.filter(types_filter)
+        pending_ids = list(pending.order_by('update_id').values_list('id', flat=True)[:limit])
+        for pk in pending_ids:
+            if cls.objects.filter(id=pk, status=cls.STATUS_PENDING).update(
+                status=cls.STATUS_PROCESSING,
+                attempts=F('attempts') + 1,
+                next_attempt_at=now + timedelta(seconds=PROCESSING_TIMEOUT),
+                updated_at=now
+            ):
+                claimed.append(pk)
+        return list(cls.objects.filter(id__in=claimed).order_by('update_id'))
+    
+    @classmethod
+    def requeue_stale(cls, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> int:
+        """
+        Возвращает в очередь обновления, брошенные упавшим обработчиком
+        
+        Returns:
+            Сколько обновлений возвращено в очередь
+        """
+        stale = cls.objects.filter(status=cls.STATUS_PROCESSING).filter(
+            Q(next_attempt_at__isnull=True) | Q(next_attempt_at__lt=timezone.now())
+        )
+        stale.filter(attempts__gte=max_attempts).update(
+            status=cls.STATUS_DEAD,
+            error='Обработчик не завершил обработку',
+            processed_at=timezone.now()
+        )
+        return stale.update(status=cls.STATUS_PENDING, next_attempt_at=None)
+    
+    @classmethod
+    def release(cls, ids: List) -> int:
+        """
+        Возвращает в очередь захваченные, но не начатые обновления (при остановке)
+        
+        Попытка не засчитывается.
+        """
+        return cls.objects.filter(id__in=ids, status=cls.STATUS_PROCESSING).update(
+            status=cls.STATUS_PENDING,
+            attempts=F('attempts') - 1,
+            next_attempt_at=None,
+            updated_at=timezone.now()
+        )
+    
+    @classmethod
+    def purge_finished(
+        cls,
+        done_days: int = DEFAULT_DONE_RETENTION_DAYS,
+        dead_days: int = DEFAULT_DEAD_RETENTION_DAYS
+    ) -> int:
+        """
+        Удаляет старые обработанные и отложенные в dead обновления
+        
+        offset getUpdates от этих записей не зависит (TelegramPollingOffset).
+        
+        Returns:
+            Сколько обновлений удалено
+        """
+        now = timezone.now()
+        deleted, _ = cls.objects.filter(
+            Q(status=cls.STATUS_DONE, processed_at__lt=now - timedelta(days=done_days))
+            | Q(status=cls.STATUS_DEAD, processed_at__lt=now - timedelta(days=dead_days))
+        ).delete()
+        return deleted
+    
+    @classmethod
+    def retry_delay(cls, attempts: int) -> int:
+        """Пауза перед следующей попыткой (секунды)"""
+        return min(RETRY_BASE_DELAY * 2 ** max(attempts - 1, 0), RETRY_MAX_DELAY)
+    
+    def mark_done(self):
+        """Обработка завершена успешно"""
+        self.status = self.STATUS_DONE
+        self.error = ''
+        self.next_attempt_at = None
+        self.processed_at = timezone.now()
+        self.save(update_fields=['status', 'error', 'next_attempt_at', 'processed_at', 'updated_at'])
+    
+    def mark_failed(self, error: str, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> Optional[int]:
+        """
+        Обработка завершилась ошибкой: повтор с паузой или dead
+        
+        Returns:
+            Пауза до повтора в секундах или None, если попытки исчерпаны
+        """
+        self.error = error
+        if self.attempts >= max_attempts:
+            self.status = self.STATUS_DEAD
+            self.next_attempt_at = None
+            self.processed_at = timezone.now()
+            delay = None
+        else:
+            delay = self.retry_delay(self.attempts)
+            self.status = self.STATUS_PENDING
+            self.next_attempt_at = timezone.now() + timedelta(seconds=delay)
+        self.save(update_fields=['status', 'error', 'next_attempt_at', 'processed_at', 'updated_at'])
+        return delay
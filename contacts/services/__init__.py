@@ -2,5 +2,8 @@
 Services для contacts приложения
 """
 from .telegram_service import TelegramService
+from .bot_engine import AsyncBotEngine
+from .update_queue import UpdateQueueWorkers
+from .lead_outbox import LeadOutbox
 
-__all__ = ['TelegramService']
+__all__ = ['TelegramService', 'AsyncBotEngine', 'UpdateQueueWorkers', 'LeadOutbox']
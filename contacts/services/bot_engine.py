@@ -0,0 +1,379 @@
+"""
+Асинхронный движок run_unified_bot
+
+Long polling крутится непрерывно в отдельной задаче, а обработка
+обновлений разнесена по двум независимым пулам:
+- команды пользователей (/start, /help, ...) - несколько потоков, быстрые ответы;
+- посты из канала (скачивание медиа, создание статей) - медленная загрузка.
+
+Пока импорт качает медиа-группу, пользователи получают ответы без задержки.
+
+Поллер, как и синхронный режим, сначала записывает обновления в очередь
+TelegramUpdate и только потом сдвигает offset, поэтому перезапуск не теряет
+полученные обновления. Каждый пул забирает из очереди обновления своего
+типа, но не больше, чем у него свободных мест (ingest_queue_size для
+постов), - медленный импорт не копит захваченные посты в памяти. Неудачная
+обработка повторяется по правилам очереди (contacts.services.update_queue).
+
+Обработчики остаются синхронными (ORM, requests) и выполняются в потоках.
+Периодическая работа пула постов (например, импорт собранных медиа-групп)
+передаётся через ingest_tick и выполняется в том же пуле, что и посты.
+"""
+import asyncio
+import signal
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+
+import requests
+from django.conf import settings
+from django.db import close_old_connections
+from loguru import logger
+
+from contacts.models import TelegramUpdate
+from contacts.models.telegram_update import DEFAULT_MAX_ATTEMPTS
+from contacts.services.update_queue import (
+    process_update,
+    purge_finished_updates,
+    DEFAULT_QUEUE_POLL_INTERVAL,
+    STALE_CHECK_INTERVAL,
+    PURGE_INTERVAL,
+)
+
+# Потоки для команд пользователей
+DEFAULT_USER_WORKERS = 4
+# Потоки для постов из канала: 1 сохраняет порядок постов и медиа-групп
+DEFAULT_INGEST_WORKERS = 1
+# Сколько постов может ждать обработки, прежде чем поллер остановится
+DEFAULT_INGEST_QUEUE_SIZE = 100
+DEFAULT_USER_QUEUE_SIZE = 1000
+# Как часто вызывать ingest_tick (секунды)
+DEFAULT_INGEST_TICK_INTERVAL = 1
+# Пауза после ошибки getUpdates (секунды)
+ERROR_RETRY_DELAY = 5
+# Сколько ждать обработки очередей при остановке (секунды)
+SHUTDOWN_TIMEOUT = 30
+
+
+class AsyncBotEngine:
+    """
+    Поллер getUpdates + раздельные пулы обработчиков
+
+    Args:
+        telegram: TelegramAPIClient бота
+        handle_message: Обработчик update['message'] (синхронный)
+        handle_channel_post: Обработчик (update_id, update['channel_post']) или None
+        poll_timeout: Таймаут long polling
+        allowed_updates: Типы обновлений для getUpdates
+        user_workers: Потоков для команд пользователей
+        ingest_workers: Потоков для постов из канала
+        ingest_queue_size: Сколько постов пул может держать захваченными
+        ingest_tick: Периодическая задача пула постов (синхронная) или None
+        ingest_tick_interval: Интервал ingest_tick в секундах
+        max_attempts: Попыток до 'dead' (по умолчанию TELEGRAM_UPDATE_MAX_ATTEMPTS)
+    """
+
+    def __init__(
+        self,
+        telegram,
+        handle_message: Callable[[dict], None],
+        handle_channel_post: Optional[Callable[[int, dict], None]],
+        poll_timeout: int = 30,
+        allowed_updates: Optional[List[str]] = None,
+        user_workers: int = DEFAULT_USER_WORKERS,
+        ingest_workers: int = DEFAULT_INGEST_WORKERS,
+        ingest_queue_size: int = DEFAULT_INGEST_QUEUE_SIZE,
+        ingest_tick: Optional[Callable[[], None]] = None,
+        ingest_tick_interval: float = DEFAULT_INGEST_TICK_INTERVAL,
+        max_attempts: Optional[int] = None,
+    ):
+        if max_attempts is None:
+            max_attempts = getattr(settings, 'TELEGRAM_UPDATE_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+        self.telegram = telegram
+        self.handle_message = handle_message
+        self.handle_channel_post = handle_channel_post
+        self.poll_timeout = poll_timeout
+        self.allowed_updates = allowed_updates or ['message']
+        self.user_workers = max(1, user_workers)
+        self.ingest_workers = max(1, ingest_workers)
+        self.ingest_queue_size = max(1, ingest_queue_size)
+        self.ingest_tick = ingest_tick
+        self.ingest_tick_interval = ingest_tick_interval
+        self.max_attempts = max(1, max_attempts)
+        self.offset = 0
+        self._stopping = None
+        self._user_queue = None
+        self._ingest_queue = None
+        self._wakeups = []
+        self._tick_queued = False
+        self._stale_checked_at = 0
+        self._purged_at = 0
+        # Запущенные в пулах обработчики (concurrent.futures.Future)
+        self._running = set()
+        # Сколько обработчиков не завершилось за SHUTDOWN_TIMEOUT при остановке
+        self.unfinished = 0
+
+    def stop(self):
+        """Останавливает поллер; начатые обновления дорабатываются, остальные ждут в базе"""
+        if self._stopping is not None and not self._stopping.is_set():
+            logger.info('Получен сигнал остановки. Завершаю обработку очередей...')
+            self._stopping.set()
+
+    async def run(self, offset: int = 0):
+        """
+        Запускает поллер и пулы обработчиков до вызова stop()
+
+        Args:
+            offset: update_id, с которого продолжать
+        """
+        loop = asyncio.get_running_loop()
+        self.offset = offset
+        self._stopping = asyncio.Event()
+        # Размер очередей ограничивают сами пулы: они не захватывают больше, чем capacity
+        self._user_queue = asyncio.Queue()
+        self._ingest_queue = asyncio.Queue()
+
+        # Пулы забирают обновления из базы; поллер будит их после записи новых
+        feeds = [(self._user_queue, DEFAULT_USER_QUEUE_SIZE, ['message'])]
+        if self.handle_channel_post:
+            feeds.append((self._ingest_queue, self.ingest_queue_size, ['channel_post']))
+        self._wakeups = [asyncio.Event() for _ in feeds]
+
+        handled_signals = []
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            try:
+                loop.add_signal_handler(sig, self.stop)
+                handled_signals.append(sig)
+            except (NotImplementedError, RuntimeError):
+                pass
+
+        user_executor = ThreadPoolExecutor(max_workers=self.user_workers, thread_name_prefix='bot-user')
+        ingest_executor = ThreadPoolExecutor(max_workers=self.ingest_workers, thread_name_prefix='bot-ingest')
+
+        workers = [
+            asyncio.create_task(self._worker(self._user_queue, user_executor, self._run_message))
+            for _ in range(self.user_workers)
+        ] + [
+            asyncio.create_task(self._worker(self._ingest_queue, ingest_executor, self._run_channel_post))
+            for _ in range(self.ingest_workers)
+        ]
+        if self.handle_channel_post and self.ingest_tick:
+            workers.append(asyncio.create_task(self._ticker()))
+        feeders = [
+            asyncio.create_task(self._feeder(queue, capacity, update_types, wakeup))
+            for (queue, capacity, update_types), wakeup in zip(feeds, self._wakeups)
+        ]
+
+        logger.info(
+            f'⚡ Асинхронный движок: потоков для команд - {self.user_workers}, '
+            f'для постов канала - {self.ingest_workers}, очередь постов - {self.ingest_queue_size}'
+        )
+
+        try:
+            await self._poll()
+        finally:
+            for feeder in feeders:
+                feeder.cancel()
+            await asyncio.gather(*feeders, return_exceptions=True)
+            # Захваченные, но не начатые обновления возвращаются в очередь
+            released = self._drain(self._user_queue) + self._drain(self._ingest_queue)
+            if released:
+                await asyncio.to_thread(self._release, released)
+                logger.info(f'♻️  Возвращено в очередь необработанных обновлений: {len(released)}')
+            try:
+                await asyncio.wait_for(
+                    asyncio.gather(self._user_queue.join(), self._ingest_queue.join()),
+                    timeout=SHUTDOWN_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                logger.warning('⚠️  Не все обновления успели обработаться до остановки')
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+            # Зависший обработчик не держит остановку дольше SHUTDOWN_TIMEOUT:
+            # его обновление останется 'processing' и вернётся в очередь через requeue_stale
+            user_executor.shutdown(wait=False, cancel_futures=True)
+            ingest_executor.shutdown(wait=False, cancel_futures=True)
+            self.unfinished = sum(1 for future in list(self._running) if not future.done())
+            if self.unfinished:
+                logger.warning(f'⚠️  Не завершилось обработчиков: {self.unfinished}, их обновления будут обработаны повторно')
+            for sig in handled_signals:
+                loop.remove_signal_handler(sig)
+            logger.info('Бот остановлен')
+
+    async def _poll(self):
+        """Непрерывный long polling: update сначала записывается в очередь, потом сдвигается offset"""
+        while not self._stopping.is_set():
+            try:
+                response = await self._wait_or_stop(asyncio.to_thread(
+                    self.telegram.get,
+                    'getUpdates',
+                    params={
+                        'offset': self.offset,
+                        'timeout': self.poll_timeout,
+                        'allowed_updates': self.allowed_updates,
+                    }
+                ))
+                if response is None:
+                    return
+                response.raise_for_status()
+                data = response.json()
+            except requests.exceptions.Timeout:
+                # Таймаут - это нормально для long polling
+                continue
+            except requests.exceptions.RequestException as e:
+                logger.error(f'Ошибка при получении обновлений: {e}')
+                await self._sleep(ERROR_RETRY_DELAY)
+                continue
+
+            if not data.get('ok'):
+                logger.error(f'Ошибка API: {data.get("description", "Unknown error")}')
+                await self._sleep(ERROR_RETRY_DELAY)
+                continue
+
+            updates = data.get('result', [])
+            if not updates:
+                continue
+            try:
+                offset = await asyncio.to_thread(self._store, updates)
+            except Exception as e:
+                # offset не сдвигаем - Telegram пришлёт эти обновления снова
+                logger.error(f'Ошибка записи обновлений в очередь: {e}')
+                logger.exception(e)
+                await self._sleep(ERROR_RETRY_DELAY)
+                continue
+            self.offset = offset
+            for wakeup in self._wakeups:
+                wakeup.set()
+
+    async def _feeder(self, queue: asyncio.Queue, capacity: int, update_types: List[str], wakeup: asyncio.Event):
+        """Забирает из базы обновления своего типа, пока в очереди пула меньше capacity"""
+        while not self._stopping.is_set():
+            claimed = []
+            free_slots = capacity - queue.qsize()
+            if free_slots > 0:
+                try:
+                    claimed = await asyncio.to_thread(self._claim, free_slots, update_types)
+                except Exception as e:
+                    # Ошибка самой очереди (например, база недоступна) - обновления остаются в базе
+                    logger.error(f'Ошибка очереди обновлений: {e}')
+                    logger.exception(e)
+            for queued in claimed:
+                queue.put_nowait(queued)
+            if not claimed:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), timeout=DEFAULT_QUEUE_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                wakeup.clear()
+
+    def _store(self, updates: List[dict]) -> int:
+        """Записывает обновления getUpdates в очередь и подтверждает offset (в потоке)"""
+        close_old_connections()
+        try:
+            return TelegramUpdate.receive(self.telegram.bot_id, updates)
+        finally:
+            close_old_connections()
+
+    def _claim(self, limit: int, update_types: List[str]) -> list:
+        """Захватывает обновления в базе (в потоке)"""
+        close_old_connections()
+        try:
+            now = time.monotonic()
+            if now - self._stale_checked_at >= STALE_CHECK_INTERVAL:
+                self._stale_checked_at = now
+                requeued = TelegramUpdate.requeue_stale(self.max_attempts)
+                if requeued:
+                    logger.info(f'♻️  Возвращено в очередь незавершённых обновлений: {requeued}')
+            if now - self._purged_at >= PURGE_INTERVAL:
+                self._purged_at = now
+                purge_finished_updates()
+            return TelegramUpdate.claim_pending(limit, update_types)
+        finally:
+            close_old_connections()
+
+    def _release(self, ids: list):
+        """Возвращает захваченные обновления в очередь (в потоке)"""
+        close_old_connections()
+        try:
+            TelegramUpdate.release(ids)
+        finally:
+            close_old_connections()
+
+    def _drain(self, queue: asyncio.Queue) -> list:
+        """Забирает из очереди пула ещё не начатые обновления"""
+        ids = []
+        while not queue.empty():
+            item = queue.get_nowait()
+            queue.task_done()
+            if item is not None:
+                ids.append(item.id)
+        return ids
+
+    async def _ticker(self):
+        """Ставит ingest_tick в очередь постов, не больше одного за раз"""
+        while not self._stopping.is_set():
+            await self._sleep(self.ingest_tick_interval)
+            if not self._tick_queued and not self._stopping.is_set():
+                self._tick_queued = True
+                # None - служебный элемент очереди постов: вызвать ingest_tick
+                self._ingest_queue.put_nowait(None)
+
+    async def _worker(self, queue: asyncio.Queue, executor: ThreadPoolExecutor, handler: Callable):
+        """Берёт задачи из очереди и выполняет синхронный обработчик в пуле"""
+        while True:
+            item = await queue.get()
+            try:
+                future = executor.submit(handler, item)
+                self._running.add(future)
+                future.add_done_callback(self._running.discard)
+                await asyncio.wrap_future(future)
+            except Exception as e:
+                logger.error(f'Ошибка при обработке обновления: {e}')
+                logger.exception(e)
+            finally:
+                queue.task_done()
+
+    def _run_message(self, queued: TelegramUpdate):
+        """Обработка сообщения пользователя в потоке пула"""
+        close_old_connections()
+        try:
+            process_update(queued, lambda update: self.handle_message(update['message']), self.max_attempts)
+        finally:
+            close_old_connections()
+
+    def _run_channel_post(self, item: Optional[TelegramUpdate]):
+        """Обработка поста из канала в потоке пула"""
+        close_old_connections()
+        try:
+            if item is None:
+                self._tick_queued = False
+                self.ingest_tick()
+                return
+            logger.info('📢 Получен channel_post, обрабатываю...')
+            process_update(
+                item,
+                lambda update: self.handle_channel_post(update['update_id'], update['channel_post']),
+                self.max_attempts
+            )
+        finally:
+            close_old_connections()
+
+    async def _wait_or_stop(self, coro):
+        """Ждёт coro, но прерывается при остановке (возвращает None)"""
+        task = asyncio.ensure_future(coro)
+        stop_task = asyncio.ensure_future(self._stopping.wait())
+        done, _ = await asyncio.wait({task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+        if task in done:
+            stop_task.cancel()
+            return task.result()
+        # Поток с getUpdates доработает сам; его результат не нужен - offset не сдвигаем
+        task.cancel()
+        return None
+
+    async def _sleep(self, seconds: float):
+        """Пауза, которую прерывает остановка"""
+        try:
+            await asyncio.wait_for(self._stopping.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
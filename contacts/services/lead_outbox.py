@@ -0,0 +1,192 @@
+"""
+Фоновая рассылка заявок с сайта подписчикам (outbox)
+
+Форма контактов только сохраняет заявку (contacts.models.Lead) и сразу
+отвечает посетителю - медленный или недоступный Telegram не задерживает
+форму и не теряет заявку. Рассылкой занимается LeadOutbox: команда
+deliver_leads или поток в run_unified_bot.
+
+Для каждой заявки ведётся LeadDelivery на каждого подписчика: при повторе
+заявка уходит только тем, кому не дошла. Повторы - с экспоненциальной
+паузой, после max_attempts попыток заявка помечается 'failed' и видна
+в админке.
+"""
+import threading
+from typing import Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+from loguru import logger
+
+from contacts.models import Lead, LeadDelivery
+from contacts.models.lead import DEFAULT_LEAD_MAX_ATTEMPTS
+from contacts.services.telegram_service import TelegramService, SEND_OK, SEND_CHAT_GONE
+
+# Сколько заявок рассылать за один проход
+DEFAULT_LEAD_BATCH = 20
+# Как часто проверять outbox (секунды)
+DEFAULT_LEAD_POLL_INTERVAL = 2
+# Сколько ждать поток при остановке (секунды)
+SHUTDOWN_TIMEOUT = 30
+
+DELIVERY_STATUSES = {
+    SEND_OK: LeadDelivery.STATUS_SENT,
+    SEND_CHAT_GONE: LeadDelivery.STATUS_CHAT_GONE,
+}
+
+
+class LeadOutbox:
+    """
+    Рассылка заявок из outbox
+
+    Использование:
+        outbox = LeadOutbox()
+        outbox.deliver_pending()   # один проход (cron)
+        outbox.start()             # фоновый поток
+        ...
+        outbox.stop()
+
+    Args:
+        telegram_service: TelegramService (по умолчанию новый)
+        batch_size: Сколько заявок рассылать за один проход
+        poll_interval: Пауза между проходами фонового потока
+        max_attempts: Попыток до 'failed' (по умолчанию LEAD_DELIVERY_MAX_ATTEMPTS)
+    """
+
+    def __init__(
+        self,
+        telegram_service: Optional[TelegramService] = None,
+        batch_size: int = DEFAULT_LEAD_BATCH,
+        poll_interval: float = DEFAULT_LEAD_POLL_INTERVAL,
+        max_attempts: Optional[int] = None,
+    ):
+        if max_attempts is None:
+            max_attempts = getattr(settings, 'LEAD_DELIVERY_MAX_ATTEMPTS', DEFAULT_LEAD_MAX_ATTEMPTS)
+        self.telegram_service = telegram_service or TelegramService()
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max(1, max_attempts)
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def deliver_pending(self) -> int:
+        """
+        Рассылает заявки, которые пора отправить
+
+        Returns:
+            Сколько заявок взято в рассылку
+        """
+        requeued = Lead.requeue_stale()
+        if requeued:
+            logger.info(f'♻️  Возвращено в outbox незавершённых заявок: {requeued}')
+
+        # Заявки забираются по одной: захват действует LEAD_SENDING_TIMEOUT
+        # с начала рассылки именно этой заявки, а не всего прохода
+        claimed = 0
+        while claimed < self.batch_size and not self._stopping.is_set():
+            leads = Lead.claim_pending(1)
+            if not leads:
+                break
+            lead = leads[0]
+            claimed += 1
+            try:
+                self.deliver(lead)
+            except Exception as e:
+                logger.error(f'Ошибка при рассылке заявки {lead.id}: {e}')
+                logger.exception(e)
+                self._retry_later(lead, str(e))
+        return claimed
+
+    def deliver(self, lead: Lead) -> bool:
+        """
+        Отправляет заявку подписчикам, которые её ещё не получили
+
+        Returns:
+            True если заявка доставлена
+        """
+        deliveries = {delivery.chat_id: delivery for delivery in lead.deliveries.all()}
+        # Новые подписчики тоже получают заявку, пока она не доставлена
+        new_deliveries = [
+            LeadDelivery(lead=lead, chat_id=str(chat_id))
+            for chat_id in self.telegram_service.get_subscribers()
+            if str(chat_id) not in deliveries
+        ]
+        if new_deliveries:
+            LeadDelivery.objects.bulk_create(new_deliveries, ignore_conflicts=True)
+            # С ignore_conflicts объекты в памяти могут не совпадать с записями в базе
+            # (строку успел вставить другой обработчик) - обновлять нужно записи из базы
+            deliveries = {delivery.chat_id: delivery for delivery in lead.deliveries.all()}
+
+        to_send = [delivery for delivery in deliveries.values() if not delivery.is_final]
+        if to_send:
+            text = TelegramService.format_contact_request(lead.name, lead.phone, lead.email, lead.message)
+            results = self.telegram_service.send_to_subscribers(text, [delivery.chat_id for delivery in to_send])
+            now = timezone.now()
+            for delivery in to_send:
+                delivery.status = DELIVERY_STATUSES.get(results.get(delivery.chat_id), LeadDelivery.STATUS_FAILED)
+                delivery.attempts += 1
+                delivery.updated_at = now
+                if delivery.status == LeadDelivery.STATUS_SENT:
+                    delivery.sent_at = now
+            LeadDelivery.objects.bulk_update(to_send, ['status', 'attempts', 'sent_at', 'updated_at'])
+
+        statuses = [delivery.status for delivery in deliveries.values()]
+        failed = statuses.count(LeadDelivery.STATUS_FAILED)
+        if not failed and LeadDelivery.STATUS_SENT in statuses:
+            if not lead.mark_delivered():
+                logger.warning(f'⚠️  Заявка {lead.id}: захват истёк, статус ведёт другой обработчик')
+                return False
+            logger.info(f'✅ Заявка {lead.id} доставлена подписчикам: {statuses.count(LeadDelivery.STATUS_SENT)}')
+            return True
+
+        error = f'Не доставлено подписчикам: {failed}' if failed else 'Нет активных подписчиков'
+        self._retry_later(lead, error)
+        return False
+
+    def _retry_later(self, lead: Lead, error: str):
+        """Откладывает заявку до следующей попытки или помечает недоставленной"""
+        if not lead.mark_failed(error, self.max_attempts):
+            logger.warning(f'⚠️  Заявка {lead.id}: {error}; захват истёк, статус ведёт другой обработчик')
+        elif lead.status == Lead.STATUS_FAILED:
+            logger.error(f'❌ Заявка {lead.id} ({lead.name}, {lead.phone}) не доставлена: {error}')
+        else:
+            logger.warning(f'🔁 Заявка {lead.id}: {error}, повтор через {lead.retry_delay(lead.attempts)} сек.')
+
+    def start(self):
+        """Запускает фоновый поток рассылки"""
+        self._stopping.clear()
+        self._thread = threading.Thread(target=self._run, name='lead-outbox', daemon=True)
+        self._thread.start()
+        logger.info(f'📨 Outbox заявок: проверка каждые {self.poll_interval} сек., попыток на заявку: {self.max_attempts}')
+
+    def stop(self, timeout: float = SHUTDOWN_TIMEOUT):
+        """Останавливает поток; начатая рассылка дорабатывается"""
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def run_forever(self):
+        """Рассылает заявки до Ctrl+C"""
+        try:
+            self._run()
+        except KeyboardInterrupt:
+            logger.info('Outbox заявок остановлен')
+
+    def _run(self):
+        """Цикл фонового потока"""
+        while not self._stopping.is_set():
+            self._run_once()
+            self._stopping.wait(self.poll_interval)
+
+    def _run_once(self):
+        close_old_connections()
+        try:
+            self.deliver_pending()
+        except Exception as e:
+            # Ошибка самого outbox (например, база недоступна) - заявки остаются в базе
+            logger.error(f'Ошибка outbox заявок: {e}')
+            logger.exception(e)
+        finally:
+            close_old_connections()
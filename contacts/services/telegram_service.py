@@ -2,10 +2,21 @@
 Сервис для отправки заявок в Telegram
 """
 import os
-from typing import List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from django.conf import settings
 from loguru import logger
 import requests
-from contacts.utils import SubscribersManager
+from core.services import get_telegram_client
+from contacts.utils import get_subscribers_manager
+
+# Результаты отправки одному получателю
+SEND_OK = 'sent'
+SEND_CHAT_GONE = 'chat_gone'  # чат не найден или бот заблокирован - подписчик удаляется
+SEND_FAILED = 'failed'  # временная ошибка (таймаут, 5xx, ...)
+
+# Сколько получателей уведомлять параллельно
+DEFAULT_SEND_WORKERS = 10
 
 
 class TelegramService:
@@ -13,7 +24,8 @@ class TelegramService:
     Сервис для работы с Telegram Bot API
     
     Отправляет заявки с контактной формы в Telegram через Bot API
-    Поддерживает отправку нескольким подписчикам
+    Поддерживает отправку нескольким подписчикам: сообщения уходят
+    параллельно, лимиты Telegram соблюдает общий клиент Bot API
     """
     
     def __init__(self):
@@ -21,8 +33,8 @@ class TelegramService:
         Инициализация сервиса с токеном бота
         """
         self.token = os.environ.get('TELEGRAM_BOT_TOKEN', '8389210453:AAE0pUO2PflNa8UWqXWRN-SEnf8LvplsdrA')
-        self.api_url = f'https://api.telegram.org/bot{self.token}'
-        self.subscribers_manager = SubscribersManager()
+        self.telegram = get_telegram_client(self.token)
+        self.subscribers_manager = get_subscribers_manager()
     
     def get_subscribers(self) -> List[str]:
         """
@@ -69,34 +81,53 @@ class TelegramService:
         Returns:
             Количество успешно отправленных сообщений
         """
-        subscribers = self.get_subscribers()
+        results = self.send_to_subscribers(text)
+        return sum(1 for status in results.values() if status == SEND_OK)
+    
+    def send_to_subscribers(self, text: str, subscribers: Optional[List[str]] = None) -> Dict[str, str]:
+        """
+        Отправляет сообщение подписчикам параллельно
+        
+        Время ответа ограничено самой медленной отправкой, а не их суммой.
+        Подписчики, чей чат не найден или заблокировал бота, удаляются.
+        
+        Args:
+            text: Текст сообщения
+            subscribers: chat_id получателей (по умолчанию - все подписчики)
+        
+        Returns:
+            Результат для каждого получателя: {chat_id: SEND_OK | SEND_CHAT_GONE | SEND_FAILED}
+        """
+        if subscribers is None:
+            subscribers = self.get_subscribers()
         
         logger.info(f'Попытка отправить сообщение подписчикам. Найдено подписчиков: {len(subscribers)}')
         logger.debug(f'Список подписчиков: {list(subscribers)}')
-        logger.debug(f'Путь к файлу подписчиков: {self.subscribers_manager.subscribers_file}')
+        logger.debug(f'Хранилище подписчиков: {self.subscribers_manager.location}')
         
         if not subscribers:
             logger.warning('Нет подписчиков. Запустите бота командой: python manage.py run_telegram_bot и отправьте ему /start')
-            logger.warning(f'Файл подписчиков: {self.subscribers_manager.subscribers_file}')
-            logger.warning(f'Файл существует: {self.subscribers_manager.subscribers_file.exists()}')
-            return 0
+            logger.warning(f'Хранилище подписчиков: {self.subscribers_manager.location}')
+            return {}
         
-        success_count = 0
-        failed_chat_ids = []
-        
-        for chat_id in subscribers:
-            if self._send_to_chat(text, chat_id):
-                success_count += 1
-            else:
-                failed_chat_ids.append(chat_id)
+        max_workers = getattr(settings, 'TELEGRAM_SEND_WORKERS', DEFAULT_SEND_WORKERS)
+        if len(subscribers) == 1 or max_workers <= 1:
+            statuses = [self._deliver(text, chat_id) for chat_id in subscribers]
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(subscribers)), thread_name_prefix='telegram-send') as pool:
+                statuses = list(pool.map(lambda chat_id: self._deliver(text, chat_id), subscribers))
+        results = dict(zip(subscribers, statuses))
         
-        # Удаляем неактивных подписчиков (если чат не найден или заблокирован)
-        for chat_id in failed_chat_ids:
-            logger.warning(f'Удаление неактивного подписчика: {chat_id}')
-            self.subscribers_manager.remove_subscriber(chat_id)
+        # Отписываем неактивных подписчиков (если чат не найден или заблокирован) - одним запросом
+        gone_chat_ids = [chat_id for chat_id, status in results.items() if status == SEND_CHAT_GONE]
+        if gone_chat_ids:
+            logger.warning(f'Удаление неактивных подписчиков: {gone_chat_ids}')
+            self.subscribers_manager.remove_subscribers(gone_chat_ids)
+        self.subscribers_manager.record_deliveries(results)
         
+        success_count = sum(1 for status in statuses if status == SEND_OK)
         logger.info(f'Сообщение отправлено {success_count} из {len(subscribers)} подписчиков')
-        return success_count
+        return results
     
     def _send_to_chat(self, text: str, chat_id: str) -> bool:
         """
@@ -109,36 +140,50 @@ class TelegramService:
         Returns:
             True если сообщение отправлено успешно
         """
+        return self._deliver(text, chat_id) == SEND_OK
+    
+    def _deliver(self, text: str, chat_id: str) -> str:
+        """
+        Отправляет сообщение в чат
+        
+        Args:
+            text: Текст сообщения
+            chat_id: ID чата
+        
+        Returns:
+            SEND_OK, SEND_CHAT_GONE или SEND_FAILED
+        """
         try:
-            url = f'{self.api_url}/sendMessage'
             payload = {
                 'chat_id': chat_id,
                 'text': text,
                 'parse_mode': 'HTML'
             }
             
-            response = requests.post(url, json=payload, timeout=10)
+            response = self.telegram.post('sendMessage', json=payload)
             response.raise_for_status()
             
             logger.debug(f'Сообщение успешно отправлено в Telegram (chat_id: {chat_id})')
-            return True
+            return SEND_OK
             
         except requests.exceptions.HTTPError as e:
             # Если чат не найден или заблокирован
-            if e.response and e.response.status_code == 400:
-                error_data = e.response.json()
-                error_description = error_data.get('description', '')
+            if e.response is not None and e.response.status_code in (400, 403):
+                try:
+                    error_description = e.response.json().get('description', '')
+                except ValueError:
+                    error_description = ''
                 if 'chat not found' in error_description.lower() or 'blocked' in error_description.lower():
                     logger.warning(f'Чат {chat_id} не найден или заблокирован')
-                    return False
+                    return SEND_CHAT_GONE
             logger.error(f'Ошибка HTTP при отправке сообщения в Telegram (chat_id: {chat_id}): {e}')
-            return False
+            return SEND_FAILED
         except requests.exceptions.RequestException as e:
             logger.error(f'Ошибка при отправке сообщения в Telegram (chat_id: {chat_id}): {e}')
-            return False
+            return SEND_FAILED
         except Exception as e:
             logger.error(f'Неожиданная ошибка при отправке сообщения в Telegram (chat_id: {chat_id}): {e}')
-            return False
+            return SEND_FAILED
     
     def send_contact_request(
         self,
@@ -150,6 +195,9 @@ class TelegramService:
         """
         Отправляет заявку с контактной формы в Telegram всем подписчикам
         
+        Форма сайта отправляет заявки через outbox (contacts.models.Lead);
+        этот метод - для синхронной отправки из кода и консоли.
+        
         Args:
             name: Имя клиента
             phone: Телефон
@@ -159,20 +207,36 @@ class TelegramService:
         Returns:
             True если заявка отправлена хотя бы одному подписчику, False в противном случае
         """
-        # Форматируем сообщение
-        text = f'<b>📋 Новая заявка с сайта Avto-Декор</b>\n\n'
-        text += f'<b>Имя:</b> {self._escape_html(name)}\n'
-        text += f'<b>Телефон:</b> {self._escape_html(phone)}\n'
-        
-        if email:
-            text += f'<b>Email:</b> {self._escape_html(email)}\n'
-        
-        text += f'\n<b>Сообщение:</b>\n{self._escape_html(message)}'
+        text = self.format_contact_request(name, phone, email, message)
         
         # Отправляем всем подписчикам
         success_count = self.send_to_all_subscribers(text)
         return success_count > 0
     
+    @classmethod
+    def format_contact_request(cls, name: str, phone: str, email: str = '', message: str = '') -> str:
+        """
+        Форматирует заявку для отправки в Telegram (HTML)
+        
+        Args:
+            name: Имя клиента
+            phone: Телефон
+            email: Email (опционально)
+            message: Сообщение/заявка
+        
+        Returns:
+            Текст сообщения
+        """
+        text = f'<b>📋 Новая заявка с сайта Avto-Декор</b>\n\n'
+        text += f'<b>Имя:</b> {cls._escape_html(name)}\n'
+        text += f'<b>Телефон:</b> {cls._escape_html(phone)}\n'
+        
+        if email:
+            text += f'<b>Email:</b> {cls._escape_html(email)}\n'
+        
+        text += f'\n<b>Сообщение:</b>\n{cls._escape_html(message)}'
+        return text
+    
     @staticmethod
     def _escape_html(text: str) -> str:
         """
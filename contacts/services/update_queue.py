@@ -0,0 +1,204 @@
+"""
+Пул обработчиков очереди обновлений Telegram (TelegramUpdate)
+
+Приём и обработка разделены: приёмник (webhook-view или поллер
+run_unified_bot) сначала записывает update в базу и только потом
+сдвигает offset, а обработкой занимаются потоки этого пула - в том же
+процессе или в отдельном (run_unified_bot --source queue).
+
+Доставка "как минимум один раз": обновление, обработка которого упала,
+повторяется с экспоненциальной паузой; после max_attempts попыток оно
+переводится в 'dead'. Обновления, брошенные упавшим процессом,
+возвращаются в очередь по истечении захвата (PROCESSING_TIMEOUT).
+"""
+import threading
+import time
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.db import close_old_connections
+from loguru import logger
+
+from contacts.models import TelegramUpdate
+from contacts.models.telegram_update import (
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_DONE_RETENTION_DAYS,
+    DEFAULT_DEAD_RETENTION_DAYS,
+)
+
+# Потоков-обработчиков: 1 сохраняет порядок постов и медиа-групп
+DEFAULT_QUEUE_WORKERS = 1
+# Сколько обновлений забирать за раз
+DEFAULT_CLAIM_BATCH = 50
+# Пауза, когда очередь пуста (секунды)
+DEFAULT_QUEUE_POLL_INTERVAL = 1
+# Как часто искать брошенные обновления (секунды)
+STALE_CHECK_INTERVAL = 60
+# Как часто удалять старые обработанные обновления (секунды)
+PURGE_INTERVAL = 60 * 60
+# Сколько ждать потоки при остановке (секунды)
+SHUTDOWN_TIMEOUT = 30
+
+
+def process_update(queued: TelegramUpdate, handle_update: Callable[[dict], None], max_attempts: int) -> bool:
+    """
+    Обрабатывает захваченное обновление и записывает результат
+    
+    Returns:
+        True если обработка прошла успешно
+    """
+    try:
+        handle_update(queued.payload)
+    except Exception as e:
+        logger.error(f'Ошибка при обработке update {queued.update_id} (попытка {queued.attempts}): {e}')
+        logger.exception(e)
+        delay = queued.mark_failed(str(e), max_attempts)
+        if delay is None:
+            logger.error(f'☠️  Update {queued.update_id}: попытки исчерпаны, отложен в dead')
+        else:
+            logger.info(f'🔁 Update {queued.update_id}: повтор через {delay} сек.')
+        return False
+    queued.mark_done()
+    return True
+
+
+def purge_finished_updates():
+    """Удаляет старые done/dead обновления (сроки - TELEGRAM_UPDATE_*_RETENTION_DAYS)"""
+    purged = TelegramUpdate.purge_finished(
+        getattr(settings, 'TELEGRAM_UPDATE_DONE_RETENTION_DAYS', DEFAULT_DONE_RETENTION_DAYS),
+        getattr(settings, 'TELEGRAM_UPDATE_DEAD_RETENTION_DAYS', DEFAULT_DEAD_RETENTION_DAYS),
+    )
+    if purged:
+        logger.info(f'🧹 Удалено старых обновлений из очереди: {purged}')
+
+
+class UpdateQueueWorkers:
+    """
+    Потоки, разбирающие очередь TelegramUpdate
+
+    Использование:
+        workers = UpdateQueueWorkers(handle_update, workers=2)
+        workers.start()
+        ...
+        workers.wake()  # после записи новых обновлений
+        ...
+        workers.stop()
+
+    Args:
+        handle_update: Обработчик update (синхронный); исключение - неудачная попытка
+        workers: Количество потоков
+        batch_size: Сколько обновлений поток забирает за раз
+        poll_interval: Пауза, когда очередь пуста
+        max_attempts: Попыток до 'dead' (по умолчанию TELEGRAM_UPDATE_MAX_ATTEMPTS)
+        idle_tick: Периодическая задача (например, импорт собранных медиа-групп) или None
+    """
+
+    def __init__(
+        self,
+        handle_update: Callable[[dict], None],
+        workers: int = DEFAULT_QUEUE_WORKERS,
+        batch_size: int = DEFAULT_CLAIM_BATCH,
+        poll_interval: float = DEFAULT_QUEUE_POLL_INTERVAL,
+        max_attempts: Optional[int] = None,
+        idle_tick: Optional[Callable[[], None]] = None,
+    ):
+        if max_attempts is None:
+            max_attempts = getattr(settings, 'TELEGRAM_UPDATE_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+        self.handle_update = handle_update
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.poll_interval = poll_interval
+        self.max_attempts = max(1, max_attempts)
+        self.idle_tick = idle_tick
+        self._stopping = threading.Event()
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._stale_lock = threading.Lock()
+        self._stale_checked_at = 0
+        self._purged_at = 0
+
+    def start(self):
+        """Запускает потоки-обработчики"""
+        self._requeue_stale(force=True)
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._run, name=f'bot-queue-{number + 1}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info(f'📬 Обработчиков очереди обновлений: {self.workers}, попыток на обновление: {self.max_attempts}')
+
+    def wake(self):
+        """Будит обработчики, не дожидаясь poll_interval"""
+        self._wakeup.set()
+
+    def stop(self, timeout: float = SHUTDOWN_TIMEOUT):
+        """Останавливает потоки; начатые обновления дорабатываются"""
+        self._stopping.set()
+        self._wakeup.set()
+        deadline = time.monotonic() + timeout
+        for thread in self._threads:
+            thread.join(max(0, deadline - time.monotonic()))
+        if any(thread.is_alive() for thread in self._threads):
+            logger.warning('⚠️  Не все обработчики очереди завершились до остановки')
+        self._threads = []
+
+    def run_forever(self):
+        """Запускает потоки и ждёт Ctrl+C (процесс, который только обрабатывает очередь)"""
+        self.start()
+        try:
+            while not self._stopping.is_set():
+                time.sleep(1)
+        except KeyboardInterrupt:
+            logger.info('Получен сигнал остановки. Завершаю обработку очереди...')
+        finally:
+            self.stop()
+
+    def process_batch(self) -> int:
+        """
+        Забирает и обрабатывает одну пачку обновлений
+
+        Returns:
+            Сколько обновлений взято в обработку
+        """
+        self._requeue_stale()
+        queued_updates = TelegramUpdate.claim_pending(self.batch_size)
+        for queued in queued_updates:
+            process_update(queued, self.handle_update, self.max_attempts)
+        return len(queued_updates)
+
+    def _run(self):
+        """Цикл потока-обработчика"""
+        while not self._stopping.is_set():
+            close_old_connections()
+            try:
+                processed = self.process_batch()
+                if self.idle_tick:
+                    self.idle_tick()
+            except Exception as e:
+                # Ошибка самой очереди (например, база недоступна) - обновления остаются в базе
+                logger.error(f'Ошибка очереди обновлений: {e}')
+                logger.exception(e)
+                processed = 0
+            finally:
+                close_old_connections()
+
+            if not processed:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+
+    def _requeue_stale(self, force: bool = False):
+        """Возвращает в очередь брошенные обновления (не чаще STALE_CHECK_INTERVAL)"""
+        with self._stale_lock:
+            now = time.monotonic()
+            if not force and now - self._stale_checked_at < STALE_CHECK_INTERVAL:
+                return
+            self._stale_checked_at = now
+        requeued = TelegramUpdate.requeue_stale(self.max_attempts)
+        if requeued:
+            logger.info(f'♻️  Возвращено в очередь незавершённых обновлений: {requeued}')
+        
+        # Очистка - заодно с поиском брошенных, но реже
+        with self._stale_lock:
+            if now - self._purged_at < PURGE_INTERVAL:
+                return
+            self._purged_at = now
+        purge_finished_updates()
@@ -2,12 +2,13 @@
 URL-конфигурация для contacts приложения
 """
 from django.urls import path
-from contacts.views import ContactsView, submit_contact_form_ajax
+from contacts.views import ContactsView, submit_contact_form_ajax, telegram_webhook
 
 app_name = 'contacts'
 
 urlpatterns = [
     path('', ContactsView.as_view(), name='contacts'),
     path('submit-form/', submit_contact_form_ajax, name='submit_form_ajax'),
+    path('telegram/webhook/', telegram_webhook, name='telegram_webhook'),
 ]
 
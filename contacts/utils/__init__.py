@@ -2,5 +2,13 @@
 Утилиты для contacts приложения
 """
 from .subscribers_manager import SubscribersManager
+from .database_subscribers_manager import DatabaseSubscribersManager, get_subscribers_manager
+from .media_group_aggregator import MediaGroupAggregator, MediaGroup
 
-__all__ = ['SubscribersManager']
+__all__ = [
+    'SubscribersManager',
+    'DatabaseSubscribersManager',
+    'get_subscribers_manager',
+    'MediaGroupAggregator',
+    'MediaGroup',
+]
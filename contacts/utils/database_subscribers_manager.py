@@ -0,0 +1,94 @@
+"""
+Подписчики Telegram бота в базе данных (contacts.Subscriber)
+
+Тот же интерфейс, что и у файлового SubscribersManager, но каждая
+операция - индексный запрос по chat_id: сайт и бот могут менять
+подписки одновременно, ничего не теряя. Какое хранилище используется,
+задаёт настройка TELEGRAM_SUBSCRIBERS_BACKEND ('db' или 'file');
+перенос подписчиков из JSON файла - команда import_subscribers.
+"""
+from typing import Dict, Iterable, Set, Union
+
+from django.conf import settings
+
+from contacts.models import Subscriber
+from .subscribers_manager import SubscribersManager
+
+
+class DatabaseSubscribersManager:
+    """
+    Управление подписчиками (chat_id) через модель Subscriber
+    
+    Отписка не удаляет запись, а деактивирует её.
+    """
+    
+    location = 'база данных (contacts.Subscriber)'
+    
+    def get_subscribers(self) -> Set[str]:
+        """
+        Получает список всех подписчиков
+        
+        Returns:
+            Множество chat_id активных подписчиков
+        """
+        return Subscriber.active_chat_ids()
+    
+    def add_subscriber(self, chat_id: str) -> bool:
+        """
+        Добавляет подписчика
+        
+        Returns:
+            True если подписчик добавлен, False если уже подписан
+        """
+        return bool(self.add_subscribers([chat_id]))
+    
+    def add_subscribers(self, chat_ids: Iterable[str]) -> Set[str]:
+        """
+        Подписывает chat_id пачкой
+        
+        Returns:
+            chat_id, которые до этого не были подписаны
+        """
+        return Subscriber.activate(chat_ids)
+    
+    def remove_subscriber(self, chat_id: str) -> bool:
+        """
+        Отписывает подписчика
+        
+        Returns:
+            True если подписчик был подписан
+        """
+        return bool(self.remove_subscribers([chat_id]))
+    
+    def remove_subscribers(self, chat_ids: Iterable[str]) -> Set[str]:
+        """
+        Отписывает chat_id пачкой
+        
+        Returns:
+            chat_id, которые были подписаны
+        """
+        return Subscriber.deactivate(chat_ids)
+    
+    def is_subscribed(self, chat_id: str) -> bool:
+        """Проверяет, подписан ли пользователь"""
+        return Subscriber.objects.filter(chat_id=str(chat_id), status=Subscriber.STATUS_ACTIVE).exists()
+    
+    def get_count(self) -> int:
+        """Возвращает количество подписчиков"""
+        return Subscriber.objects.filter(status=Subscriber.STATUS_ACTIVE).count()
+    
+    def record_deliveries(self, results: Dict[str, str]):
+        """
+        Записывает результаты рассылки заявки
+        
+        Args:
+            results: {chat_id: 'sent' | 'failed' | 'chat_gone'}
+        """
+        Subscriber.record_deliveries(results)
+
+
+def get_subscribers_manager() -> Union[DatabaseSubscribersManager, SubscribersManager]:
+    """Хранилище подписчиков по настройке TELEGRAM_SUBSCRIBERS_BACKEND"""
+    if getattr(settings, 'TELEGRAM_SUBSCRIBERS_BACKEND', 'db') == 'file':
+        return SubscribersManager()
+    return DatabaseSubscribersManager()
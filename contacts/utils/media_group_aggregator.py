@@ -0,0 +1,365 @@
+"""
+Сборка медиа-групп (альбомов) из постов канала
+
+Telegram присылает альбом отдельными channel_post с общим media_group_id
+и не сообщает, сколько в нём элементов. Группа считается собранной, когда
+после последнего элемента прошло MEDIA_GROUP_QUIET_WINDOW секунд или
+набрано MEDIA_GROUP_MAX_ITEMS элементов (больше в альбоме не бывает).
+
+Память ограничена: незавершённых групп не больше max_pending_groups
+(при переполнении самая старая отдаётся как есть), а список уже собранных
+групп - последние completed_limit идентификаторов.
+
+Незавершённые группы сохраняются в JSON файл, поэтому перезапуск бота
+посреди альбома не разбивает его на несколько статей.
+
+Отданная группа считается собранной только после complete(): пока её
+импортируют, она остаётся в файле, а release() после неудачного импорта
+возвращает её в буфер - повтор с экспоненциальной паузой. После
+max_attempts неудач группа отбрасывается, как update в статусе 'dead'.
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Optional
+
+from django.conf import settings
+from loguru import logger
+
+# Тишина после последнего элемента, после которой группа считается полной (секунды)
+MEDIA_GROUP_QUIET_WINDOW = 3
+# Максимум элементов в альбоме Telegram
+MEDIA_GROUP_MAX_ITEMS = 10
+# Сколько групп может собираться одновременно
+MAX_PENDING_GROUPS = 50
+# Сколько идентификаторов собранных групп помнить (для опоздавших элементов)
+COMPLETED_GROUPS_LIMIT = 1000
+# Сколько помнить собранную группу (секунды)
+COMPLETED_GROUPS_TTL = 24 * 60 * 60
+# Пауза перед повторным импортом: MEDIA_GROUP_RETRY_BASE_DELAY * 2^(попытка - 1),
+# но не больше MEDIA_GROUP_RETRY_MAX_DELAY (секунды)
+MEDIA_GROUP_RETRY_BASE_DELAY = 10
+MEDIA_GROUP_RETRY_MAX_DELAY = 60 * 60
+# Попыток импорта группы, прежде чем она будет отброшена
+# (по умолчанию TELEGRAM_UPDATE_MAX_ATTEMPTS - как для обычных постов)
+MEDIA_GROUP_MAX_ATTEMPTS = 5
+
+
+class MediaGroup:
+    """
+    Собираемая медиа-группа
+
+    Attributes:
+        media_group_id: ID группы
+        items: Список {'update_id': ..., 'post': ...} в порядке message_id
+        first_seen: Время первого элемента (unix time)
+        last_seen: Время последнего элемента (unix time)
+        attempts: Сколько раз импорт группы не удался
+        retry_at: Не импортировать раньше этого времени (unix time)
+    """
+
+    def __init__(
+        self,
+        media_group_id: str,
+        items: Optional[list] = None,
+        first_seen: float = 0,
+        last_seen: float = 0,
+        attempts: int = 0,
+        retry_at: float = 0,
+    ):
+        self.media_group_id = media_group_id
+        self.items = items or []
+        self.first_seen = first_seen
+        self.last_seen = last_seen
+        self.attempts = attempts
+        self.retry_at = retry_at
+
+    @property
+    def posts(self) -> List[dict]:
+        return [item['post'] for item in self.items]
+
+    @property
+    def last_update_id(self) -> Optional[int]:
+        update_ids = [item['update_id'] for item in self.items if item.get('update_id')]
+        return max(update_ids) if update_ids else None
+
+    def add(self, post: dict, update_id: Optional[int], now: float) -> bool:
+        """
+        Добавляет элемент; повторно присланный message_id игнорируется
+
+        Returns:
+            True если элемент добавлен
+        """
+        message_id = post.get('message_id')
+        if any(item['post'].get('message_id') == message_id for item in self.items):
+            return False
+        self.items.append({'update_id': update_id, 'post': post})
+        self.items.sort(key=lambda item: item['post'].get('message_id') or 0)
+        if not self.first_seen:
+            self.first_seen = now
+        self.last_seen = now
+        return True
+
+    def to_dict(self) -> dict:
+        return {
+            'media_group_id': self.media_group_id,
+            'items': self.items,
+            'first_seen': self.first_seen,
+            'last_seen': self.last_seen,
+            'attempts': self.attempts,
+            'retry_at': self.retry_at,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'MediaGroup':
+        return cls(
+            data['media_group_id'],
+            items=data.get('items', []),
+            first_seen=data.get('first_seen', 0),
+            last_seen=data.get('last_seen', 0),
+            attempts=data.get('attempts', 0),
+            retry_at=data.get('retry_at', 0),
+        )
+
+
+class MediaGroupAggregator:
+    """
+    Буфер медиа-групп с отдачей по окну тишины
+
+    Использование:
+        aggregator = MediaGroupAggregator()
+        for group in aggregator.add(post, update_id) + aggregator.pop_ready():
+            try:
+                import_posts(group.posts)
+            except Exception:
+                aggregator.release(group)  # повторить позже (или отбросить)
+            else:
+                aggregator.complete(group)
+
+    Args:
+        storage_file: JSON файл для незавершённых групп (None - TELEGRAM_MEDIA_GROUPS_FILE)
+        quiet_window: Окно тишины в секундах
+        max_items: Элементов в группе, после которых она отдаётся сразу
+        max_pending_groups: Лимит одновременно собираемых групп
+        completed_limit: Сколько собранных групп помнить
+        max_attempts: Попыток импорта группы (по умолчанию TELEGRAM_UPDATE_MAX_ATTEMPTS)
+    """
+
+    def __init__(
+        self,
+        storage_file: Optional[str] = None,
+        quiet_window: float = MEDIA_GROUP_QUIET_WINDOW,
+        max_items: int = MEDIA_GROUP_MAX_ITEMS,
+        max_pending_groups: int = MAX_PENDING_GROUPS,
+        completed_limit: int = COMPLETED_GROUPS_LIMIT,
+        max_attempts: Optional[int] = None,
+    ):
+        if max_attempts is None:
+            max_attempts = getattr(settings, 'TELEGRAM_UPDATE_MAX_ATTEMPTS', MEDIA_GROUP_MAX_ATTEMPTS)
+        if storage_file is None:
+            storage_file = os.environ.get(
+                'TELEGRAM_MEDIA_GROUPS_FILE',
+                str(Path(settings.BASE_DIR) / 'data' / 'telegram_media_groups.json')
+            )
+        self.storage_file = Path(storage_file)
+        self.storage_file.parent.mkdir(parents=True, exist_ok=True)
+        self.quiet_window = quiet_window
+        self.max_items = max_items
+        self.max_pending_groups = max(1, max_pending_groups)
+        self.completed_limit = max(1, completed_limit)
+        self.max_attempts = max(1, max_attempts)
+        # media_group_id -> MediaGroup, от старых к новым
+        self._pending = OrderedDict()
+        # media_group_id -> MediaGroup, отданные на импорт и ещё не подтверждённые
+        self._importing = {}
+        # media_group_id -> время сборки
+        self._completed = OrderedDict()
+        self._lock = threading.Lock()
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def has_pending(self) -> bool:
+        """Есть ли незавершённые группы"""
+        return bool(self._pending)
+
+    def add(self, post: dict, update_id: Optional[int] = None) -> List[MediaGroup]:
+        """
+        Добавляет пост медиа-группы в буфер
+
+        Args:
+            post: channel_post с media_group_id
+            update_id: ID обновления
+
+        Returns:
+            Группы, готовые к импорту: эта группа, если набрала max_items,
+            и самая старая группа, если буфер переполнен
+        """
+        media_group_id = str(post['media_group_id'])
+        now = time.time()
+        ready = []
+
+        with self._lock:
+            if media_group_id in self._completed:
+                logger.warning(
+                    f'⏭️  Пост #{post.get("message_id")}: медиа-группа {media_group_id} уже импортирована, '
+                    f'элемент пришёл после окна {self.quiet_window} сек.'
+                )
+                return ready
+
+            importing = self._importing.get(media_group_id)
+            if importing is not None:
+                # Импорт уже идёт: элемент попадёт в статью, только если импорт придётся повторить
+                if importing.add(post, update_id, now):
+                    logger.warning(
+                        f'⚠️  Пост #{post.get("message_id")}: медиа-группа {media_group_id} уже импортируется'
+                    )
+                    self._save()
+                return ready
+
+            group = self._pending.get(media_group_id)
+            if group is None:
+                group = MediaGroup(media_group_id)
+                self._pending[media_group_id] = group
+            if not group.add(post, update_id, now):
+                return ready
+            logger.debug(f'📎 Медиа-группа {media_group_id}: {len(group.items)} элем.')
+
+            if len(group.items) >= self.max_items and group.retry_at <= now:
+                ready.append(self._take(media_group_id))
+
+            while len(self._pending) > self.max_pending_groups:
+                oldest_id = next(iter(self._pending))
+                logger.warning(f'⚠️  Слишком много незавершённых медиа-групп, импортирую {oldest_id} досрочно')
+                ready.append(self._take(oldest_id))
+
+            self._save()
+        return ready
+
+    def pop_ready(self, now: Optional[float] = None) -> List[MediaGroup]:
+        """
+        Забирает группы, в которые ничего не приходило quiet_window секунд
+        (и у которых истекла пауза перед повтором)
+
+        Returns:
+            Готовые группы в порядке появления
+        """
+        if not self._pending:
+            return []
+        now = now or time.time()
+        with self._lock:
+            ready_ids = [
+                media_group_id for media_group_id, group in self._pending.items()
+                if self._ready_at(group) <= now
+            ]
+            ready = [self._take(media_group_id) for media_group_id in ready_ids]
+        return ready
+
+    def complete(self, group: MediaGroup):
+        """Группа импортирована: опоздавшие элементы будут пропущены"""
+        now = time.time()
+        with self._lock:
+            self._importing.pop(group.media_group_id, None)
+            self._completed[group.media_group_id] = now
+            self._completed.move_to_end(group.media_group_id)
+            self._evict_completed(now)
+            self._save()
+
+    def release(self, group: MediaGroup) -> Optional[int]:
+        """
+        Импорт группы не удался: группа возвращается в буфер
+
+        После max_attempts неудач группа больше не импортируется: она
+        считается собранной, чтобы опоздавшие элементы не начали её заново.
+
+        Returns:
+            Пауза до повторного импорта в секундах или None, если попытки исчерпаны
+        """
+        now = time.time()
+        with self._lock:
+            group = self._importing.pop(group.media_group_id, group)
+            group.attempts += 1
+            if group.attempts >= self.max_attempts:
+                self._completed[group.media_group_id] = now
+                self._completed.move_to_end(group.media_group_id)
+                self._evict_completed(now)
+                self._save()
+                return None
+            delay = min(MEDIA_GROUP_RETRY_BASE_DELAY * 2 ** (group.attempts - 1), MEDIA_GROUP_RETRY_MAX_DELAY)
+            group.retry_at = now + delay
+            self._pending[group.media_group_id] = group
+            self._save()
+        return delay
+
+    def seconds_until_flush(self, now: Optional[float] = None) -> Optional[float]:
+        """
+        Сколько ждать до готовности ближайшей группы
+
+        Returns:
+            Секунды (0 если уже готова) или None, если групп нет
+        """
+        if not self._pending:
+            return None
+        now = now or time.time()
+        with self._lock:
+            ready_at = min(self._ready_at(group) for group in self._pending.values())
+        return max(0.0, ready_at - now)
+
+    def _ready_at(self, group: MediaGroup) -> float:
+        """Когда группу можно отдавать на импорт"""
+        return max(group.last_seen + self.quiet_window, group.retry_at)
+
+    def _take(self, media_group_id: str) -> MediaGroup:
+        """Отдаёт группу на импорт; в файле она остаётся до complete() (под self._lock)"""
+        group = self._pending.pop(media_group_id)
+        self._importing[media_group_id] = group
+        return group
+
+    def _evict_completed(self, now: float):
+        """Забывает старые собранные группы: по возрасту и по количеству"""
+        while self._completed:
+            media_group_id, completed_at = next(iter(self._completed.items()))
+            if len(self._completed) <= self.completed_limit and now - completed_at < COMPLETED_GROUPS_TTL:
+                break
+            self._completed.popitem(last=False)
+
+    def _load(self):
+        """Восстанавливает незавершённые группы после перезапуска"""
+        if not self.storage_file.exists():
+            return
+        try:
+            with open(self.storage_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f'Ошибка чтения файла медиа-групп {self.storage_file}: {e}')
+            return
+
+        for group_data in data.get('pending', []):
+            group = MediaGroup.from_dict(group_data)
+            self._pending[group.media_group_id] = group
+        for media_group_id, completed_at in data.get('completed', []):
+            self._completed[media_group_id] = completed_at
+        self._evict_completed(time.time())
+
+        if self._pending:
+            logger.info(f'♻️  Восстановлено незавершённых медиа-групп: {len(self._pending)}')
+
+    def _save(self):
+        """Атомарно записывает состояние буфера (под self._lock)"""
+        # Группы на импорте сохраняются как незавершённые: после падения их импорт повторится
+        groups = list(self._pending.values()) + list(self._importing.values())
+        data = {
+            'pending': [group.to_dict() for group in groups],
+            'completed': list(self._completed.items()),
+        }
+        temp_file = self.storage_file.with_suffix('.tmp')
+        try:
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(temp_file, self.storage_file)
+        except OSError as e:
+            logger.error(f'Ошибка записи файла медиа-групп {self.storage_file}: {e}')
@@ -1,19 +1,42 @@
 """
 Менеджер подписчиков Telegram бота
+
+Список хранится в JSON файле, который пишут и сайт, и бот. Чтобы не
+перечитывать файл на каждый вызов, разобранный список кэшируется на
+процесс и перечитывается, только когда у файла меняются inode, mtime
+или размер (запись идёт через os.replace, поэтому inode меняется при
+каждом сохранении).
+
+Изменения делаются под файловой блокировкой (fcntl.flock на .lock файле):
+файл перечитывается, изменения применяются пачкой и записываются одной
+атомарной заменой - параллельная запись из другого процесса не теряется.
 """
 import os
 import json
+import threading
 from pathlib import Path
-from typing import List, Set
+from typing import Callable, Dict, Iterable, Optional, Set, Tuple
 from loguru import logger
 from django.conf import settings
 
+try:
+    import fcntl
+except ImportError:  # Windows: межпроцессной блокировки нет, остаётся атомарная замена файла
+    fcntl = None
+
+# Кэш на процесс: путь к файлу -> (подпись файла, подписчики)
+_cache: Dict[str, Tuple[Optional[tuple], frozenset]] = {}
+_cache_lock = threading.Lock()
+# Блокировки записи внутри процесса (flock на разных дескрипторах одного процесса не всегда исключает друг друга)
+_write_locks: Dict[str, threading.Lock] = {}
+
 
 class SubscribersManager:
     """
     Управление списком подписчиков (chat_id) для Telegram бота
     
-    Хранит список подписчиков в JSON файле
+    Хранит список подписчиков в JSON файле; чтения обслуживаются из кэша
+    процесса, пока файл не изменился
     """
     
     def __init__(self):
@@ -27,31 +50,34 @@ class SubscribersManager:
         )
         self.subscribers_file = Path(subscribers_file)
         self.subscribers_file.parent.mkdir(parents=True, exist_ok=True)
+        self.lock_file = self.subscribers_file.with_suffix('.lock')
+        self._cache_key = str(self.subscribers_file.resolve())
+        with _cache_lock:
+            _write_locks.setdefault(self._cache_key, threading.Lock())
+    
+    @property
+    def location(self) -> str:
+        """Где хранятся подписчики (для логов)"""
+        return str(self.subscribers_file)
     
     def get_subscribers(self) -> Set[str]:
         """
         Получает список всех подписчиков
         
+        Файл читается, только если изменился с прошлого чтения.
+        
         Returns:
-            Множество chat_id подписчиков
+            Множество chat_id подписчиков (копия - её можно менять)
         """
-        if not self.subscribers_file.exists():
-            logger.debug(f'Файл подписчиков не существует: {self.subscribers_file}')
-            return set()
+        signature = self._signature()
+        cached = _cache.get(self._cache_key)
+        if cached is not None and cached[0] == signature:
+            return set(cached[1])
         
-        try:
-            with open(self.subscribers_file, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                subscribers = data.get('subscribers', [])
-                subscribers_set = set(str(chat_id) for chat_id in subscribers)
-                logger.debug(f'Загружено {len(subscribers_set)} подписчиков из файла {self.subscribers_file}')
-                return subscribers_set
-        except json.JSONDecodeError as e:
-            logger.error(f'Ошибка парсинга JSON файла подписчиков {self.subscribers_file}: {e}')
-            return set()
-        except Exception as e:
-            logger.error(f'Ошибка при чтении файла подписчиков {self.subscribers_file}: {e}')
-            return set()
+        subscribers = self._read_subscribers() if signature is not None else set()
+        with _cache_lock:
+            _cache[self._cache_key] = (signature, frozenset(subscribers))
+        return subscribers
     
     def add_subscriber(self, chat_id: str) -> bool:
         """
@@ -63,25 +89,39 @@ class SubscribersManager:
         Returns:
             True если подписчик добавлен, False если уже существует
         """
-        subscribers = self.get_subscribers()
         chat_id_str = str(chat_id)
-        
-        logger.info(f'Попытка добавить подписчика: {chat_id_str}. Текущее количество: {len(subscribers)}')
+        logger.info(f'Попытка добавить подписчика: {chat_id_str}')
         logger.info(f'Путь к файлу: {self.subscribers_file}')
         
-        if chat_id_str in subscribers:
+        added = self.add_subscribers([chat_id_str])
+        if added is None:
+            logger.error(f'Не удалось сохранить подписчика {chat_id_str}')
+            return False
+        if not added:
             logger.info(f'Подписчик {chat_id_str} уже существует в списке')
             return False
         
-        subscribers.add(chat_id_str)
-        success = self._save_subscribers(subscribers)
+        logger.info(f'Подписчик {chat_id_str} успешно добавлен. Всего подписчиков: {self.get_count()}')
+        return True
+    
+    def add_subscribers(self, chat_ids: Iterable[str]) -> Optional[Set[str]]:
+        """
+        Добавляет подписчиков одной записью файла
         
-        if success:
-            logger.info(f'Подписчик {chat_id_str} успешно добавлен. Всего подписчиков: {len(subscribers)}')
-        else:
-            logger.error(f'Не удалось сохранить подписчика {chat_id_str}')
+        Args:
+            chat_ids: ID чатов
+        
+        Returns:
+            Добавленные chat_id (без уже подписанных) или None при ошибке записи
+        """
+        chat_ids = {str(chat_id) for chat_id in chat_ids}
+        
+        def apply(subscribers: Set[str]) -> Set[str]:
+            added = chat_ids - subscribers
+            subscribers |= added
+            return added
         
-        return success
+        return self._update(apply)
     
     def remove_subscriber(self, chat_id: str) -> bool:
         """
@@ -93,15 +133,30 @@ class SubscribersManager:
         Returns:
             True если подписчик удален, False если не найден
         """
-        subscribers = self.get_subscribers()
         chat_id_str = str(chat_id)
-        
-        if chat_id_str not in subscribers:
+        removed = self.remove_subscribers([chat_id_str])
+        if removed is not None and not removed:
             logger.info(f'Подписчик {chat_id_str} не найден')
-            return False
+        return bool(removed)
+    
+    def remove_subscribers(self, chat_ids: Iterable[str]) -> Optional[Set[str]]:
+        """
+        Удаляет подписчиков одной записью файла
+        
+        Args:
+            chat_ids: ID чатов
         
-        subscribers.remove(chat_id_str)
-        return self._save_subscribers(subscribers)
+        Returns:
+            Удалённые chat_id (без тех, кого не было в списке) или None при ошибке записи
+        """
+        chat_ids = {str(chat_id) for chat_id in chat_ids}
+        
+        def apply(subscribers: Set[str]) -> Set[str]:
+            removed = chat_ids & subscribers
+            subscribers -= removed
+            return removed
+        
+        return self._update(apply)
     
     def is_subscribed(self, chat_id: str) -> bool:
         """
@@ -116,9 +171,79 @@ class SubscribersManager:
         subscribers = self.get_subscribers()
         return str(chat_id) in subscribers
     
+    def get_count(self) -> int:
+        """
+        Возвращает количество подписчиков
+        
+        Returns:
+            Количество подписчиков
+        """
+        return len(self.get_subscribers())
+    
+    def record_deliveries(self, results: Dict[str, str]):
+        """Результаты рассылки в файле не хранятся"""
+    
+    def _signature(self) -> Optional[tuple]:
+        """Подпись файла для проверки кэша (None - файла нет)"""
+        try:
+            stat = os.stat(self.subscribers_file)
+        except FileNotFoundError:
+            return None
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    def _read_subscribers(self) -> Set[str]:
+        """Читает и разбирает файл подписчиков"""
+        if not self.subscribers_file.exists():
+            logger.debug(f'Файл подписчиков не существует: {self.subscribers_file}')
+            return set()
+        
+        try:
+            with open(self.subscribers_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+                subscribers = data.get('subscribers', [])
+                subscribers_set = set(str(chat_id) for chat_id in subscribers)
+                logger.debug(f'Загружено {len(subscribers_set)} подписчиков из файла {self.subscribers_file}')
+                return subscribers_set
+        except json.JSONDecodeError as e:
+            logger.error(f'Ошибка парсинга JSON файла подписчиков {self.subscribers_file}: {e}')
+            return set()
+        except Exception as e:
+            logger.error(f'Ошибка при чтении файла подписчиков {self.subscribers_file}: {e}')
+            return set()
+    
+    def _update(self, apply: Callable[[Set[str]], Set[str]]) -> Optional[Set[str]]:
+        """
+        Изменяет список под блокировкой и сохраняет его одной записью
+        
+        Args:
+            apply: Функция, меняющая множество подписчиков на месте и возвращающая изменённые chat_id
+        
+        Returns:
+            Результат apply или None при ошибке записи
+        """
+        with _write_locks[self._cache_key]:
+            try:
+                lock = open(self.lock_file, 'a')
+            except OSError as e:
+                logger.error(f'Не удалось открыть файл блокировки {self.lock_file}: {e}')
+                return None
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                # Под блокировкой - свежие данные: файл мог изменить другой процесс
+                subscribers = self.get_subscribers()
+                changed = apply(subscribers)
+                if changed and not self._save_subscribers(subscribers):
+                    return None
+                return changed
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+                lock.close()
+    
     def _save_subscribers(self, subscribers: Set[str]) -> bool:
         """
-        Сохраняет список подписчиков в файл
+        Сохраняет список подписчиков в файл (вызывается под блокировкой записи)
         
         Args:
             subscribers: Множество chat_id подписчиков
@@ -138,9 +263,13 @@ class SubscribersManager:
             temp_file = self.subscribers_file.with_suffix('.tmp')
             with open(temp_file, 'w', encoding='utf-8') as f:
                 json.dump(data, f, indent=2, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
             
             # Атомарно заменяем старый файл новым
             temp_file.replace(self.subscribers_file)
+            with _cache_lock:
+                _cache[self._cache_key] = (self._signature(), frozenset(subscribers))
             
             logger.info(f'Список подписчиков сохранен в {self.subscribers_file}. Всего: {len(subscribers)}')
             logger.debug(f'Подписчики: {list(subscribers)}')
@@ -149,12 +278,3 @@ class SubscribersManager:
         except Exception as e:
             logger.error(f'Ошибка при сохранении файла подписчиков {self.subscribers_file}: {e}', exc_info=True)
             return False
-    
-    def get_count(self) -> int:
-        """
-        Возвращает количество подписчиков
-        
-        Returns:
-            Количество подписчиков
-        """
-        return len(self.get_subscribers())
@@ -2,6 +2,7 @@
 Views для contacts приложения
 """
 from .contacts_view import ContactsView, submit_contact_form_ajax
+from .telegram_webhook import telegram_webhook
 
-__all__ = ['ContactsView', 'submit_contact_form_ajax']
+__all__ = ['ContactsView', 'submit_contact_form_ajax', 'telegram_webhook']
 
@@ -10,7 +10,23 @@ from django.views.decorators.http import require_http_methods
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
 from contacts.forms import ContactForm
-from contacts.services.telegram_service import TelegramService
+from contacts.models import Lead
+
+
+def save_lead(form: ContactForm) -> Lead:
+    """
+    Сохраняет заявку в outbox
+    
+    Запрос не ждёт Telegram: заявку рассылает run_unified_bot
+    (или deliver_leads) с повторами, поэтому она не теряется,
+    даже если Telegram недоступен.
+    """
+    return Lead.objects.create(
+        name=form.cleaned_data['name'],
+        phone=form.cleaned_data['phone'],
+        email=form.cleaned_data.get('email', ''),
+        message=form.cleaned_data['message']
+    )
 
 
 class ContactsView(TemplateView):
@@ -35,25 +51,12 @@ class ContactsView(TemplateView):
         
         if form.is_valid():
             try:
-                # Отправляем заявку в Telegram
-                telegram_service = TelegramService()
-                success = telegram_service.send_contact_request(
-                    name=form.cleaned_data['name'],
-                    phone=form.cleaned_data['phone'],
-                    email=form.cleaned_data.get('email', ''),
-                    message=form.cleaned_data['message']
+                # Сохраняем заявку; в Telegram её разошлёт outbox (contacts.services.lead_outbox)
+                save_lead(form)
+                messages.success(
+                    request,
+                    'Спасибо! Ваша заявка отправлена. Мы свяжемся с вами в ближайшее время.'
                 )
-                
-                if success:
-                    messages.success(
-                        request,
-                        'Спасибо! Ваша заявка отправлена. Мы свяжемся с вами в ближайшее время.'
-                    )
-                else:
-                    messages.error(
-                        request,
-                        'Произошла ошибка при отправке заявки. Пожалуйста, попробуйте позвонить нам по телефону.'
-                    )
             except Exception as e:
                 messages.error(
                     request,
@@ -85,25 +88,12 @@ def submit_contact_form_ajax(request):
     
     if form.is_valid():
         try:
-            # Отправляем заявку в Telegram
-            telegram_service = TelegramService()
-            success = telegram_service.send_contact_request(
-                name=form.cleaned_data['name'],
-                phone=form.cleaned_data['phone'],
-                email=form.cleaned_data.get('email', ''),
-                message=form.cleaned_data['message']
-            )
-            
-            if success:
-                return JsonResponse({
-                    'success': True,
-                    'message': 'Спасибо! Ваша заявка отправлена. Мы свяжемся с вами в ближайшее время.'
-                })
-            else:
-                return JsonResponse({
-                    'success': False,
-                    'message': 'Произошла ошибка при отправке заявки. Пожалуйста, попробуйте позвонить нам по телефону.'
-                }, status=500)
+            # Сохраняем заявку; в Telegram её разошлёт outbox (contacts.services.lead_outbox)
+            save_lead(form)
+            return JsonResponse({
+                'success': True,
+                'message': 'Спасибо! Ваша заявка отправлена. Мы свяжемся с вами в ближайшее время.'
+            })
         except Exception as e:
             return JsonResponse({
                 'success': False,
@@ -0,0 +1,51 @@
+"""
+Webhook для приёма обновлений Telegram
+"""
+import hmac
+import json
+import logging
+
+from django.conf import settings
+from django.http import JsonResponse, HttpResponseForbidden, HttpResponseBadRequest
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from contacts.models import TelegramUpdate
+
+django_logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'HTTP_X_TELEGRAM_BOT_API_SECRET_TOKEN'
+
+
+@csrf_exempt
+@require_POST
+def telegram_webhook(request):
+    """
+    Принимает update от Telegram и сохраняет его в очередь
+    
+    Проверяется заголовок X-Telegram-Bot-Api-Secret-Token (задаётся
+    при setWebhook). Обработка не выполняется здесь - только запись в базу,
+    чтобы ответить Telegram за миллисекунды; обновления разбирает
+    run_unified_bot --source webhook.
+    """
+    secret = getattr(settings, 'TELEGRAM_WEBHOOK_SECRET', '')
+    if not secret:
+        # Без секрета любой мог бы подделать обновления - webhook выключен
+        return HttpResponseForbidden('Webhook disabled')
+    
+    received_secret = request.META.get(SECRET_HEADER, '')
+    if not hmac.compare_digest(received_secret.encode('utf-8'), secret.encode('utf-8')):
+        django_logger.warning('Webhook Telegram: неверный секретный токен')
+        return HttpResponseForbidden('Invalid secret token')
+    
+    try:
+        payload = json.loads(request.body)
+        update_id = int(payload['update_id'])
+    except (ValueError, KeyError, TypeError):
+        return HttpResponseBadRequest('Invalid update')
+    
+    payload['update_id'] = update_id
+    if not TelegramUpdate.enqueue(payload):
+        django_logger.info(f'Webhook Telegram: повторная доставка update {update_id}')
+    
+    return JsonResponse({'ok': True})
@@ -9,6 +9,8 @@ from core.models import ContentBlock
 class Command(BaseCommand):
     """
     Команда для очистки кэша всех контент-блоков
+
+    Блоки кэшируются целой страницей, поэтому очищается кэш страниц.
     """
     help = 'Очищает кэш всех контент-блоков'
 
@@ -21,7 +23,7 @@ class Command(BaseCommand):
         parser.add_argument(
             '--block-key',
             type=str,
-            help='Очистить кэш только для указанного ключа блока',
+            help='Очистить кэш страницы, на которой находится блок (вместе с --page)',
         )
 
     def handle(self, *args, **options):
@@ -30,33 +32,21 @@ class Command(BaseCommand):
         """
         page = options.get('page')
         block_key = options.get('block_key')
-        
-        if page and block_key:
-            # Очищаем кэш для конкретного блока
-            cache_key = f'content_block:{page}:{block_key}'
-            cache.delete(cache_key)
-            self.stdout.write(
-                self.style.SUCCESS(f'Кэш очищен для блока: {page}:{block_key}')
-            )
-        elif page:
-            # Очищаем кэш для всех блоков страницы
-            blocks = ContentBlock.objects.filter(page=page)
-            cleared = 0
-            for block in blocks:
-                cache_key = f'content_block:{block.page}:{block.block_key}'
-                if cache.delete(cache_key):
-                    cleared += 1
-            self.stdout.write(
-                self.style.SUCCESS(f'Кэш очищен для {cleared} блоков страницы: {page}')
-            )
+
+        if page:
+            # Блок кэшируется вместе со своей страницей
+            cache.delete(ContentBlock.get_page_cache_key(page))
+            if block_key:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Кэш очищен для блока: {page}:{block_key}')
+                )
+            else:
+                self.stdout.write(
+                    self.style.SUCCESS(f'Кэш очищен для страницы: {page}')
+                )
         else:
-            # Очищаем кэш для всех блоков
-            blocks = ContentBlock.objects.all()
-            cleared = 0
-            for block in blocks:
-                cache_key = f'content_block:{block.page}:{block.block_key}'
-                if cache.delete(cache_key):
-                    cleared += 1
+            pages = ContentBlock.Page.values
+            cache.delete_many([ContentBlock.get_page_cache_key(page) for page in pages])
             self.stdout.write(
-                self.style.SUCCESS(f'Кэш очищен для {cleared} контент-блоков')
+                self.style.SUCCESS(f'Кэш очищен для {len(pages)} страниц')
             )
@@ -7,6 +7,9 @@ from django.core.cache import cache
 from django.utils.text import slugify
 from .base import BaseModel
 
+# Сколько хранить в кэше блоки страницы (секунды)
+CONTENT_PAGE_CACHE_TIMEOUT = 60 * 60
+
 
 class ContentBlock(BaseModel):
     """
@@ -78,6 +81,41 @@ class ContentBlock(BaseModel):
             preview += '...'
         return format_html('<span style="color: #666;">{}</span>', preview)
     
+    @staticmethod
+    def get_page_cache_key(page: str) -> str:
+        """Ключ кэша со всеми блоками страницы"""
+        return f'content_page:{page}'
+    
+    @classmethod
+    def get_page_blocks(cls, *pages: str) -> dict:
+        """
+        Все блоки нескольких страниц: один get_many из кэша, при промахе - один запрос
+        
+        Returns:
+            {page: {block_key: (content, is_html)}}
+        """
+        keys = {cls.get_page_cache_key(page): page for page in pages}
+        cached = cache.get_many(keys)
+        result = {keys[key]: blocks for key, blocks in cached.items()}
+        
+        missing = [page for page in pages if page not in result]
+        if missing:
+            loaded = {page: {} for page in missing}
+            rows = cls.objects.filter(page__in=missing).values_list('page', 'block_key', 'content', 'is_html')
+            for page, block_key, content, is_html in rows:
+                loaded[page][block_key] = (content, is_html)
+            # Пустая страница тоже кэшируется: шаблон выведет значения по умолчанию
+            cache.set_many(
+                {cls.get_page_cache_key(page): blocks for page, blocks in loaded.items()},
+                CONTENT_PAGE_CACHE_TIMEOUT
+            )
+            result.update(loaded)
+        return result
+    
+    def clear_page_cache(self):
+        """Очищает кэш страниц (блок мог быть перенесён на другую страницу)"""
+        cache.delete_many([self.get_page_cache_key(page) for page in self.Page.values])
+    
     def save(self, *args, **kwargs):
         """Переопределяем save для автогенерации ключа и очистки кэша"""
         # Автогенерация ключа из описания, если не указан
@@ -87,16 +125,12 @@ class ContentBlock(BaseModel):
             if len(self.block_key) > 100:
                 self.block_key = self.block_key[:100]
         
-        # Очищаем кэш для этого блока
-        if self.block_key:
-            cache_key = f'content_block:{self.page}:{self.block_key}'
-            cache.delete(cache_key)
-        
         super().save(*args, **kwargs)
+        
+        # Очищаем кэш после записи, чтобы параллельный запрос не закэшировал старое содержимое
+        self.clear_page_cache()
     
     def delete(self, *args, **kwargs):
         """Переопределяем delete для очистки кэша при удалении"""
-        # Очищаем кэш для этого блока
-        cache_key = f'content_block:{self.page}:{self.block_key}'
-        cache.delete(cache_key)
-        super().delete(*args, **kwargs)
\ No newline at end of file
+        super().delete(*args, **kwargs)
+        self.clear_page_cache()
\ No newline at end of file
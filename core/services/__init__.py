@@ -0,0 +1,23 @@
+"""
+Services для core приложения
+"""
+from .telegram_api import TelegramAPIClient, SendRateLimiter, get_telegram_client, get_session
+from .slugs import (
+    transliterate,
+    make_slug,
+    allocate_slug,
+    allocate_slugs,
+    save_with_unique_slug,
+)
+
+__all__ = [
+    'TelegramAPIClient',
+    'SendRateLimiter',
+    'get_telegram_client',
+    'get_session',
+    'transliterate',
+    'make_slug',
+    'allocate_slug',
+    'allocate_slugs',
+    'save_with_unique_slug',
+]
@@ -0,0 +1,163 @@
+"""
+Уникальные slug для моделей с полем SlugField(unique=True)
+
+slugify() выбрасывает кириллицу, поэтому заголовки вида «Перетяжка руля»
+превращались в пустую строку и timestamp-заглушки. Здесь текст сначала
+транслитерируется (по той же таблице, что и URLify.js в админке, поэтому
+slug из prepopulated_fields и сгенерированный на сервере совпадают).
+
+Уникальность:
+- свободный slug подбирается одним запросом: база и все base-N;
+- для импортёров - пачкой, одним запросом на весь список;
+- гонку с параллельной вставкой ловит уникальный индекс: при IntegrityError
+  slug подбирается заново и сохранение повторяется.
+"""
+import re
+from typing import Callable, List
+
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils.text import slugify
+
+# Таблица из django/contrib/admin/static/admin/js/urlify.js (RUSSIAN_MAP, UKRAINIAN_MAP)
+TRANSLIT_MAP = {
+    'а': 'a', 'б': 'b', 'в': 'v', 'г': 'g', 'д': 'd', 'е': 'e', 'ё': 'yo',
+    'ж': 'zh', 'з': 'z', 'и': 'i', 'й': 'j', 'к': 'k', 'л': 'l', 'м': 'm',
+    'н': 'n', 'о': 'o', 'п': 'p', 'р': 'r', 'с': 's', 'т': 't', 'у': 'u',
+    'ф': 'f', 'х': 'h', 'ц': 'c', 'ч': 'ch', 'ш': 'sh', 'щ': 'sh', 'ъ': '',
+    'ы': 'y', 'ь': '', 'э': 'e', 'ю': 'yu', 'я': 'ya',
+    'є': 'ye', 'і': 'i', 'ї': 'yi', 'ґ': 'g',
+}
+# Запас длины под суффикс "-N"
+SLUG_SUFFIX_RESERVE = 10
+# Сколько раз повторить сохранение, если slug заняли параллельно
+SLUG_SAVE_ATTEMPTS = 3
+
+
+def transliterate(text: str) -> str:
+    """Кириллица -> латиница, остальные символы без изменений"""
+    return ''.join(TRANSLIT_MAP.get(char, char) for char in text.lower())
+
+
+def make_slug(text: str, max_length: int = 50, fallback: str = 'item') -> str:
+    """
+    slug из текста с транслитерацией
+
+    Args:
+        text: Заголовок или название
+        max_length: Максимальная длина (с учётом запаса под суффикс)
+        fallback: slug, если в тексте нет ни букв, ни цифр
+
+    Returns:
+        Непустой slug (без проверки уникальности)
+    """
+    slug = slugify(transliterate(text or ''))[:max_length].strip('-')
+    return slug or fallback
+
+
+def _base_length(model, field_name: str) -> int:
+    return model._meta.get_field(field_name).max_length - SLUG_SUFFIX_RESERVE
+
+
+def _taken_slugs(model, bases: set, field_name: str, exclude_pk=None) -> set:
+    """Занятые slug вида base и base-N для всех bases - одним запросом"""
+    query = Q(**{f'{field_name}__in': bases})
+    for base in bases:
+        query |= Q(**{f'{field_name}__startswith': f'{base}-'})
+    queryset = model._default_manager.filter(query)
+    if exclude_pk is not None:
+        queryset = queryset.exclude(pk=exclude_pk)
+    return set(queryset.values_list(field_name, flat=True))
+
+
+def _next_free(base: str, taken: set) -> str:
+    if base not in taken:
+        return base
+    pattern = re.compile(rf'^{re.escape(base)}-(\d+)$')
+    suffixes = [int(match.group(1)) for match in map(pattern.match, taken) if match]
+    return f'{base}-{max(suffixes, default=1) + 1}'
+
+
+def allocate_slugs(model, texts: List[str], fallback: str = 'item', field_name: str = 'slug') -> List[str]:
+    """
+    Подбирает уникальные slug для списка текстов (для массового импорта)
+
+    Совпадения внутри списка тоже разводятся суффиксами.
+
+    Args:
+        model: Модель с уникальным полем field_name
+        texts: Заголовки/названия
+        fallback: Основа slug для текстов без букв и цифр
+        field_name: Имя поля slug
+
+    Returns:
+        slug в том же порядке, что и texts
+    """
+    max_length = _base_length(model, field_name)
+    bases = [make_slug(text, max_length, fallback) for text in texts]
+    if not bases:
+        return []
+
+    taken = _taken_slugs(model, set(bases), field_name)
+    slugs = []
+    for base in bases:
+        slug = _next_free(base, taken)
+        taken.add(slug)
+        slugs.append(slug)
+    return slugs
+
+
+def allocate_slug(instance, text: str, fallback: str = 'item', field_name: str = 'slug') -> str:
+    """
+    Подбирает уникальный slug для объекта модели одним запросом
+
+    Args:
+        instance: Объект модели (сам объект при проверке не учитывается)
+        text: Заголовок/название
+        fallback: Основа slug для текста без букв и цифр
+        field_name: Имя поля slug
+    """
+    model = type(instance)
+    base = make_slug(text, _base_length(model, field_name), fallback)
+    exclude_pk = None if instance._state.adding else instance.pk
+    return _next_free(base, _taken_slugs(model, {base}, field_name, exclude_pk))
+
+
+def save_with_unique_slug(
+    instance,
+    save: Callable[[], None],
+    text: str,
+    fallback: str = 'item',
+    field_name: str = 'slug',
+):
+    """
+    Сохраняет объект, назначая уникальный slug, если он пуст
+
+    Обычное сохранение - один запрос на запись (плюс один SELECT для нового
+    slug). Если между подбором и INSERT slug занял кто-то другой, уникальный
+    индекс отклонит запись - slug подбирается заново.
+
+    Args:
+        instance: Объект модели
+        save: Функция сохранения (обычно lambda: super().save(*args, **kwargs))
+        text: Заголовок/название для slug
+        fallback: Основа slug для текста без букв и цифр
+        field_name: Имя поля slug
+    """
+    current = getattr(instance, field_name)
+    if current and current.strip():
+        save()
+        return
+
+    for attempt in range(1, SLUG_SAVE_ATTEMPTS + 1):
+        setattr(instance, field_name, allocate_slug(instance, text, fallback, field_name))
+        try:
+            with transaction.atomic():
+                save()
+            return
+        except IntegrityError:
+            slug = getattr(instance, field_name)
+            conflict = type(instance)._default_manager.filter(**{field_name: slug}).exclude(pk=instance.pk).exists()
+            if attempt == SLUG_SAVE_ATTEMPTS or not conflict:
+                setattr(instance, field_name, current)
+                raise
@@ -0,0 +1,341 @@
+"""
+Общий HTTP-клиент для Telegram Bot API
+
+Все обращения к api.telegram.org идут через один Session на процесс:
+соединения переиспользуются (keep-alive), поэтому рассылка заявок, импорт
+постов и проксирование видео не платят за TCP+TLS рукопожатие на каждый вызов.
+
+Клиент также:
+- повторяет запросы при обрывах соединения и 5xx (только идемпотентные методы;
+  если соединение не установлено - любые);
+- выдерживает паузу retry_after при 429 Too Many Requests;
+- не превышает лимиты Telegram на отправку (общий и на один чат) -
+  лимитер общий для всех потоков процесса;
+- берёт таймаут для каждого метода из настроек.
+"""
+import time
+import random
+import threading
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from django.conf import settings
+from loguru import logger
+
+TELEGRAM_API_BASE = 'https://api.telegram.org'
+
+# Таймауты (секунды) по методам Bot API; переопределяются настройкой TELEGRAM_API_TIMEOUTS
+DEFAULT_METHOD_TIMEOUTS = {
+    'getMe': 10,
+    'getFile': 10,
+    'getChat': 10,
+    'sendMessage': 10,
+    'forwardMessage': 5,
+    'setWebhook': 10,
+    'deleteWebhook': 10,
+}
+DEFAULT_TIMEOUT = 10
+# Скачивание файлов (file/bot<token>/<file_path>)
+DOWNLOAD_TIMEOUT = 30
+# Запас сверх серверного long polling таймаута getUpdates
+LONG_POLL_MARGIN = 10
+
+# Методы, которые безопасно повторять: повтор не создаст дубль сообщения
+IDEMPOTENT_METHODS = {
+    'getMe',
+    'getFile',
+    'getChat',
+    'getUpdates',
+    'getWebhookInfo',
+    'setWebhook',
+    'deleteWebhook',
+}
+
+MAX_RETRIES = 3
+BACKOFF_FACTOR = 0.5
+# Не ждём дольше этого при 429 - пусть вызывающий код решает сам
+MAX_RETRY_AFTER = 60
+
+# Лимиты Telegram на отправку: ~30 сообщений в секунду всего и ~1 в секунду в один чат
+DEFAULT_SEND_RATE = 30
+DEFAULT_CHAT_SEND_INTERVAL = 1
+# Методы, на которые действуют лимиты отправки
+RATE_LIMITED_METHODS = {
+    'sendMessage',
+    'sendPhoto',
+    'sendVideo',
+    'sendDocument',
+    'sendMediaGroup',
+    'forwardMessage',
+    'copyMessage',
+}
+
+_session = None
+_session_lock = threading.Lock()
+_clients: Dict[str, 'TelegramAPIClient'] = {}
+_clients_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """
+    Возвращает общий для процесса Session с пулом соединений
+
+    Пул рассчитан на параллельные вызовы из потоков (рассылка, загрузка медиа).
+    urllib3 запросы не повторяет: все повторы - в TelegramAPIClient.request,
+    иначе попытки двух уровней перемножались бы.
+    """
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                pool_size = getattr(settings, 'TELEGRAM_API_POOL_SIZE', 20)
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+                session = requests.Session()
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _session = session
+    return _session
+
+
+def get_telegram_client(token: str) -> 'TelegramAPIClient':
+    """Возвращает общий для процесса клиент для токена бота"""
+    client = _clients.get(token)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(token)
+            if client is None:
+                client = TelegramAPIClient(token)
+                _clients[token] = client
+    return client
+
+
+class SendRateLimiter:
+    """
+    Потокобезопасный лимитер отправки сообщений
+
+    Каждый вызов acquire() резервирует ближайший слот, не нарушающий
+    ни общий лимит (rate сообщений в секунду, с запасом на всплеск
+    в rate сообщений), ни интервал между сообщениями в один чат, и спит
+    до него вне блокировки - параллельные отправки не ждут друг друга
+    дольше, чем требуют лимиты.
+
+    Args:
+        rate: Сообщений в секунду на бота
+        chat_interval: Минимальный интервал между сообщениями в один чат (секунды)
+    """
+
+    def __init__(self, rate: float = DEFAULT_SEND_RATE, chat_interval: float = DEFAULT_CHAT_SEND_INTERVAL):
+        self.interval = 1 / rate if rate > 0 else 0
+        self.burst = max(0, rate - 1) * self.interval
+        self.chat_interval = chat_interval
+        self._next_slot = 0.0
+        self._chat_next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, chat_id=None) -> float:
+        """
+        Ждёт слот для отправки
+
+        Args:
+            chat_id: Чат получателя (None - только общий лимит)
+
+        Returns:
+            Сколько секунд пришлось ждать
+        """
+        chat_key = str(chat_id) if chat_id is not None else None
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_slot - self.burst)
+            if chat_key is not None:
+                start = max(start, self._chat_next_slot.get(chat_key, 0))
+                self._chat_next_slot[chat_key] = start + self.chat_interval
+                if len(self._chat_next_slot) > 10000:
+                    self._chat_next_slot = {
+                        key: slot for key, slot in self._chat_next_slot.items() if slot > now
+                    }
+            self._next_slot = max(self._next_slot, start) + self.interval
+
+        wait = start - now
+        if wait > 0:
+            time.sleep(wait)
+        return max(wait, 0)
+
+
+class TelegramAPIClient:
+    """
+    Клиент Telegram Bot API поверх общего пула соединений
+
+    Методы возвращают requests.Response, как и прежние вызовы requests.get/post,
+    поэтому вызывающий код по-прежнему делает raise_for_status() и json().
+    """
+
+    def __init__(
+        self,
+        token: str,
+        session: Optional[requests.Session] = None,
+        rate_limiter: Optional[SendRateLimiter] = None,
+    ):
+        """
+        Args:
+            token: Токен бота
+            session: Session (по умолчанию общий для процесса)
+            rate_limiter: Лимитер отправки (по умолчанию - из настроек TELEGRAM_SEND_RATE,
+                TELEGRAM_CHAT_SEND_INTERVAL); лимиты Telegram действуют на бота, поэтому
+                лимитер у каждого клиента свой
+        """
+        self.token = token
+        self.session = session or get_session()
+        self.rate_limiter = rate_limiter or SendRateLimiter(
+            rate=getattr(settings, 'TELEGRAM_SEND_RATE', DEFAULT_SEND_RATE),
+            chat_interval=getattr(settings, 'TELEGRAM_CHAT_SEND_INTERVAL', DEFAULT_CHAT_SEND_INTERVAL),
+        )
+        self.api_url = f'{TELEGRAM_API_BASE}/bot{token}'
+        self.file_api_url = f'{TELEGRAM_API_BASE}/file/bot{token}'
+
+    @property
+    def bot_id(self) -> str:
+        """Числовой ID бота - часть токена до ':'"""
+        return self.token.split(':', 1)[0]
+
+    @staticmethod
+    def get_timeout(api_method: str, params: Optional[dict] = None, json: Optional[dict] = None) -> float:
+        """
+        Таймаут для метода Bot API
+
+        Для getUpdates берётся серверный таймаут long polling плюс запас.
+        """
+        if api_method == 'getUpdates':
+            poll_timeout = (params or json or {}).get('timeout', 0)
+            return int(poll_timeout) + LONG_POLL_MARGIN
+
+        timeouts = dict(DEFAULT_METHOD_TIMEOUTS)
+        timeouts.update(getattr(settings, 'TELEGRAM_API_TIMEOUTS', {}))
+        return timeouts.get(api_method, DEFAULT_TIMEOUT)
+
+    def request(
+        self,
+        http_method: str,
+        api_method: str,
+        params: Optional[dict] = None,
+        json: Optional[dict] = None,
+        timeout: Optional[float] = None,
+    ) -> requests.Response:
+        """
+        Вызывает метод Bot API с повторами
+
+        Args:
+            http_method: GET или POST
+            api_method: Метод Bot API (sendMessage, getFile, ...)
+            params: Параметры query string
+            json: Тело запроса
+            timeout: Таймаут (по умолчанию - из настроек для метода)
+
+        Returns:
+            requests.Response
+
+        Raises:
+            requests.RequestException: если повторы не помогли
+        """
+        url = f'{self.api_url}/{api_method}'
+        if timeout is None:
+            timeout = self.get_timeout(api_method, params, json)
+        idempotent = api_method in IDEMPOTENT_METHODS
+        rate_limited = api_method in RATE_LIMITED_METHODS
+        chat_id = (json or params or {}).get('chat_id')
+
+        attempt = 0
+        while True:
+            attempt += 1
+            if rate_limited:
+                self.rate_limiter.acquire(chat_id)
+            try:
+                response = self.session.request(
+                    http_method,
+                    url,
+                    params=params,
+                    json=json,
+                    timeout=timeout
+                )
+            except requests.exceptions.ConnectionError as e:
+                # Соединение не установлено - запрос не дошёл до Telegram, повтор безопасен для любого метода
+                if attempt > MAX_RETRIES or not (idempotent or self._not_sent(e)):
+                    raise
+                delay = self._backoff(attempt)
+                logger.warning(f'Telegram API {api_method}: ошибка соединения ({e}), повтор через {delay:.1f} сек')
+                time.sleep(delay)
+                continue
+
+            if response.status_code == 429 and attempt <= MAX_RETRIES:
+                retry_after = self._get_retry_after(response)
+                if retry_after is not None and retry_after <= MAX_RETRY_AFTER:
+                    # 429 означает, что запрос не выполнен - повтор безопасен для любого метода
+                    logger.warning(f'Telegram API {api_method}: 429, ждём {retry_after} сек')
+                    time.sleep(retry_after)
+                    continue
+
+            if response.status_code >= 500 and idempotent and attempt <= MAX_RETRIES:
+                delay = self._backoff(attempt)
+                logger.warning(f'Telegram API {api_method}: {response.status_code}, повтор через {delay:.1f} сек')
+                time.sleep(delay)
+                continue
+
+            return response
+
+    def get(self, api_method: str, **kwargs) -> requests.Response:
+        """GET-вызов метода Bot API"""
+        return self.request('GET', api_method, **kwargs)
+
+    def post(self, api_method: str, **kwargs) -> requests.Response:
+        """POST-вызов метода Bot API"""
+        return self.request('POST', api_method, **kwargs)
+
+    def file_url(self, file_path: str) -> str:
+        """URL для скачивания файла по file_path из getFile"""
+        return f'{self.file_api_url}/{file_path}'
+
+    def download(
+        self,
+        file_path: str,
+        stream: bool = False,
+        headers: Optional[dict] = None,
+        timeout: float = DOWNLOAD_TIMEOUT,
+    ) -> requests.Response:
+        """
+        Скачивает файл по file_path через общий пул соединений
+
+        Args:
+            file_path: Путь файла из ответа getFile
+            stream: Не загружать тело сразу (для проксирования)
+            headers: Дополнительные заголовки (например, Range)
+            timeout: Таймаут
+        """
+        return self.session.get(
+            self.file_url(file_path),
+            headers=headers,
+            stream=stream,
+            timeout=timeout
+        )
+
+    @staticmethod
+    def _get_retry_after(response: requests.Response) -> Optional[int]:
+        """Достаёт retry_after из ответа 429"""
+        try:
+            return int(response.json().get('parameters', {}).get('retry_after'))
+        except (ValueError, TypeError, AttributeError):
+            header = response.headers.get('Retry-After')
+            return int(header) if header and header.isdigit() else None
+
+    @staticmethod
+    def _not_sent(error: requests.exceptions.ConnectionError) -> bool:
+        """Ошибка при установке соединения: запрос не был отправлен"""
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, NewConnectionError)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        """Экспоненциальная задержка с небольшим случайным разбросом"""
+        return BACKOFF_FACTOR * (2 ** (attempt - 1)) + random.uniform(0, 0.1)
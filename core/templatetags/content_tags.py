@@ -1,75 +1,85 @@
 """
 Template tags для работы с контент-блоками
+
+Блоки загружаются целой страницей: первый get_content для страницы (или
+load_content_page) берёт все её блоки одним обращением к кэшу, а при
+промахе - одним запросом к БД. Остальные теги страницы читают блоки из
+памяти до конца рендеринга, включая родительские шаблоны и include.
 """
 from django import template
 from django.utils.safestring import mark_safe
-from django.core.cache import cache
 from core.models import ContentBlock
 
 register = template.Library()
 
+# Ключ в render_context, под которым лежат загруженные за рендеринг страницы
+RENDER_CONTEXT_KEY = 'content_tags_pages'
+
+
+def get_page_blocks(context, *pages):
+    """
+    Блоки страниц на время рендеринга: {block_key: (content, is_html)}
+
+    Хранятся в корневом слое render_context: include получает свой
+    изолированный слой, а корневой общий для всего рендеринга.
+    """
+    loaded = context.render_context.dicts[0].setdefault(RENDER_CONTEXT_KEY, {})
+    missing = [page for page in dict.fromkeys(pages) if page not in loaded]
+    if missing:
+        loaded.update(ContentBlock.get_page_blocks(*missing))
+    return loaded[pages[-1]]
+
 
-def get_cache_key(page, block_key):
-    """Генерация ключа кэша для контент-блока"""
-    return f'content_block:{page}:{block_key}'
+@register.simple_tag(takes_context=True)
+def load_content_page(context, *pages):
+    """
+    Заранее загрузить все блоки страниц одним обращением к кэшу.
+
+    Пример:
+        {% load_content_page 'home' 'contacts' %}
+    """
+    if pages:
+        get_page_blocks(context, *pages)
+    return ''
 
 
-@register.simple_tag
-def get_content(page, block_key, default=''):
+@register.simple_tag(takes_context=True)
+def get_content(context, page, block_key, default=''):
     """
     Получить содержимое контент-блока.
-    
+
     Args:
         page: Страница (например, 'home', 'about')
         block_key: Ключ блока (например, 'hero_title', 'about_text')
         default: Значение по умолчанию, если блок не найден
-    
+
     Returns:
         str: Содержимое блока или значение по умолчанию
     """
-    cache_key = get_cache_key(page, block_key)
-    
-    # Пытаемся получить из кэша
-    cached_content = cache.get(cache_key)
-    if cached_content is not None:
-        if isinstance(cached_content, dict) and cached_content.get('is_html'):
-            return mark_safe(cached_content['content'])
-        return cached_content
-    
-    # Если нет в кэше, получаем из БД
-    try:
-        block = ContentBlock.objects.get(page=page, block_key=block_key)
-        content = block.content
-        
-        # Кэшируем результат (на 1 час)
-        if block.is_html:
-            cache.set(cache_key, {'content': content, 'is_html': True}, 3600)
-            return mark_safe(content)
-        else:
-            cache.set(cache_key, content, 3600)
-            return content
-    except ContentBlock.DoesNotExist:
-        # Кэшируем значение по умолчанию на короткое время (5 минут)
-        cache.set(cache_key, default, 300)
+    block = get_page_blocks(context, page).get(block_key)
+    if block is None:
         return default
+    content, is_html = block
+    if is_html:
+        return mark_safe(content)
+    return content
 
 
-@register.simple_tag
-def get_content_safe(page, block_key, default=''):
+@register.simple_tag(takes_context=True)
+def get_content_safe(context, page, block_key, default=''):
     """
     Получить содержимое контент-блока с автоматическим экранированием HTML.
-    
+
     Args:
         page: Страница (например, 'home', 'about')
         block_key: Ключ блока (например, 'hero_title', 'about_text')
         default: Значение по умолчанию, если блок не найден
-    
+
     Returns:
         str: Содержимое блока (безопасное, HTML экранирован)
     """
-    try:
-        block = ContentBlock.objects.get(page=page, block_key=block_key)
-        # Всегда возвращаем как безопасный текст (HTML экранируется)
-        return block.content
-    except ContentBlock.DoesNotExist:
+    block = get_page_blocks(context, page).get(block_key)
+    if block is None:
         return default
+    # Всегда возвращаем как обычный текст (HTML экранируется)
+    return block[0]
@@ -2,8 +2,8 @@
 Модель услуги
 """
 from django.db import models
-from django.utils.text import slugify
 from core.models import BaseModel
+from core.services.slugs import save_with_unique_slug
 
 
 class Service(BaseModel):
@@ -85,11 +85,9 @@ class Service(BaseModel):
 
     def save(self, *args, **kwargs):
         """
-        Автоматическое создание slug из названия, если не указан
+        Автоматическое создание уникального slug из названия, если не указан
         """
-        if not self.slug:
-            self.slug = slugify(self.title)
-        super().save(*args, **kwargs)
+        save_with_unique_slug(self, lambda: super(Service, self).save(*args, **kwargs), self.title, fallback='service')
     
     def get_features_list(self):
         """
@@ -9,7 +9,10 @@ Telethon worker для скачивания больших видео из Teleg
 """
 import os
 import sys
+import json
+import signal
 import asyncio
+from datetime import timedelta
 from pathlib import Path
 
 # Добавляем путь к проекту Django
@@ -25,8 +28,11 @@ from telethon import TelegramClient
 from telethon.errors import FloodWaitError, SessionPasswordNeededError
 from loguru import logger
 from django.conf import settings
+from django.utils import timezone
 from asgiref.sync import sync_to_async
 from articles.models import Article
+from articles.services.video_worker import write_pidfile, remove_pidfile, read_pid
+from articles.services.video_processing import process_article_video
 
 
 # Telegram API credentials (из my.telegram.org)
@@ -34,10 +40,233 @@ API_ID = 39517977
 API_HASH = "5900eda1c27150d65511553695b4d58f"
 SESSION_NAME = str(BASE_DIR / "telethon_worker" / "session")
 
-# Директория для скачивания видео
-DOWNLOAD_DIR = BASE_DIR / "media" / "articles" / "videos"
+# Директория для скачивания видео - сразу каталог upload_to поля video_file,
+# чтобы готовый файл не приходилось копировать в хранилище
+DOWNLOAD_DIR = Path(settings.MEDIA_ROOT) / Article.video_file.field.upload_to
 DOWNLOAD_DIR.mkdir(parents=True, exist_ok=True)
 
+# Сколько видео скачивать одновременно
+DEFAULT_CONCURRENCY = 3
+# Сколько раз повторять скачивание после FloodWait, прежде чем вернуть статью в очередь
+MAX_FLOOD_RETRIES = 3
+
+# Большие файлы качаются частями параллельно
+PARALLEL_DOWNLOAD_THRESHOLD = 64 * 1024 * 1024  # 64 МБ
+# Размер одного запроса upload.getFile (максимум, который разрешает Telegram)
+PARALLEL_REQUEST_SIZE = 512 * 1024
+# Размер части - кратен PARALLEL_REQUEST_SIZE, чтобы смещения были выровнены
+PARALLEL_PART_SIZE = 16 * PARALLEL_REQUEST_SIZE  # 8 МБ
+# Сколько частей одного файла качать одновременно
+PARALLEL_PARTS = 4
+
+# Демон: интервал опроса базы растёт от минимального до максимального, пока нет работы
+DAEMON_MIN_INTERVAL = 5
+DAEMON_MAX_INTERVAL = 60
+# Сколько ждать текущие загрузки при остановке (секунды)
+DAEMON_SHUTDOWN_TIMEOUT = 30
+
+# Недокачанные файлы и журналы прогресса
+PARTIAL_DIR = DOWNLOAD_DIR / ".partial"
+PARTIAL_DIR.mkdir(parents=True, exist_ok=True)
+# Как часто сбрасывать прогресс на диск (секунды)
+JOURNAL_FLUSH_INTERVAL = 5
+# Как часто продлевать аренду статьи в статусе 'downloading' (секунды)
+HEARTBEAT_INTERVAL = 60
+# Статья без продления аренды дольше этого считается брошенной
+DOWNLOAD_LEASE_TIMEOUT = 10 * 60
+
+
+class DownloadJournal:
+    """
+    Журнал прогресса скачивания одного документа
+    
+    Хранит идентификатор документа, ожидаемый размер, размер части и
+    сколько байт каждой части уже записано. Журнал сохраняется только
+    после fsync данных, поэтому отмеченные в нём байты точно есть на диске.
+    """
+    
+    def __init__(self, path: Path):
+        self.path = path
+        self.document_id = None
+        self.expected_size = 0
+        self.part_size = PARALLEL_PART_SIZE
+        self.parts = {}
+        self._flushed_at = 0.0
+    
+    def load(self, document_id: int, expected_size: int) -> bool:
+        """
+        Загружает журнал, если он относится к этому же документу
+        
+        Returns:
+            True если можно продолжать скачивание
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        
+        if (
+            data.get('document_id') != document_id
+            or data.get('expected_size') != expected_size
+            or data.get('part_size') != PARALLEL_PART_SIZE
+        ):
+            return False
+        
+        self.document_id = document_id
+        self.expected_size = expected_size
+        self.parts = {int(offset): done for offset, done in data.get('parts', {}).items()}
+        return True
+    
+    def reset(self, document_id: int, expected_size: int):
+        """Начинает журнал заново"""
+        self.document_id = document_id
+        self.expected_size = expected_size
+        self.parts = {offset: 0 for offset in range(0, expected_size, self.part_size)}
+        self.save()
+    
+    def remaining_parts(self):
+        """Недокачанные участки: список (смещение, длина)"""
+        remaining = []
+        for offset in sorted(self.parts):
+            length = min(self.part_size, self.expected_size - offset)
+            done = self.parts[offset]
+            if done < length:
+                remaining.append((offset + done, length - done))
+        return remaining
+    
+    def advance(self, position: int, length: int):
+        """Отмечает, что записаны байты [position, position + length)"""
+        part_offset = position - position % self.part_size
+        self.parts[part_offset] = position + length - part_offset
+    
+    def committed_bytes(self) -> int:
+        """Сколько байт уже скачано"""
+        return sum(self.parts.values())
+    
+    def flush_due(self) -> bool:
+        """Пора ли сбросить прогресс на диск"""
+        return asyncio.get_running_loop().time() - self._flushed_at >= JOURNAL_FLUSH_INTERVAL
+    
+    def save(self):
+        """Атомарно записывает журнал на диск"""
+        data = {
+            'document_id': self.document_id,
+            'expected_size': self.expected_size,
+            'part_size': self.part_size,
+            'parts': {str(offset): done for offset, done in self.parts.items()},
+        }
+        temp_path = self.path.with_suffix('.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f)
+        os.replace(temp_path, self.path)
+        try:
+            self._flushed_at = asyncio.get_running_loop().time()
+        except RuntimeError:
+            pass
+    
+    def delete(self):
+        """Удаляет журнал после успешного скачивания"""
+        self.path.unlink(missing_ok=True)
+
+
+def discard_partial_download(channel: str, message_id: int):
+    """
+    Удаляет недокачанный файл и журнал сообщения (после окончательной ошибки)
+    
+    Имена файлов - video_{channel}_{message_id}{ext}[.part|.json|.tmp],
+    как в _download_document.
+    """
+    for path in PARTIAL_DIR.glob(f"video_{channel}_{message_id}.*"):
+        try:
+            path.unlink()
+        except OSError as e:
+            logger.warning(f"Не удалось удалить {path}: {e}")
+
+
+def finalize_video_file(article_obj, file_path_str: str):
+    """
+    Привязывает скачанный файл к article.video_file без повторной записи байт
+    
+    - файл уже лежит в хранилище (в каталоге upload_to) - просто проставляем имя;
+    - файл на той же файловой системе - атомарно переименовываем на свободное имя;
+    - иначе (другой диск или нелокальное хранилище) - копируем через storage.
+    """
+    field_file = article_obj.video_file
+    storage = field_file.storage
+    file_path = Path(file_path_str)
+    name = field_file.field.generate_filename(article_obj, file_path.name)
+    
+    try:
+        storage_root = Path(storage.path(''))
+    except NotImplementedError:
+        storage_root = None
+    
+    if storage_root is None:
+        # Хранилище без локальных путей - единственный вариант это копия
+        with open(file_path, 'rb') as f:
+            field_file.save(file_path.name, f, save=False)
+        os.remove(file_path)
+        return
+    
+    try:
+        relative_name = file_path.resolve().relative_to(storage_root.resolve()).as_posix()
+    except ValueError:
+        relative_name = None
+    
+    # Уже в каталоге upload_to (например, download_media качает прямо туда)
+    if relative_name and os.path.dirname(relative_name) == field_file.field.upload_to.rstrip('/'):
+        field_file.name = relative_name
+        return
+    
+    name = storage.get_available_name(name, max_length=field_file.field.max_length)
+    destination = Path(storage.path(name))
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    
+    if os.stat(file_path).st_dev == os.stat(destination.parent).st_dev:
+        os.replace(file_path, destination)
+        field_file.name = name
+    else:
+        with open(file_path, 'rb') as f:
+            field_file.save(file_path.name, f, save=False)
+        os.remove(file_path)
+
+
+def write_at(fd: int, data: bytes, position: int):
+    """Записывает данные в файл по смещению, не трогая общую позицию"""
+    if hasattr(os, 'pwrite'):
+        os.pwrite(fd, data, position)
+    else:
+        # Между lseek и write нет await, поэтому задачи event loop не пересекаются
+        os.lseek(fd, position, os.SEEK_SET)
+        os.write(fd, data)
+
+
+class FloodWaitLimiter:
+    """
+    Общий для всех задач скачивания ограничитель запросов
+
+    Когда Telegram отвечает FloodWait, ограничение действует на весь аккаунт,
+    поэтому на паузу ставятся все задачи сразу, а не только получившая ошибку.
+    """
+    
+    def __init__(self):
+        self._resume_at = 0.0
+    
+    def pause(self, seconds: int):
+        """Приостанавливает все задачи на указанное количество секунд"""
+        loop = asyncio.get_running_loop()
+        self._resume_at = max(self._resume_at, loop.time() + seconds)
+    
+    async def wait(self):
+        """Ждёт окончания паузы (если она есть)"""
+        loop = asyncio.get_running_loop()
+        while True:
+            delay = self._resume_at - loop.time()
+            if delay <= 0:
+                return
+            await asyncio.sleep(delay)
+
 
 class TelegramVideoDownloader:
     """
@@ -56,6 +285,12 @@ class TelegramVideoDownloader:
             API_HASH,
             loop=None  # Используем текущий event loop
         )
+        self.flood_limiter = FloodWaitLimiter()
+        # Когда последний раз продлевали аренду статьи (время event loop)
+        self._heartbeats = {}
+        # Состояние демона (run_daemon)
+        self._wake_event = None
+        self._stopping = False
     
     async def start(self):
         """
@@ -93,70 +328,53 @@ class TelegramVideoDownloader:
             await sync_to_async(article.save)()
             return False
         
+        # Забираем статью атомарно: её мог уже взять другой воркер
+        if not await self.claim_article(article_id):
+            logger.info(f"ℹ️  Статья {article_id} уже скачивается или не ожидает скачивания")
+            return False
+        article.video_status = 'downloading'
+        channel = channel_username.lstrip('@')
+        
         try:
             
-            # Обновляем статус
-            await sync_to_async(setattr)(article, 'video_status', 'downloading')
-            await sync_to_async(article.save)()
-            
-            channel = channel_username.lstrip('@')
-            
             logger.info(f"📥 Скачиваю видео для статьи {article_id}")
             logger.info(f"   Канал: @{channel}, Message ID: {message_id}")
             
-            # Получаем сообщение через get_messages
-            messages = await self.client.get_messages(
-                channel,
-                ids=message_id
-            )
-            
-            # get_messages возвращает список или одно сообщение
-            if isinstance(messages, list):
-                if not messages:
-                    raise Exception(f"Сообщение {message_id} не найдено в канале @{channel}")
-                msg = messages[0]
-            else:
-                if not messages:
-                    raise Exception(f"Сообщение {message_id} не найдено в канале @{channel}")
-                msg = messages
-            
-            # Проверяем наличие видео
-            if not hasattr(msg, 'media') or not msg.media:
-                raise Exception("В сообщении нет медиа")
-            
-            # Скачиваем видео
-            file_path = await self.client.download_media(
-                msg.media,
-                file=str(DOWNLOAD_DIR)
-            )
+            # FloodWait ставит на паузу все задачи; после паузы пробуем снова
+            for attempt in range(1, MAX_FLOOD_RETRIES + 1):
+                await self.flood_limiter.wait()
+                try:
+                    file_path = await self._fetch_video(channel, message_id, article_id)
+                    break
+                except FloodWaitError as e:
+                    if attempt == MAX_FLOOD_RETRIES:
+                        raise
+                    logger.warning(f"⏳ FloodWait: все загрузки на паузе {e.seconds} секунд (статья {article_id})")
+                    self.flood_limiter.pause(e.seconds)
             
             if not file_path:
                 raise Exception("Не удалось скачать файл")
             
             logger.info(f"✅ Видео скачано: {file_path}")
             
-            # Сохраняем файл в Django (синхронная операция)
+            # Привязываем файл к статье (синхронная операция)
             def save_video_file(article_obj, file_path_str):
-                with open(file_path_str, 'rb') as f:
-                    file_name = Path(file_path_str).name
-                    article_obj.video_file.save(
-                        file_name,
-                        f,
-                        save=True
-                    )
-                # Удаляем временный файл
-                os.remove(file_path_str)
+                finalize_video_file(article_obj, file_path_str)
                 # Обновляем статус
                 article_obj.video_status = 'ready'
-                article_obj.save()
+                article_obj.save(update_fields=['video_file', 'video_status', 'updated_at'])
             
             await sync_to_async(save_video_file)(article, str(file_path))
             
             logger.info(f"✅ Статья {article_id} обновлена, видео готово")
+            
+            # Видео уже доступно; дальше готовим его к потоковому воспроизведению
+            await self.process_video(article)
             return True
             
         except FloodWaitError as e:
             logger.warning(f"⏳ FloodWait: нужно подождать {e.seconds} секунд")
+            self.flood_limiter.pause(e.seconds)
             await sync_to_async(setattr)(article, 'video_status', 'pending')  # Возвращаем в очередь
             await sync_to_async(article.save)()
             return False
@@ -168,40 +386,429 @@ class TelegramVideoDownloader:
             await sync_to_async(article.save)()
             return False
             
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            # Сетевая ошибка: возвращаем в очередь, скачанное продолжится по журналу
+            logger.warning(f"🔁 Сетевая ошибка при скачивании видео для статьи {article_id}: {e}, вернётся в очередь")
+            await sync_to_async(setattr)(article, 'video_status', 'pending')
+            await sync_to_async(article.save)()
+            return False
+            
         except Exception as e:
             logger.error(f"❌ Ошибка при скачивании видео для статьи {article_id}: {e}")
             logger.exception(e)
+            # Окончательная ошибка: журнал и недокачанный файл больше не нужны
+            discard_partial_download(channel, message_id)
             await sync_to_async(setattr)(article, 'video_status', 'error')
             await sync_to_async(article.save)()
             return False
     
-    async def process_pending_videos(self, limit: int = 10):
+    async def _fetch_video(self, channel: str, message_id: int, article_id: int) -> str:
         """
-        Обрабатывает все статьи со статусом 'pending'
+        Получает сообщение из канала и скачивает из него видео
         
         Args:
-            limit: Максимальное количество видео для обработки за раз
+            channel: Username канала (без @)
+            message_id: ID сообщения
+            article_id: ID статьи
+            
+        Returns:
+            Путь к скачанному файлу
         """
-        # Получаем список ID статей через sync_to_async
-        def get_pending_article_ids():
+        # Получаем сообщение через get_messages
+        messages = await self.client.get_messages(
+            channel,
+            ids=message_id
+        )
+        
+        # get_messages возвращает список или одно сообщение
+        if isinstance(messages, list):
+            if not messages:
+                raise Exception(f"Сообщение {message_id} не найдено в канале @{channel}")
+            msg = messages[0]
+        else:
+            if not messages:
+                raise Exception(f"Сообщение {message_id} не найдено в канале @{channel}")
+            msg = messages
+        
+        # Проверяем наличие видео
+        if not hasattr(msg, 'media') or not msg.media:
+            raise Exception("В сообщении нет медиа")
+        
+        if msg.document:
+            return await self._download_document(msg, channel, message_id, article_id)
+        
+        # Не документ (например, фото) - качаем целиком
+        return await self.client.download_media(
+            msg.media,
+            file=str(DOWNLOAD_DIR)
+        )
+    
+    async def _download_document(self, msg, channel: str, message_id: int, article_id: int) -> str:
+        """
+        Скачивает документ по частям с возможностью продолжить после рестарта
+        
+        Файл заранее создаётся нужного размера в PARTIAL_DIR, каждая часть
+        пишется на своё место. Рядом лежит журнал с тем, сколько байт каждой
+        части уже надёжно записано на диск; если воркер упадёт, следующий
+        запуск продолжит с этих смещений. Большие файлы качаются в несколько
+        потоков. В конце проверяется, что получены все байты.
+        
+        Args:
+            msg: Сообщение с документом
+            channel: Username канала (без @)
+            message_id: ID сообщения
+            article_id: ID статьи (для продления аренды)
+            
+        Returns:
+            Путь к скачанному файлу
+        """
+        document = msg.document
+        file_size = msg.file.size
+        file_name = f"video_{channel}_{message_id}{msg.file.ext or '.mp4'}"
+        partial_path = PARTIAL_DIR / f"{file_name}.part"
+        journal = DownloadJournal(PARTIAL_DIR / f"{file_name}.json")
+        
+        resumed = journal.load(document.id, file_size) and partial_path.exists()
+        if not resumed:
+            journal.reset(document.id, file_size)
+        
+        parts = asyncio.Queue()
+        for offset, length in journal.remaining_parts():
+            parts.put_nowait((offset, length))
+        
+        if file_size >= PARALLEL_DOWNLOAD_THRESHOLD:
+            workers_count = min(PARALLEL_PARTS, parts.qsize())
+        else:
+            workers_count = min(1, parts.qsize())
+        
+        if resumed:
+            logger.info(
+                f"   Продолжаю скачивание: уже есть {journal.committed_bytes() / 1024 / 1024:.1f} "
+                f"из {file_size / 1024 / 1024:.1f} МБ"
+            )
+        logger.info(
+            f"   Файл {file_size / 1024 / 1024:.1f} МБ: "
+            f"осталось {parts.qsize()} частей, потоков: {workers_count}"
+        )
+        
+        async def part_worker():
+            while True:
+                try:
+                    offset, length = parts.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self._download_part(document, fd, journal, offset, length, file_size, article_id)
+        
+        flags = os.O_RDWR | os.O_CREAT
+        if not resumed:
+            flags |= os.O_TRUNC
+        fd = os.open(partial_path, flags, 0o644)
+        try:
+            os.ftruncate(fd, file_size)
+            
+            workers = [asyncio.create_task(part_worker()) for _ in range(workers_count)]
+            try:
+                await asyncio.gather(*workers)
+            except BaseException:
+                for worker in workers:
+                    worker.cancel()
+                await asyncio.gather(*workers, return_exceptions=True)
+                raise
+            finally:
+                # Что успели скачать - фиксируем для следующего запуска
+                os.fsync(fd)
+                journal.save()
+        finally:
+            os.close(fd)
+        
+        received = journal.committed_bytes()
+        if received != file_size:
+            partial_path.unlink(missing_ok=True)
+            journal.delete()
+            raise Exception(f"Размер не совпадает: получено {received} из {file_size} байт")
+        
+        # Недокачанный файл уже лежит на той же файловой системе, что и хранилище:
+        # finalize_video_file переименует его на место без копирования
+        file_path = PARTIAL_DIR / file_name
+        os.replace(partial_path, file_path)
+        journal.delete()
+        return str(file_path)
+    
+    async def _download_part(
+        self,
+        document,
+        fd: int,
+        journal: 'DownloadJournal',
+        offset: int,
+        length: int,
+        file_size: int,
+        article_id: int
+    ):
+        """
+        Скачивает (остаток) одной части документа и пишет его по своему смещению
+        
+        Прогресс отмечается в журнале после каждого запроса; на диск журнал
+        сбрасывается не чаще JOURNAL_FLUSH_INTERVAL - вместе с fsync данных.
+        """
+        written = 0
+        requests_count = -(-length // PARALLEL_REQUEST_SIZE)
+        
+        async for chunk in self.client.iter_download(
+            document,
+            offset=offset,
+            limit=requests_count,
+            request_size=PARALLEL_REQUEST_SIZE,
+            file_size=file_size
+        ):
+            chunk = bytes(chunk[:length - written])
+            position = offset + written
+            write_at(fd, chunk, position)
+            journal.advance(position, len(chunk))
+            written += len(chunk)
+            
+            if journal.flush_due():
+                os.fsync(fd)
+                journal.save()
+            await self._heartbeat(article_id)
+        
+        if written != length:
+            raise Exception(f"Часть {offset}: получено {written} из {length} байт")
+    
+    async def _heartbeat(self, article_id: int):
+        """Продлевает аренду статьи в статусе 'downloading'"""
+        loop = asyncio.get_running_loop()
+        last = self._heartbeats.get(article_id, 0.0)
+        if loop.time() - last < HEARTBEAT_INTERVAL:
+            return
+        self._heartbeats[article_id] = loop.time()
+        
+        def touch(article_id):
+            Article.objects.filter(id=article_id, video_status='downloading').update(updated_at=timezone.now())
+        
+        await sync_to_async(touch)(article_id)
+    
+    async def process_video(self, article) -> bool:
+        """
+        Faststart remux, HLS, постер и превью для скачанного видео (ffmpeg в отдельном потоке)
+        
+        Ошибка обработки не делает видео недоступным - остаётся исходный файл.
+        
+        Returns:
+            True если видео обработано
+        """
+        try:
+            updates = await asyncio.to_thread(process_article_video, article)
+        except Exception as e:
+            logger.warning(f"⚠️  Не удалось обработать видео статьи {article.id}: {e}")
+            return False
+        
+        if not updates:
+            return False
+        
+        def save_updates(article_id):
+            Article.objects.filter(id=article_id).update(**updates)
+        
+        await sync_to_async(save_updates)(article.id)
+        logger.info(f"🎬 Видео статьи {article.id} подготовлено для потокового воспроизведения")
+        return True
+    
+    async def claim_article(self, article_id: int) -> bool:
+        """
+        Переводит статью из 'pending' в 'downloading' (compare-and-set)
+        
+        Returns:
+            True если статью забрал этот воркер
+        """
+        def claim(article_id):
+            return Article.objects.filter(
+                id=article_id,
+                video_status='pending'
+            ).update(video_status='downloading', updated_at=timezone.now()) == 1
+        
+        return await sync_to_async(claim)(article_id)
+    
+    async def get_pending_article_ids(self, limit: int, exclude=()) -> list:
+        """ID статей, ожидающих скачивания (старые первыми)"""
+        def get_ids():
             return list(Article.objects.filter(
                 video_status='pending',
                 telegram_channel_username__isnull=False,
                 telegram_message_id__isnull=False
-            ).values_list('id', flat=True)[:limit])
+            ).exclude(id__in=list(exclude)).order_by('created_at').values_list('id', flat=True)[:limit])
         
-        pending_ids = await sync_to_async(get_pending_article_ids)()
+        return await sync_to_async(get_ids)()
+    
+    async def recover_stale_downloads(self) -> int:
+        """
+        Возвращает в очередь статьи, зависшие в 'downloading'
+        
+        Скачивание продлевает аренду раз в HEARTBEAT_INTERVAL; если статья
+        не обновлялась дольше DOWNLOAD_LEASE_TIMEOUT, воркер, который её качал,
+        умер. Уже скачанная часть файла подхватится по журналу.
+        
+        Returns:
+            Количество возвращённых в очередь статей
+        """
+        def reset_stale():
+            deadline = timezone.now() - timedelta(seconds=DOWNLOAD_LEASE_TIMEOUT)
+            return Article.objects.filter(
+                video_status='downloading',
+                updated_at__lt=deadline
+            ).update(video_status='pending')
+        
+        recovered = await sync_to_async(reset_stale)()
+        if recovered:
+            logger.warning(f"♻️  Возвращено в очередь зависших загрузок: {recovered}")
+        return recovered
+    
+    async def process_pending_videos(self, limit: int = 10, concurrency: int = DEFAULT_CONCURRENCY):
+        """
+        Обрабатывает все статьи со статусом 'pending'
+        
+        Видео скачиваются параллельно, но не более concurrency одновременно.
+        
+        Args:
+            limit: Максимальное количество видео для обработки за раз
+            concurrency: Сколько видео скачивать одновременно
+        """
+        # Получаем список ID статей через sync_to_async
+        await self.recover_stale_downloads()
+        pending_ids = await self.get_pending_article_ids(limit)
         
         if not pending_ids:
             logger.info("ℹ️  Нет видео для скачивания")
             return
         
-        logger.info(f"📋 Найдено {len(pending_ids)} видео для скачивания")
+        concurrency = max(1, concurrency)
+        logger.info(f"📋 Найдено {len(pending_ids)} видео для скачивания (одновременно: {concurrency})")
+        
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def download_with_limit(article_id):
+            async with semaphore:
+                await self.flood_limiter.wait()
+                return await self.download_video(article_id)
+        
+        results = await asyncio.gather(
+            *(download_with_limit(article_id) for article_id in pending_ids),
+            return_exceptions=True
+        )
+        
+        success_count = sum(1 for result in results if result is True)
+        logger.info(f"📊 Скачано {success_count} из {len(pending_ids)} видео")
+    
+    def wake(self):
+        """Будит демон: проверить очередь прямо сейчас"""
+        if self._wake_event is not None:
+            self._wake_event.set()
+    
+    def stop(self):
+        """Просит демон завершиться после текущих загрузок"""
+        logger.info("🛑 Получен сигнал остановки, завершаю текущие загрузки...")
+        self._stopping = True
+        self.wake()
+    
+    async def run_daemon(
+        self,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        min_interval: float = DAEMON_MIN_INTERVAL,
+        max_interval: float = DAEMON_MAX_INTERVAL
+    ):
+        """
+        Постоянный режим: один подключённый клиент и очередь в базе
+        
+        Свободные слоты заполняются статьями 'pending' сразу по мере
+        освобождения. Пока работы нет, интервал опроса удваивается от
+        min_interval до max_interval; SIGUSR1 (notify_video_worker) будит
+        демон немедленно. SIGTERM/SIGINT - мягкая остановка: ждём текущие
+        загрузки до DAEMON_SHUTDOWN_TIMEOUT, остальные возвращаем в очередь
+        (скачанная часть сохранится в журнале).
         
-        for article_id in pending_ids:
-            await self.download_video(article_id)
-            # Небольшая задержка между запросами
-            await asyncio.sleep(2)
+        Args:
+            concurrency: Сколько видео скачивать одновременно
+            min_interval: Минимальный интервал опроса базы (секунды)
+            max_interval: Максимальный интервал опроса базы (секунды)
+        """
+        # Второй демон не запускается: SIGUSR1 от notify_video_worker получает только один
+        if not write_pidfile():
+            logger.error(f"❌ Демон скачивания видео уже запущен (PID {read_pid()}), выходим")
+            return
+        
+        loop = asyncio.get_running_loop()
+        self._wake_event = asyncio.Event()
+        self._stopping = False
+        concurrency = max(1, concurrency)
+        
+        handled_signals = []
+        for sig, handler in (
+            (getattr(signal, 'SIGUSR1', None), self.wake),
+            (signal.SIGTERM, self.stop),
+            (signal.SIGINT, self.stop),
+        ):
+            if sig is None:
+                continue
+            try:
+                loop.add_signal_handler(sig, handler)
+                handled_signals.append(sig)
+            except (NotImplementedError, RuntimeError):
+                pass
+        
+        logger.info(f"🚀 Демон скачивания видео запущен (PID {os.getpid()}, одновременно: {concurrency})")
+        
+        active = {}
+        interval = min_interval
+        try:
+            while not self._stopping:
+                self._wake_event.clear()
+                await self.recover_stale_downloads()
+                
+                free_slots = concurrency - len(active)
+                started = 0
+                if free_slots > 0:
+                    for article_id in await self.get_pending_article_ids(free_slots, exclude=active.keys()):
+                        task = asyncio.create_task(self.download_video(article_id))
+                        task.add_done_callback(lambda _task, article_id=article_id: self._on_task_done(active, article_id))
+                        active[article_id] = task
+                        started += 1
+                
+                if started:
+                    interval = min_interval
+                elif not active:
+                    interval = min(interval * 2, max_interval)
+                
+                try:
+                    await asyncio.wait_for(self._wake_event.wait(), timeout=interval)
+                    # Разбудили сигналом или завершилась загрузка - опрашиваем чаще
+                    interval = min_interval
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if active:
+                logger.info(f"⏳ Ожидаю завершения загрузок: {len(active)}")
+                done, pending = await asyncio.wait(list(active.values()), timeout=DAEMON_SHUTDOWN_TIMEOUT)
+                if pending:
+                    interrupted_ids = [article_id for article_id, task in active.items() if task in pending]
+                    for task in pending:
+                        task.cancel()
+                    await asyncio.gather(*pending, return_exceptions=True)
+                    
+                    def release(ids):
+                        Article.objects.filter(id__in=ids, video_status='downloading').update(video_status='pending')
+                    
+                    await sync_to_async(release)(interrupted_ids)
+                    logger.info(f"♻️  Возвращено в очередь прерванных загрузок: {len(interrupted_ids)}")
+            
+            for sig in handled_signals:
+                loop.remove_signal_handler(sig)
+            remove_pidfile()
+            self._wake_event = None
+            logger.info("👋 Демон скачивания видео остановлен")
+    
+    def _on_task_done(self, active: dict, article_id: int):
+        """Освобождает слот и будит цикл демона"""
+        active.pop(article_id, None)
+        self._heartbeats.pop(article_id, None)
+        self.wake()
     
     async def close(self):
         """Закрытие клиента"""
@@ -217,7 +824,7 @@ async def main():
     
     try:
         await downloader.start()
-        await downloader.process_pending_videos(limit=10)
+        await downloader.process_pending_videos(limit=10, concurrency=DEFAULT_CONCURRENCY)
     finally:
         await downloader.close()
 
@@ -2,6 +2,7 @@
 Команда для создания всех категорий работ
 """
 from django.core.management.base import BaseCommand
+from core.services.slugs import make_slug
 from works.models import Category
 
 
@@ -73,16 +74,9 @@ class Command(BaseCommand):
         updated_count = 0
 
         for index, category_name in enumerate(categories_data, start=1):
-            # Создаем slug из названия
-            from django.utils.text import slugify
-            slug = slugify(category_name)
-            
-            # Если slug уже существует, добавляем суффикс
-            base_slug = slug
-            counter = 1
-            while Category.objects.filter(slug=slug).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
+            # Создаем slug из названия (с транслитерацией): повторный запуск
+            # обновляет ту же категорию, а не создаёт дубликат
+            slug = make_slug(category_name, fallback=f'category-{index}')
             
             category, created = Category.objects.update_or_create(
                 slug=slug,
@@ -2,7 +2,7 @@
 Команда для исправления пустых slug у категорий
 """
 from django.core.management.base import BaseCommand
-from django.utils.text import slugify
+from core.services.slugs import allocate_slug
 from works.models import Category
 
 
@@ -20,20 +20,11 @@ class Command(BaseCommand):
         fixed_count = 0
 
         for category in categories:
-            base_slug = slugify(category.name)
-            if not base_slug:
-                # Если slug все еще пустой, используем id
-                base_slug = f'category-{str(category.id)[:8]}'
-            
-            # Проверяем уникальность
-            slug = base_slug
-            counter = 1
-            while Category.objects.filter(slug=slug).exclude(id=category.id).exists():
-                slug = f"{base_slug}-{counter}"
-                counter += 1
+            # Транслитерация и проверка уникальности - одним запросом
+            slug = allocate_slug(category, category.name, fallback='category')
             
             category.slug = slug
-            category.save()
+            category.save(update_fields=['slug', 'updated_at'])
             fixed_count += 1
             self.stdout.write(
                 self.style.SUCCESS(f'Исправлена категория: {category.name} -> {slug}')
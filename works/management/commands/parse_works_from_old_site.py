@@ -11,9 +11,9 @@ import requests
 from bs4 import BeautifulSoup
 from django.core.files.base import ContentFile
 from django.core.management.base import BaseCommand
-from django.utils.text import slugify
 from loguru import logger
 
+from core.services.slugs import allocate_slugs
 from works.models import Category, Work
 
 
@@ -336,17 +336,5 @@ class Command(BaseCommand):
         Returns:
             str: Slug
         """
-        base_slug = slugify(name)
-        
-        # Если slug пустой, используем fallback
-        if not base_slug:
-            base_slug = f'category-{hash(name) % 10000}'
-        
-        # Проверяем уникальность
-        slug = base_slug
-        counter = 1
-        while Category.objects.filter(slug=slug).exists():
-            slug = f'{base_slug}-{counter}'
-            counter += 1
-        
-        return slug
+        # Транслитерация и проверка уникальности - одним запросом
+        return allocate_slugs(Category, [name], fallback='category')[0]
@@ -2,8 +2,8 @@
 Модель категории работ
 """
 from django.db import models
-from django.utils.text import slugify
 from core.models import BaseModel
+from core.services.slugs import save_with_unique_slug
 
 
 class Category(BaseModel):
@@ -60,15 +60,9 @@ class Category(BaseModel):
 
     def save(self, *args, **kwargs):
         """
-        Автоматическое создание slug из названия, если не указан
+        Автоматическое создание уникального slug из названия, если не указан
         """
-        if not self.slug or self.slug.strip() == '':
-            base_slug = slugify(self.name)
-            if not base_slug:
-                # Если slug все еще пустой (например, только спецсимволы), используем id
-                base_slug = f'category-{self.id}' if self.id else 'category'
-            self.slug = base_slug
-        super().save(*args, **kwargs)
+        save_with_unique_slug(self, lambda: super(Category, self).save(*args, **kwargs), self.name, fallback='category')
     
     def get_works_count(self):
         """